@@ -6,12 +6,20 @@ from flask_sqlalchemy import SQLAlchemy
 from sqlalchemy.schema import MetaData
 
 from .common.constants import SQLALCHEMY_NAMING_CONVENTION
+from .utils import serialization
 
 metadata = MetaData(naming_convention=SQLALCHEMY_NAMING_CONVENTION)
-db = SQLAlchemy(metadata=metadata)
+db = SQLAlchemy(
+    metadata=metadata,
+    engine_options={
+        "json_serializer": serialization.dumps_str,
+        "json_deserializer": serialization.loads,
+    },
+)
 argon2 = Argon2()
 login_manager = LoginManager()
 redis_jobs = Redis()
+redis_cache = Redis()
 
 
 def create_app(name=__name__, config_override=None):
@@ -36,10 +44,13 @@ def init_extensions(app):
     argon2.init_app(app)
     login_manager.init_app(app)
     redis_jobs.init_app(app, "REDIS_JOBS")
+    redis_cache.init_app(app, "REDIS_CACHE")
 
 
 def customize_app(app):
-    pass
+    from .middleware.session import AuthContextGlobals
+
+    app.app_ctx_globals_class = AuthContextGlobals
 
 
 def register_blueprints(app):
@@ -51,10 +62,6 @@ def register_blueprints(app):
 
 
 def register_middleware(app):
-    from .middleware.session import load_session_and_user_and_permissions
-
-    app.before_request(load_session_and_user_and_permissions)
-
     if app.config["ENABLE_CORS"]:
         from .middleware.cors import add_cors_headers
 
@@ -62,4 +69,10 @@ def register_middleware(app):
 
 
 def register_cli_commands(app):
-    pass
+    from .main.commands.audio import audio_cli
+    from .main.commands.flow_template import flow_template_cli
+    from .main.commands.session import session_cli
+
+    app.cli.add_command(audio_cli)
+    app.cli.add_command(flow_template_cli)
+    app.cli.add_command(session_cli)
@@ -1,6 +1,8 @@
 from app.common import common
+from app.decorators.permission import public
 
 
 @common.route("/", methods=["GET"])
+@public()
 def health_check():
     return ""
@@ -0,0 +1,55 @@
+from functools import wraps
+
+from flask import make_response, request
+
+from ..utils import response
+
+
+def conditional_request(get_version):
+    """
+    Makes the views of a versioned resource conditional. 'get_version' is
+    called with the view's arguments and 'for_update', and returns the current
+    version of the resource, or None if it doesn't exist.
+
+    GET responses carry the version as their ETag, and a matching
+    If-None-Match returns 304 without calling the view. Other methods lock the
+    resource (for_update=True) until the end of the transaction, so they must
+    be decorated inside transaction(); an If-Match that doesn't match the
+    current version returns 412, and successful responses carry the new
+    version as their ETag.
+    """
+
+    def decorator(f):
+        @wraps(f)
+        def decorated_function(*args, **kwargs):
+            if request.method in ("GET", "HEAD"):
+                version = get_version(*args, for_update=False, **kwargs)
+                if version is None:
+                    return f(*args, **kwargs)
+
+                etag = str(version)
+                if request.if_none_match.contains(etag):
+                    res = make_response(response.not_modified())
+                else:
+                    res = make_response(f(*args, **kwargs))
+                    if res.status_code != 200:
+                        return res
+                res.set_etag(etag)
+                return res
+
+            version = get_version(*args, for_update=True, **kwargs)
+            if version is None:
+                return f(*args, **kwargs)
+
+            if request.if_match and not request.if_match.contains(str(version)):
+                return response.precondition_failed()
+
+            res = make_response(f(*args, **kwargs))
+            if res.status_code == 200:
+                version = get_version(*args, for_update=True, **kwargs)
+                res.set_etag(str(version))
+            return res
+
+        return decorated_function
+
+    return decorator
@@ -5,6 +5,19 @@ from flask import g
 from ..utils.response import unauthorized_error
 
 
+def public():
+    """
+    Marks a view as public. The auth context is never loaded for public views
+    and 'g.current_user' is None.
+    """
+
+    def decorator(f):
+        f.is_public = True
+        return f
+
+    return decorator
+
+
 def sys_admin_required():
     def decorator(f):
         @wraps(f)
@@ -18,29 +31,47 @@ def sys_admin_required():
     return decorator
 
 
-def _has_permission(permissions, permission_to_check):
-    if not permissions:
-        return False
+def _get_permission_identifiers(permission):
+    identifiers = (permission,) if isinstance(permission, str) else tuple(permission)
+    if not identifiers:
+        raise ValueError("No permission given")
+    for identifier in identifiers:
+        if not isinstance(identifier, str) or "." not in identifier:
+            raise ValueError(f"Invalid permission identifier {identifier!r}")
+    return identifiers
 
-    if isinstance(permission_to_check, str):
-        return permission_to_check in permissions
-    elif (
-        isinstance(permission_to_check, list)
-        or isinstance(permission_to_check, tuple)
-        or isinstance(permission_to_check, set)
-    ):
-        permissions_to_check = permission_to_check
-        for permission in permissions_to_check:
-            if permission in permissions:
-                return True
-    return False
+
+def _compile_permission_mask(identifiers):
+    from ..main.dao import permission as permission_dao
+
+    return permission_dao.get_permission_mask(identifiers)
+
+
+def _has_permission(permission_mask, required_permission_mask):
+    if not permission_mask:
+        return False
+    return permission_mask & required_permission_mask != 0
 
 
 def permission_required(permission):
+    # 'permission' is a fully qualified permission identifier, or a list,
+    # tuple or set of them of which the user needs any one. The identifiers
+    # are checked here, but compiled to a mask on first use as the ids are
+    # read from the database. Unknown identifiers fail the request, and the
+    # mask is only kept once all of them have been resolved.
+    identifiers = _get_permission_identifiers(permission)
+    required_permission_mask = None
+
     def decorator(f):
         @wraps(f)
         def decorated_function(*args, **kwargs):
-            if not _has_permission(g.current_user_permissions, permission):
+            nonlocal required_permission_mask
+            if required_permission_mask is None:
+                required_permission_mask = _compile_permission_mask(identifiers)
+
+            if not _has_permission(
+                g.current_user_permissions, required_permission_mask
+            ):
                 return unauthorized_error()
             return f(*args, **kwargs)
 
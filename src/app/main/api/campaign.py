@@ -3,7 +3,12 @@ from ..dao import campaign as campaign_dao
 from ..schemas import campaign as campaign_schemas
 
 
-def search_campaigns(org_id, query, current_user):
-    campaigns = campaign_dao.get_campaigns_with_criteria(org_id, query, current_user)
-    res = campaign_schemas.campaign_schema.dump(campaigns, many=True)
-    return response.success(res)
+def search_campaigns(org_id, query, cursor, page_size, current_user):
+    try:
+        page = campaign_dao.get_campaigns_with_criteria(
+            org_id, query, current_user, cursor, page_size
+        )
+    except ValueError:
+        return response.invalid_cursor()
+    res = campaign_schemas.campaign_schema.dump(page.items, many=True)
+    return response.success_page(res, page.next_cursor)
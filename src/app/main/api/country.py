@@ -5,10 +5,13 @@ from ..dao import country as country_dao
 from ..schemas import country as country_schemas
 
 
-def get_all_countries():
-    countries = country_dao.get_all_countries()
-    res = country_schemas.country_schema.dump(countries, many=True)
-    return response.success(res)
+def get_all_countries(cursor, page_size):
+    try:
+        page = country_dao.get_all_countries(cursor, page_size)
+    except ValueError:
+        return response.invalid_cursor()
+    res = country_schemas.country_schema.dump(page.items, many=True)
+    return response.success_page(res, page.next_cursor)
 
 
 def get_country(country_id):
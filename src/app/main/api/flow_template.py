@@ -3,13 +3,13 @@ from marshmallow.exceptions import ValidationError
 from slugify import slugify
 
 from ...utils import response, s3
+from ..dao import audio as audio_dao
 from ..dao import flow_category as flow_category_dao
 from ..dao import flow_template as flow_template_dao
 from ..dao import org as org_dao
 from ..dao import recording_instruction as recording_instruction_dao
 from ..models import flow_template as flow_template_constants
 from ..models import main as constants
-from ..models.flow_template import Template
 from ..schemas import content as content_schemas
 from ..schemas import flow_template as flow_template_schemas
 
@@ -20,12 +20,44 @@ def get_fields():
     return response.success(res)
 
 
-def get_all_flow_templates():
-    flow_template = flow_template_dao.get_all_flow_templates()
-    res = flow_template_schemas.flow_template_schema.dump(flow_template, many=True)
+def get_all_flow_templates(cursor, page_size):
+    try:
+        page = flow_template_dao.get_all_flow_templates(cursor, page_size)
+    except ValueError:
+        return response.invalid_cursor()
+    res = flow_template_schemas.flow_template_schema.dump(page.items, many=True)
+    return response.success_page(res, page.next_cursor)
+
+
+def get_template_cache_stats():
+    stats = flow_template_dao.get_template_cache_stats()
+    res = {
+        "entries": stats["entries"],
+        "steps": stats["weight"],
+        "maxSteps": stats["max_weight"],
+        "hits": stats["hits"],
+        "misses": stats["misses"],
+        "evictions": stats["evictions"],
+        "hitRatio": stats["hit_ratio"],
+    }
     return response.success(res)
 
 
+def get_flow_template_version(flow_template_id, for_update=False, **kwargs):
+    return flow_template_dao.get_flow_template_version(flow_template_id, for_update)
+
+
+def get_template_version_hash(version_id, for_update=False, **kwargs):
+    return flow_template_dao.get_template_version_hash(version_id)
+
+
+def get_template_version(version_id, current_user):
+    spec = flow_template_dao.get_template_version_json(version_id)
+    if spec is None:
+        return response.not_found()
+    return response.immutable(spec)
+
+
 def get_flow_template(flow_template_id, current_user):
     flow_template = flow_template_dao.get_flow_template_with_id(flow_template_id)
     if not flow_template:
@@ -78,6 +110,41 @@ def create_flow_template(data, current_user):
     return response.success(res)
 
 
+def clone_flow_template(flow_template_id, data, current_user):
+    flow_template = flow_template_dao.get_flow_template_with_id(flow_template_id)
+    if not flow_template:
+        return response.not_found()
+
+    try:
+        data = flow_template_schemas.clone_flow_template_schema.load(data)
+    except ValidationError as e:
+        return response.validation_failed(e.messages)
+
+    name = data.get("name")
+    version_identifier = data.get("version_identifier")
+    description = data.get("description")
+
+    flow_template_with_same_name_and_version = (
+        flow_template_dao.get_flow_template_by_name_and_version_identifier(
+            name, version_identifier
+        )
+    )
+
+    if flow_template_with_same_name_and_version:
+        return response.validation_failed(
+            {
+                "message": "A flow template with this name and version identifier "
+                "already exists"
+            }
+        )
+
+    clone = flow_template_dao.clone_flow_template(
+        flow_template, name, version_identifier, description, current_user
+    )
+    res = flow_template_schemas.flow_template_schema.dump(clone)
+    return response.success(res)
+
+
 def get_flow_template_fields(flow_template_id, current_user):
     flow_template = flow_template_dao.get_flow_template_with_id(flow_template_id)
     if not flow_template:
@@ -412,9 +479,83 @@ def get_flow_template_messages(flow_template_id, org_id, current_user):
     return response.success(res)
 
 
+def get_flow_template_content(flow_template_id, org_id, current_user):
+    flow_template = flow_template_dao.get_flow_template_with_id(flow_template_id)
+    if not flow_template:
+        return response.not_found()
+    content = flow_template_dao.get_resolved_content(flow_template, org_id)
+    res = {
+        "messages": flow_template_schemas.flow_template_message_schema.dump(
+            content.get_messages(), many=True
+        ),
+        "emailTemplates": content_schemas.email_template_schema.dump(
+            content.get_email_templates(), many=True
+        ),
+        "smsTemplates": content_schemas.sms_template_schema.dump(
+            content.get_sms_templates(), many=True
+        ),
+    }
+    return response.success(res)
+
+
 S3_PATH_FLOW_TEMPLATE_MESSAGE = "audio/ft/{flow_template_id}/o/{org_id}/{file_name}"
 
 
+def _get_message_audio_file_path(flow_template_id, org_id, file_name):
+    return S3_PATH_FLOW_TEMPLATE_MESSAGE.format(
+        flow_template_id=flow_template_id,
+        org_id=org_id if org_id else "default",
+        file_name=file_name,
+    )
+
+
+def _is_message_audio_file_uploaded(flow_template_id, org_id, audio_file_key):
+    prefix = _get_message_audio_file_path(flow_template_id, org_id, "")
+    return (
+        audio_file_key.startswith(prefix)
+        and "/" not in audio_file_key[len(prefix) :]
+        and s3.is_audio_uploaded(audio_file_key, is_private=False)
+    )
+
+
+def create_flow_template_message_audio_upload(flow_template_id, data, current_user):
+    flow_template = flow_template_dao.get_flow_template_with_id(flow_template_id)
+    if not flow_template:
+        return response.not_found()
+
+    try:
+        data = flow_template_schemas.message_audio_upload_schema.load(data)
+    except ValidationError as e:
+        return response.validation_failed(e.messages)
+
+    org_id = data.get("org_id")
+    file_name = data.get("file_name")
+
+    errors = {}
+
+    file_name_for_s3 = s3.generate_audio_file_name(file_name)
+    if not file_name_for_s3:
+        errors["fileName"] = ["Audio File must be of type wav or mp3"]
+
+    if org_id and not org_dao.get_org_with_id(org_id):
+        errors["orgId"] = ["Invalid Org Id"]
+
+    if errors:
+        return response.validation_failed(errors)
+
+    audio_file_key = _get_message_audio_file_path(
+        flow_template_id, org_id, file_name_for_s3
+    )
+    upload = s3.generate_presigned_audio_upload(audio_file_key, is_private=False)
+    return response.success(
+        {
+            "url": upload["url"],
+            "fields": upload["fields"],
+            "audioFileKey": audio_file_key,
+        }
+    )
+
+
 def create_flow_template_message(flow_template_id, data, audio_file, current_user):
     flow_template = flow_template_dao.get_flow_template_with_id(flow_template_id)
     if not flow_template:
@@ -433,16 +574,21 @@ def create_flow_template_message(flow_template_id, data, audio_file, current_use
     attribute = data.get("attribute")
     recording_instruction_id = data.get("recording_instruction_id")
     sequence = data.get("sequence")
+    audio_file_key = data.get("audio_file_key")
 
     errors = {}
     message_data_errors = {}
     errors["messageData"] = message_data_errors
 
     if message_type == constants.MESSAGE_TYPE_AUDIO_FROM_TEMPLATE:
-        if not audio_file:
+        if not audio_file and not audio_file_key:
             errors["audioFile"] = ["Audio File is required"]
+        elif audio_file and audio_file_key:
+            errors["audioFile"] = [
+                "Audio File must not be provided with an Audio File Key"
+            ]
     else:
-        if audio_file:
+        if audio_file or audio_file_key:
             errors["audioFile"] = [
                 "Audio File must not be provided for the specified message type"
             ]
@@ -559,21 +705,24 @@ def create_flow_template_message(flow_template_id, data, audio_file, current_use
             "A message with this name already exists in this flow template"
         ]
 
+    if audio_file_key and not _is_message_audio_file_uploaded(
+        flow_template_id, org_id, audio_file_key
+    ):
+        message_data_errors["audioFileKey"] = ["Audio File has not been uploaded"]
+
     if "audioFile" in errors or message_data_errors:
         if not message_data_errors:
             del errors["messageData"]
         return response.validation_failed(errors)
 
-    audio_file_path = None
+    audio_file_path = audio_file_key
 
     if audio_file:
         file_name_slug = slugify(file_name)
         file_uuid = shortuuid.uuid()
         file_name_for_s3 = f"{file_name_slug}-{file_uuid}.{file_ext}"
-        audio_file_path = S3_PATH_FLOW_TEMPLATE_MESSAGE.format(
-            flow_template_id=flow_template_id,
-            org_id=org_id if org_id else "default",
-            file_name=file_name_for_s3,
+        audio_file_path = _get_message_audio_file_path(
+            flow_template_id, org_id, file_name_for_s3
         )
         s3.upload_audio_to_s3(audio_file_path, audio_file, is_private=False)
 
@@ -590,6 +739,8 @@ def create_flow_template_message(flow_template_id, data, audio_file, current_use
         sequence,
         current_user,
     )
+    if audio_file_path:
+        audio_dao.queue_audio_ingest(audio_dao.AUDIO_KIND_MESSAGE, message)
     res = flow_template_schemas.flow_template_message_schema.dump(message)
     return response.success(res)
 
@@ -747,7 +898,9 @@ def update_flow_template_email_template(
     return response.success(res)
 
 
-def delete_flow_template_email_template(flow_template_id, email_template_id):
+def delete_flow_template_email_template(
+    flow_template_id, email_template_id, current_user
+):
     flow_template = flow_template_dao.get_flow_template_with_id(flow_template_id)
     if not flow_template:
         return response.not_found()
@@ -759,7 +912,9 @@ def delete_flow_template_email_template(flow_template_id, email_template_id):
     if not email_template:
         return response.not_found()
 
-    flow_template_dao.delete_flow_template_email_template(email_template)
+    flow_template_dao.delete_flow_template_email_template(
+        flow_template, email_template, current_user
+    )
     return response.success({})
 
 
@@ -893,7 +1048,7 @@ def update_flow_template_sms_template(
     return response.success(res)
 
 
-def delete_flow_template_sms_template(flow_template_id, sms_template_id):
+def delete_flow_template_sms_template(flow_template_id, sms_template_id, current_user):
     flow_template = flow_template_dao.get_flow_template_with_id(flow_template_id)
     if not flow_template:
         return response.not_found()
@@ -904,7 +1059,9 @@ def delete_flow_template_sms_template(flow_template_id, sms_template_id):
     if not sms_template:
         return response.not_found()
 
-    flow_template_dao.delete_flow_template_sms_template(sms_template)
+    flow_template_dao.delete_flow_template_sms_template(
+        flow_template, sms_template, current_user
+    )
     return response.success({})
 
 
@@ -912,7 +1069,7 @@ def get_flow_template_flows(flow_template_id, current_user):
     flow_template = flow_template_dao.get_flow_template_with_id(flow_template_id)
     if not flow_template:
         return response.not_found()
-    template = Template(template_json=flow_template.flow_spec)
+    template = flow_template_dao.get_template(flow_template)
     res = flow_template_schemas.flow_schema.dump(template.flows, many=True)
     return response.success(res)
 
@@ -921,7 +1078,7 @@ def get_flow_template_flow_details(flow_template_id, flow_id, current_user):
     flow_template = flow_template_dao.get_flow_template_with_id(flow_template_id)
     if not flow_template:
         return response.not_found()
-    template = Template(template_json=flow_template.flow_spec)
+    template = flow_template_dao.get_template(flow_template)
     flow = template.get_flow(flow_id)
     if not flow:
         return response.not_found()
@@ -942,9 +1099,7 @@ def get_flow_template_settings(flow_template_id, current_user):
     flow_template = flow_template_dao.get_flow_template_with_id(flow_template_id)
     if not flow_template:
         return response.not_found()
-    template = Template(template_json=flow_template.flow_spec)
-    if template.start_flow_id:
-        template.start_flow = template.get_flow(template.start_flow_id)
+    template = flow_template_dao.get_template(flow_template)
     res = flow_template_schemas.flow_template_settings_schema.dump(template)
     return response.success(res)
 
@@ -967,7 +1122,7 @@ def update_flow_template_settings(flow_template_id, data, current_user):
 
     errors = {}
 
-    template = Template(template_json=flow_template.flow_spec)
+    template = flow_template_dao.get_template(flow_template, for_update=True)
 
     start_flow = template.get_flow(start_flow_id)
     if not start_flow:
@@ -983,27 +1138,22 @@ def update_flow_template_settings(flow_template_id, data, current_user):
         if name
     }
     if message_names:
-        messages = flow_template_dao.get_flow_template_messages_with_names(
-            flow_template, message_names
-        )
-        valid_message_names = {message.name for message in messages}
+        names = flow_template_dao.get_flow_template_names(flow_template)
 
-        if no_input_message_name and no_input_message_name not in valid_message_names:
+        if no_input_message_name and not names.has_message(no_input_message_name):
             errors["noInputMessageName"] = [
                 f"Invalid message name - {no_input_message_name}"
             ]
 
-        if (
+        if invalid_input_message_name and not names.has_message(
             invalid_input_message_name
-            and invalid_input_message_name not in valid_message_names
         ):
             errors["invalidInputMessageName"] = [
                 f"Invalid message name - {invalid_input_message_name}"
             ]
 
-        if (
+        if input_tries_exceeded_message_name and not names.has_message(
             input_tries_exceeded_message_name
-            and input_tries_exceeded_message_name not in valid_message_names
         ):
             errors["inputTriesExceededMessageName"] = [
                 f"Invalid message name - {input_tries_exceeded_message_name}"
@@ -1040,7 +1190,7 @@ def create_flow_template_flow(flow_template_id, data, current_user):
 
     errors = {}
 
-    template = Template(template_json=flow_template.flow_spec)
+    template = flow_template_dao.get_template(flow_template, for_update=True)
 
     if any(flow.name.lower() == name.strip().lower() for flow in template.flows):
         errors["name"] = ["A flow with this name already exists in this template"]
@@ -1059,7 +1209,7 @@ def get_flow_template_steps(flow_template_id, flow_id, current_user):
     flow_template = flow_template_dao.get_flow_template_with_id(flow_template_id)
     if not flow_template:
         return response.not_found()
-    template = Template(template_json=flow_template.flow_spec)
+    template = flow_template_dao.get_template(flow_template)
     flow = template.get_flow(flow_id)
     if not flow:
         return response.not_found()
@@ -1088,12 +1238,8 @@ def validate_send_email_step(flow_template, template, flow, step, data):
     if existing_step and (step is None or step.id != existing_step.id):
         errors["name"] = ["A step with this name already exists in this flow"]
 
-    email_template = (
-        flow_template_dao.get_flow_template_email_template_with_name_and_org_id(
-            flow_template, email_template_name, org_id=None
-        )
-    )
-    if not email_template:
+    names = flow_template_dao.get_flow_template_names(flow_template)
+    if names.get_email_template_id(email_template_name) is None:
         errors["emailTemplateName"] = ["Invalid Email template"]
 
     if next_step_id:
@@ -1109,7 +1255,7 @@ def create_send_email_step(flow_template_id, flow_id, data, current_user):
     if not flow_template:
         return response.not_found()
 
-    template = Template(template_json=flow_template.flow_spec)
+    template = flow_template_dao.get_template(flow_template, for_update=True)
     flow = template.get_flow(flow_id)
     if not flow:
         return response.not_found()
@@ -1140,7 +1286,7 @@ def update_send_email_step(flow_template_id, flow_id, step_id, data, current_use
     if not flow_template:
         return response.not_found()
 
-    template = Template(template_json=flow_template.flow_spec)
+    template = flow_template_dao.get_template(flow_template, for_update=True)
     flow = template.get_flow(flow_id)
     if not flow:
         return response.not_found()
@@ -1189,12 +1335,8 @@ def validate_send_sms_step(flow_template, template, flow, step, data):
     if existing_step and (step is None or step.id != existing_step.id):
         errors["name"] = ["A step with this name already exists in this flow"]
 
-    sms_template = (
-        flow_template_dao.get_flow_template_sms_template_with_name_and_org_id(
-            flow_template, sms_template_name, org_id=None
-        )
-    )
-    if not sms_template:
+    names = flow_template_dao.get_flow_template_names(flow_template)
+    if names.get_sms_template_id(sms_template_name) is None:
         errors["smsTemplateName"] = ["Invalid SMS template"]
 
     if next_step_id:
@@ -1210,7 +1352,7 @@ def create_send_sms_step(flow_template_id, flow_id, data, current_user):
     if not flow_template:
         return response.not_found()
 
-    template = Template(template_json=flow_template.flow_spec)
+    template = flow_template_dao.get_template(flow_template, for_update=True)
     flow = template.get_flow(flow_id)
     if not flow:
         return response.not_found()
@@ -1241,7 +1383,7 @@ def update_send_sms_step(flow_template_id, flow_id, step_id, data, current_user)
     if not flow_template:
         return response.not_found()
 
-    template = Template(template_json=flow_template.flow_spec)
+    template = flow_template_dao.get_template(flow_template, for_update=True)
     flow = template.get_flow(flow_id)
     if not flow:
         return response.not_found()
@@ -1302,7 +1444,7 @@ def create_delay_step(flow_template_id, flow_id, data, current_user):
     if not flow_template:
         return response.not_found()
 
-    template = Template(template_json=flow_template.flow_spec)
+    template = flow_template_dao.get_template(flow_template, for_update=True)
     flow = template.get_flow(flow_id)
     if not flow:
         return response.not_found()
@@ -1332,7 +1474,7 @@ def update_delay_step(flow_template_id, flow_id, step_id, data, current_user):
     if not flow_template:
         return response.not_found()
 
-    template = Template(template_json=flow_template.flow_spec)
+    template = flow_template_dao.get_template(flow_template, for_update=True)
     flow = template.get_flow(flow_id)
     if not flow:
         return response.not_found()
@@ -1414,7 +1556,7 @@ def create_questions_step(flow_template_id, flow_id, data, current_user):
     if not flow_template:
         return response.not_found()
 
-    template = Template(template_json=flow_template.flow_spec)
+    template = flow_template_dao.get_template(flow_template, for_update=True)
     flow = template.get_flow(flow_id)
     if not flow:
         return response.not_found()
@@ -1453,7 +1595,7 @@ def update_questions_step(flow_template_id, flow_id, step_id, data, current_user
     if not flow_template:
         return response.not_found()
 
-    template = Template(template_json=flow_template.flow_spec)
+    template = flow_template_dao.get_template(flow_template, for_update=True)
     flow = template.get_flow(flow_id)
     if not flow:
         return response.not_found()
@@ -1509,17 +1651,13 @@ def validate_play_message_step(flow_template, template, flow, step, data):
     if existing_step and (step is None or step.id != existing_step.id):
         errors["name"] = ["A step with this name already exists in this flow"]
 
-    messages = flow_template_dao.get_flow_template_messages_with_names(
-        flow_template, message_names
-    )
-    if len(messages) != len(message_names):
-        valid_message_names = {message.name for message in messages}
-        for index, message_name in enumerate(message_names):
-            if message_name not in valid_message_names:
-                message_name_errors = errors.setdefault("messageNames", {})
-                message_name_errors[str(index)] = [
-                    "Invalid message name - {}".format(message_name)
-                ]
+    names = flow_template_dao.get_flow_template_names(flow_template)
+    for index, message_name in enumerate(message_names):
+        if not names.has_message(message_name):
+            message_name_errors = errors.setdefault("messageNames", {})
+            message_name_errors[str(index)] = [
+                "Invalid message name - {}".format(message_name)
+            ]
 
     if next_step_id:
         next_step = flow.get_step(next_step_id)
@@ -1534,7 +1672,7 @@ def create_play_message_step(flow_template_id, flow_id, data, current_user):
     if not flow_template:
         return response.not_found()
 
-    template = Template(template_json=flow_template.flow_spec)
+    template = flow_template_dao.get_template(flow_template, for_update=True)
     flow = template.get_flow(flow_id)
     if not flow:
         return response.not_found()
@@ -1564,7 +1702,7 @@ def update_play_message_step(flow_template_id, flow_id, step_id, data, current_u
     if not flow_template:
         return response.not_found()
 
-    template = Template(template_json=flow_template.flow_spec)
+    template = flow_template_dao.get_template(flow_template, for_update=True)
     flow = template.get_flow(flow_id)
     if not flow:
         return response.not_found()
@@ -1617,17 +1755,13 @@ def validate_get_input_step(flow_template, template, flow, step, data):
     if existing_step and (step is None or step.id != existing_step.id):
         errors["name"] = ["A step with this name already exists in this flow"]
 
-    messages = flow_template_dao.get_flow_template_messages_with_names(
-        flow_template, message_names
-    )
-    if len(messages) != len(message_names):
-        valid_message_names = {message.name for message in messages}
-        for index, message_name in enumerate(message_names):
-            if message_name not in valid_message_names:
-                message_name_errors = errors.setdefault("messageNames", {})
-                message_name_errors[str(index)] = [
-                    "Invalid message name - {}".format(message_name)
-                ]
+    names = flow_template_dao.get_flow_template_names(flow_template)
+    for index, message_name in enumerate(message_names):
+        if not names.has_message(message_name):
+            message_name_errors = errors.setdefault("messageNames", {})
+            message_name_errors[str(index)] = [
+                "Invalid message name - {}".format(message_name)
+            ]
 
     if purpose == flow_template_constants.GET_INPUT_PURPOSE_MAKE_DECISION:
         if result_name:
@@ -1657,13 +1791,7 @@ def validate_get_input_step(flow_template, template, flow, step, data):
             errors["resultName"] = ["Result Name is required"]
         else:
             excluded_step_id = step.id if step else None
-            existing_result_names = template.get_result_names(
-                excluded_step_id=excluded_step_id
-            )
-            existing_result_names = {
-                name.strip().lower() for name in existing_result_names
-            }
-            if result_name.strip().lower() in existing_result_names:
+            if template.has_result_name(result_name, excluded_step_id):
                 errors["resultName"] = [
                     "A result with this name already exists in this template"
                 ]
@@ -1714,7 +1842,7 @@ def create_get_input_step(flow_template_id, flow_id, data, current_user):
     if not flow_template:
         return response.not_found()
 
-    template = Template(template_json=flow_template.flow_spec)
+    template = flow_template_dao.get_template(flow_template, for_update=True)
     flow = template.get_flow(flow_id)
     if not flow:
         return response.not_found()
@@ -1761,7 +1889,7 @@ def update_get_input_step(flow_template_id, flow_id, step_id, data, current_user
     if not flow_template:
         return response.not_found()
 
-    template = Template(template_json=flow_template.flow_spec)
+    template = flow_template_dao.get_template(flow_template, for_update=True)
     flow = template.get_flow(flow_id)
     if not flow:
         return response.not_found()
@@ -1827,9 +1955,7 @@ def validate_record_audio_step(flow_template, template, flow, step, data):
         errors["name"] = ["A step with this name already exists in this flow"]
 
     excluded_step_id = step.id if step else None
-    existing_result_names = template.get_result_names(excluded_step_id=excluded_step_id)
-    existing_result_names = {name.strip().lower() for name in existing_result_names}
-    if result_name.strip().lower() in existing_result_names:
+    if template.has_result_name(result_name, excluded_step_id):
         errors["resultName"] = [
             "A result with this name already exists in this template"
         ]
@@ -1847,7 +1973,7 @@ def create_record_audio_step(flow_template_id, flow_id, data, current_user):
     if not flow_template:
         return response.not_found()
 
-    template = Template(template_json=flow_template.flow_spec)
+    template = flow_template_dao.get_template(flow_template, for_update=True)
     flow = template.get_flow(flow_id)
     if not flow:
         return response.not_found()
@@ -1878,7 +2004,7 @@ def update_record_audio_step(flow_template_id, flow_id, step_id, data, current_u
     if not flow_template:
         return response.not_found()
 
-    template = Template(template_json=flow_template.flow_spec)
+    template = flow_template_dao.get_template(flow_template, for_update=True)
     flow = template.get_flow(flow_id)
     if not flow:
         return response.not_found()
@@ -1945,7 +2071,7 @@ def create_set_status_step(flow_template_id, flow_id, data, current_user):
     if not flow_template:
         return response.not_found()
 
-    template = Template(template_json=flow_template.flow_spec)
+    template = flow_template_dao.get_template(flow_template, for_update=True)
     flow = template.get_flow(flow_id)
     if not flow:
         return response.not_found()
@@ -1975,7 +2101,7 @@ def update_set_status_step(flow_template_id, flow_id, step_id, data, current_use
     if not flow_template:
         return response.not_found()
 
-    template = Template(template_json=flow_template.flow_spec)
+    template = flow_template_dao.get_template(flow_template, for_update=True)
     flow = template.get_flow(flow_id)
     if not flow:
         return response.not_found()
@@ -2034,7 +2160,7 @@ def create_call_step(flow_template_id, flow_id, data, current_user):
     if not flow_template:
         return response.not_found()
 
-    template = Template(template_json=flow_template.flow_spec)
+    template = flow_template_dao.get_template(flow_template, for_update=True)
     flow = template.get_flow(flow_id)
     if not flow:
         return response.not_found()
@@ -2063,7 +2189,7 @@ def update_call_step(flow_template_id, flow_id, step_id, data, current_user):
     if not flow_template:
         return response.not_found()
 
-    template = Template(template_json=flow_template.flow_spec)
+    template = flow_template_dao.get_template(flow_template, for_update=True)
     flow = template.get_flow(flow_id)
     if not flow:
         return response.not_found()
@@ -2121,7 +2247,7 @@ def create_hang_up_step(flow_template_id, flow_id, data, current_user):
     if not flow_template:
         return response.not_found()
 
-    template = Template(template_json=flow_template.flow_spec)
+    template = flow_template_dao.get_template(flow_template, for_update=True)
     flow = template.get_flow(flow_id)
     if not flow:
         return response.not_found()
@@ -2150,7 +2276,7 @@ def update_hang_up_step(flow_template_id, flow_id, step_id, data, current_user):
     if not flow_template:
         return response.not_found()
 
-    template = Template(template_json=flow_template.flow_spec)
+    template = flow_template_dao.get_template(flow_template, for_update=True)
     flow = template.get_flow(flow_id)
     if not flow:
         return response.not_found()
@@ -2211,7 +2337,7 @@ def create_go_to_flow_step(flow_template_id, flow_id, data, current_user):
     if not flow_template:
         return response.not_found()
 
-    template = Template(template_json=flow_template.flow_spec)
+    template = flow_template_dao.get_template(flow_template, for_update=True)
     flow = template.get_flow(flow_id)
     if not flow:
         return response.not_found()
@@ -2240,7 +2366,7 @@ def update_go_to_flow_step(flow_template_id, flow_id, step_id, data, current_use
     if not flow_template:
         return response.not_found()
 
-    template = Template(template_json=flow_template.flow_spec)
+    template = flow_template_dao.get_template(flow_template, for_update=True)
     flow = template.get_flow(flow_id)
     if not flow:
         return response.not_found()
@@ -2273,7 +2399,7 @@ def get_flow_template_events(flow_template_id, flow_id, current_user):
     flow_template = flow_template_dao.get_flow_template_with_id(flow_template_id)
     if not flow_template:
         return response.not_found()
-    template = Template(template_json=flow_template.flow_spec)
+    template = flow_template_dao.get_template(flow_template)
     flow = template.get_flow(flow_id)
     if not flow:
         return response.not_found()
@@ -2304,7 +2430,7 @@ def update_event(flow_template_id, flow_id, event_id, data, current_user):
     if not flow_template:
         return response.not_found()
 
-    template = Template(template_json=flow_template.flow_spec)
+    template = flow_template_dao.get_template(flow_template, for_update=True)
     flow = template.get_flow(flow_id)
     if not flow:
         return response.not_found()
@@ -2336,7 +2462,7 @@ def delete_step(flow_template_id, flow_id, step_id, current_user):
     if not flow_template:
         return response.not_found()
 
-    template = Template(template_json=flow_template.flow_spec)
+    template = flow_template_dao.get_template(flow_template, for_update=True)
 
     flow = template.get_flow(flow_id)
     if not flow:
@@ -2354,3 +2480,260 @@ def delete_step(flow_template_id, flow_id, step_id, current_user):
         current_user,
     )
     return response.success({})
+
+
+def get_step_references(flow_template_id, flow_id, step_id, current_user):
+    flow_template = flow_template_dao.get_flow_template_with_id(flow_template_id)
+    if not flow_template:
+        return response.not_found()
+
+    template = flow_template_dao.get_template(flow_template)
+    flow = template.get_flow(flow_id)
+    if not flow:
+        return response.not_found()
+
+    if not flow.get_step(step_id):
+        return response.not_found()
+
+    steps, events = flow.get_predecessors(step_id)
+    res = {
+        "steps": flow_template_schemas.step_schema.dump(steps, many=True),
+        "events": flow_template_schemas.event_schema.dump(events, many=True),
+    }
+    return response.success(res)
+
+
+def get_flow_template_analysis(flow_template_id, current_user):
+    flow_template = flow_template_dao.get_flow_template_with_id(flow_template_id)
+    if not flow_template:
+        return response.not_found()
+
+    template = flow_template_dao.get_template(flow_template)
+    analysis = flow_template_dao.get_template_analysis(flow_template, template)
+    return response.success(analysis.to_json())
+
+
+def invalid_published_template(analysis):
+    return response.validation_failed(
+        {
+            "template": ["A published flow template can't be saved with errors"],
+            "errors": [issue.to_json() for issue in analysis.errors],
+        }
+    )
+
+
+def set_flow_template_status(flow_template_id, data, current_user):
+    flow_template = flow_template_dao.get_flow_template_with_id(flow_template_id)
+    if not flow_template:
+        return response.not_found()
+
+    try:
+        data = flow_template_schemas.set_flow_template_status_schema.load(data)
+    except ValidationError as e:
+        return response.validation_failed(e.messages)
+
+    status = data.get("status")
+
+    template = flow_template_dao.get_template(flow_template)
+    if status == constants.FLOW_TEMPLATE_STATUS_PUBLISHED:
+        analysis = flow_template_dao.get_template_analysis(flow_template, template)
+        if analysis.has_errors():
+            return response.validation_failed(
+                {
+                    "status": ["A flow template with errors can't be published"],
+                    "errors": [issue.to_json() for issue in analysis.errors],
+                }
+            )
+
+    flow_template = flow_template_dao.set_flow_template_status(
+        flow_template, template, status, current_user
+    )
+    res = flow_template_schemas.flow_template_schema.dump(flow_template)
+    return response.success(res)
+
+
+# Validation and DAO create and update functions by step type. The validation
+# functions return the arguments of the DAO functions.
+_STEP_OPERATIONS = {
+    flow_template_constants.STEP_SEND_EMAIL: (
+        validate_send_email_step,
+        flow_template_dao.create_send_email_step,
+        flow_template_dao.update_send_email_step,
+    ),
+    flow_template_constants.STEP_SEND_SMS: (
+        validate_send_sms_step,
+        flow_template_dao.create_send_sms_step,
+        flow_template_dao.update_send_sms_step,
+    ),
+    flow_template_constants.STEP_DELAY: (
+        validate_delay_step,
+        flow_template_dao.create_delay_step,
+        flow_template_dao.update_delay_step,
+    ),
+    flow_template_constants.STEP_QUESTIONS: (
+        validate_questions_step,
+        flow_template_dao.create_questions_step,
+        flow_template_dao.update_questions_step,
+    ),
+    flow_template_constants.STEP_PLAY_MESSAGE: (
+        validate_play_message_step,
+        flow_template_dao.create_play_message_step,
+        flow_template_dao.update_play_message_step,
+    ),
+    flow_template_constants.STEP_GET_INPUT: (
+        validate_get_input_step,
+        flow_template_dao.create_get_input_step,
+        flow_template_dao.update_get_input_step,
+    ),
+    flow_template_constants.STEP_RECORD_AUDIO: (
+        validate_record_audio_step,
+        flow_template_dao.create_record_audio_step,
+        flow_template_dao.update_record_audio_step,
+    ),
+    flow_template_constants.STEP_SET_STATUS: (
+        validate_set_status_step,
+        flow_template_dao.create_set_status_step,
+        flow_template_dao.update_set_status_step,
+    ),
+    flow_template_constants.STEP_CALL: (
+        validate_call_step,
+        flow_template_dao.create_call_step,
+        flow_template_dao.update_call_step,
+    ),
+    flow_template_constants.STEP_HANG_UP: (
+        validate_hang_up_step,
+        flow_template_dao.create_hang_up_step,
+        flow_template_dao.update_hang_up_step,
+    ),
+    flow_template_constants.STEP_GO_TO_FLOW: (
+        validate_go_to_flow_step,
+        flow_template_dao.create_go_to_flow_step,
+        flow_template_dao.update_go_to_flow_step,
+    ),
+}
+
+
+def _resolve_temp_ids(value, step_ids_by_temp_id):
+    if isinstance(value, dict):
+        return {
+            key: step_ids_by_temp_id.get(item, item)
+            if key == "nextStepId" and isinstance(item, str)
+            else _resolve_temp_ids(item, step_ids_by_temp_id)
+            for key, item in value.items()
+        }
+    if isinstance(value, list):
+        return [_resolve_temp_ids(item, step_ids_by_temp_id) for item in value]
+    return value
+
+
+def _apply_step_operation(
+    flow_template, template, flow, operation, step_ids_by_temp_id, current_user
+):
+    """
+    Validates and applies an operation of a batch. Returns the result of the
+    operation and the validation errors.
+    """
+    action = operation["action"]
+    step_type = operation.get("step_type")
+    temp_id = operation.get("temp_id")
+    step_id = operation.get("step_id")
+    event_id = operation.get("event_id")
+    data = _resolve_temp_ids(operation["data"], step_ids_by_temp_id)
+
+    if action == flow_template_constants.STEP_OPERATION_CREATE:
+        if step_type not in _STEP_OPERATIONS:
+            return None, {"stepType": ["Invalid Step Type"]}
+        if temp_id is not None and temp_id in step_ids_by_temp_id:
+            return None, {"tempId": ["Temp Id is already used in this batch"]}
+
+        validate, create, _ = _STEP_OPERATIONS[step_type]
+        data, errors = validate(flow_template, template, flow, None, data)
+        if errors:
+            return None, errors
+
+        step = create(flow_template, template, flow, *data, current_user)
+        if temp_id is not None:
+            step_ids_by_temp_id[temp_id] = step.id
+        return flow_template_schemas.step_schema.dump(step), None
+
+    if action == flow_template_constants.STEP_OPERATION_UPDATE and event_id:
+        event = flow.get_event(event_id)
+        if not event:
+            return None, {"eventId": ["Invalid Event"]}
+
+        data, errors = validate_event(flow_template, template, flow, event, data)
+        if errors:
+            return None, errors
+
+        event = flow_template_dao.update_event(
+            flow_template, template, flow, event, *data, current_user
+        )
+        return flow_template_schemas.event_schema.dump(event), None
+
+    step = flow.get_step(step_ids_by_temp_id.get(step_id, step_id))
+    if not step:
+        return None, {"stepId": ["Invalid Step"]}
+
+    if action == flow_template_constants.STEP_OPERATION_DELETE:
+        flow_template_dao.delete_step(flow_template, template, flow, step, current_user)
+        return {}, None
+
+    if step.type not in _STEP_OPERATIONS:
+        return None, {"stepId": ["This step can't be updated"]}
+
+    validate, _, update = _STEP_OPERATIONS[step.type]
+    data, errors = validate(flow_template, template, flow, step, data)
+    if errors:
+        return None, errors
+
+    step = update(flow_template, template, flow, step, *data, current_user)
+    return flow_template_schemas.step_schema.dump(step), None
+
+
+def apply_step_operations(flow_template_id, flow_id, data, current_user):
+    """
+    Applies a batch of step and event operations to a flow, in order. Steps
+    created by the batch can be referred to by their temp ids in the
+    operations that follow. Nothing is saved unless every operation is valid.
+    """
+    flow_template = flow_template_dao.get_flow_template_with_id(flow_template_id)
+    if not flow_template:
+        return response.not_found()
+
+    try:
+        data = flow_template_schemas.step_operations_schema.load(data)
+    except ValidationError as e:
+        return response.validation_failed(e.messages)
+
+    template = flow_template_dao.get_template(flow_template, for_update=True)
+    flow = template.get_flow(flow_id)
+    if not flow:
+        return response.not_found()
+
+    results = []
+    errors = {}
+    step_ids_by_temp_id = {}
+    with flow_template_dao.template_batch(
+        flow_template, template, current_user
+    ) as batch:
+        for index, operation in enumerate(data["operations"]):
+            result, operation_errors = _apply_step_operation(
+                flow_template,
+                template,
+                flow,
+                operation,
+                step_ids_by_temp_id,
+                current_user,
+            )
+            if operation_errors:
+                errors[index] = operation_errors
+            results.append(result)
+
+        if errors:
+            batch.discard()
+
+    if errors:
+        return response.validation_failed({"operations": errors})
+
+    res = {"operations": results, "tempIds": step_ids_by_temp_id}
+    return response.success(res)
@@ -87,13 +87,13 @@ def create_org(data, current_user):
     return response.success(res)
 
 
-def get_all_orgs():
-    org = org_dao.get_all_orgs()
-    res = org_schemas.org_schema.dump(
-        org,
-        many=True,
-    )
-    return response.success(res)
+def get_all_orgs(cursor, page_size):
+    try:
+        page = org_dao.get_all_orgs(cursor, page_size)
+    except ValueError:
+        return response.invalid_cursor()
+    res = org_schemas.org_schema.dump(page.items, many=True)
+    return response.success_page(res, page.next_cursor)
 
 
 def get_org_details(org_id):
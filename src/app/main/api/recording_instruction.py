@@ -3,6 +3,7 @@ from marshmallow.exceptions import ValidationError
 from slugify import slugify
 
 from ...utils import response, s3
+from ..dao import audio as audio_dao
 from ..dao import recording_instruction as recording_instruction_dao
 from ..models import main as constants
 from ..schemas import recording_instruction as recording_instruction_schemas
@@ -19,6 +20,48 @@ def get_recording_instructions():
 S3_PATH_RECORDING_INSTRUCTION = "audio/ri/{instruction_type}/{file_name}"
 
 
+def _get_audio_file_path(instruction_type, file_name):
+    return S3_PATH_RECORDING_INSTRUCTION.format(
+        instruction_type=instruction_type.lower(),
+        file_name=file_name,
+    )
+
+
+def _is_audio_file_uploaded(instruction_type, audio_file_key):
+    prefix = _get_audio_file_path(instruction_type, "")
+    return (
+        audio_file_key.startswith(prefix)
+        and "/" not in audio_file_key[len(prefix) :]
+        and s3.is_audio_uploaded(audio_file_key, is_private=False)
+    )
+
+
+def create_recording_instruction_audio_upload(data, current_user):
+    try:
+        data = recording_instruction_schemas.audio_upload_schema.load(data)
+    except ValidationError as e:
+        return response.validation_failed(e.messages)
+
+    instruction_type = data.get("instruction_type")
+    file_name = data.get("file_name")
+
+    file_name_for_s3 = s3.generate_audio_file_name(file_name)
+    if not file_name_for_s3:
+        return response.validation_failed(
+            {"fileName": ["Audio File must be of type wav or mp3"]}
+        )
+
+    audio_file_key = _get_audio_file_path(instruction_type, file_name_for_s3)
+    upload = s3.generate_presigned_audio_upload(audio_file_key, is_private=False)
+    return response.success(
+        {
+            "url": upload["url"],
+            "fields": upload["fields"],
+            "audioFileKey": audio_file_key,
+        }
+    )
+
+
 def create_recording_instruction(data, audio_file, current_user):
     try:
         data = recording_instruction_schemas.create_recording_instruction_schema.load(
@@ -29,13 +72,16 @@ def create_recording_instruction(data, audio_file, current_user):
 
     instruction_type = data.get("instruction_type")
     name = data.get("name")
+    audio_file_key = data.get("audio_file_key")
 
     errors = {}
     data_errors = {}
     errors["data"] = data_errors
 
-    if not audio_file:
+    if not audio_file and not audio_file_key:
         errors["audioFile"] = ["Audio File is required"]
+    elif audio_file and audio_file_key:
+        errors["audioFile"] = ["Audio File must not be provided with an Audio File Key"]
 
     if instruction_type == constants.RECORDING_INSTRUCTION_TYPE_OTHER:
         if not name:
@@ -83,19 +129,22 @@ def create_recording_instruction(data, audio_file, current_user):
                 "A recording instruction with this type already exists"
             ]
 
+    if audio_file_key and not _is_audio_file_uploaded(instruction_type, audio_file_key):
+        data_errors["audioFileKey"] = ["Audio File has not been uploaded"]
+
     if "audioFile" in errors or data_errors:
         if not data_errors:
             del errors["data"]
         return response.validation_failed(errors)
 
-    file_name_slug = slugify(file_name)
-    file_uuid = shortuuid.uuid()
-    file_name_for_s3 = f"{file_name_slug}-{file_uuid}.{file_ext}"
-    audio_file_path = S3_PATH_RECORDING_INSTRUCTION.format(
-        instruction_type=instruction_type.lower(),
-        file_name=file_name_for_s3,
-    )
-    s3.upload_audio_to_s3(audio_file_path, audio_file, is_private=False)
+    audio_file_path = audio_file_key
+
+    if audio_file:
+        file_name_slug = slugify(file_name)
+        file_uuid = shortuuid.uuid()
+        file_name_for_s3 = f"{file_name_slug}-{file_uuid}.{file_ext}"
+        audio_file_path = _get_audio_file_path(instruction_type, file_name_for_s3)
+        s3.upload_audio_to_s3(audio_file_path, audio_file, is_private=False)
 
     if instruction_type != constants.RECORDING_INSTRUCTION_TYPE_OTHER:
         name = constants.RECORDING_INSTRUCTION_TYPE_NAMES[instruction_type]
@@ -106,5 +155,9 @@ def create_recording_instruction(data, audio_file, current_user):
         audio_file_path,
         current_user,
     )
+    if audio_file_path:
+        audio_dao.queue_audio_ingest(
+            audio_dao.AUDIO_KIND_RECORDING_INSTRUCTION, message
+        )
     res = recording_instruction_schemas.recording_instruction_schema.dump(message)
     return response.success(res)
@@ -0,0 +1,15 @@
+from ...utils import response, session_token
+
+
+def create_session_token(current_session):
+    if not session_token.is_enabled():
+        return response.not_found()
+    token = session_token.issue_session_token(current_session)
+    return response.success({"token": token})
+
+
+def revoke_session_tokens(current_session):
+    if not session_token.is_enabled():
+        return response.not_found()
+    session_token.revoke_sessions([current_session.id])
+    return response.success({})
@@ -97,10 +97,15 @@ def update_subscription(org_id, subscription_id, data, current_user):
     return response.success(res)
 
 
-def get_all_subscriptions_for_org(org_id):
-    subscriptions = subscription_dao.get_subscriptions_with_org_id(org_id)
-    res = subscription_schemas.subscription_schema.dump(subscriptions, many=True)
-    return response.success(res)
+def get_all_subscriptions_for_org(org_id, cursor, page_size):
+    try:
+        page = subscription_dao.get_subscriptions_with_org_id(
+            org_id, cursor, page_size
+        )
+    except ValueError:
+        return response.invalid_cursor()
+    res = subscription_schemas.subscription_schema.dump(page.items, many=True)
+    return response.success_page(res, page.next_cursor)
 
 
 def get_subscription_details(org_id, subscription_id):
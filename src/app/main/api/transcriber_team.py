@@ -168,12 +168,13 @@ def delete_transcriber(transcriber_team_id, user_id, current_user):
     return response.success({})
 
 
-def get_transcriber_teams():
-    transcriber_teams = transcriber_team_dao.get_all_transcriber_teams()
-    res = transcriber_team_schemas.transcriber_team_schema.dump(
-        transcriber_teams, many=True
-    )
-    return response.success(res)
+def get_transcriber_teams(cursor, page_size):
+    try:
+        page = transcriber_team_dao.get_all_transcriber_teams(cursor, page_size)
+    except ValueError:
+        return response.invalid_cursor()
+    res = transcriber_team_schemas.transcriber_team_schema.dump(page.items, many=True)
+    return response.success_page(res, page.next_cursor)
 
 
 def get_transcriber_team(transcriber_team_id):
@@ -189,12 +190,15 @@ def get_transcriber_team(transcriber_team_id):
     return response.success(res)
 
 
-def get_transcriber_team_orgs():
-    transcriber_team_orgs = transcriber_team_dao.get_all_transcriber_team_orgs()
+def get_transcriber_team_orgs(cursor, page_size):
+    try:
+        page = transcriber_team_dao.get_all_transcriber_team_orgs(cursor, page_size)
+    except ValueError:
+        return response.invalid_cursor()
     res = transcriber_team_schemas.transcriber_team_org_schema.dump(
-        transcriber_team_orgs, many=True
+        page.items, many=True
     )
-    return response.success(res)
+    return response.success_page(res, page.next_cursor)
 
 
 def add_transcriber_team_org(data, current_user):
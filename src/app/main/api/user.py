@@ -147,13 +147,19 @@ def get_user(user_id):
     return response.success(res)
 
 
-def get_users():
-    users = user_dao.get_users()
-    res = user_schemas.user_schema.dump(users, many=True)
-    return response.success(res)
+def get_users(cursor, page_size):
+    try:
+        page = user_dao.get_users(cursor, page_size)
+    except ValueError:
+        return response.invalid_cursor()
+    res = user_schemas.user_schema.dump(page.items, many=True)
+    return response.success_page(res, page.next_cursor)
 
 
-def get_transcriber_users():
-    users = user_dao.get_transcriber_users()
-    res = user_schemas.user_schema.dump(users, many=True)
-    return response.success(res)
+def get_transcriber_users(cursor, page_size):
+    try:
+        page = user_dao.get_transcriber_users(cursor, page_size)
+    except ValueError:
+        return response.invalid_cursor()
+    res = user_schemas.user_schema.dump(page.items, many=True)
+    return response.success_page(res, page.next_cursor)
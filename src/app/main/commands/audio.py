@@ -0,0 +1,14 @@
+import click
+from flask.cli import AppGroup
+
+from ..jobs import audio as audio_jobs
+
+audio_cli = AppGroup("audio", help="Manage audio files.")
+
+
+@audio_cli.command("ingest")
+@click.option("--batch-size", default=audio_jobs.AUDIO_INGEST_BATCH_SIZE)
+def ingest(batch_size):
+    """Probe and store the metadata of audio files that haven't been ingested."""
+    ingested = audio_jobs.ingest_pending_audio({"batch_size": batch_size})
+    click.echo(f"Ingested {ingested} audio files.")
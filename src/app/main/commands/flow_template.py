@@ -0,0 +1,27 @@
+import click
+from flask.cli import AppGroup
+
+from ..jobs import flow_template as flow_template_jobs
+
+flow_template_cli = AppGroup("flow-template", help="Manage flow templates.")
+
+
+@flow_template_cli.command("migrate-flow-specs")
+def migrate_flow_specs():
+    """Move the flows and steps of flow templates out of flow_spec."""
+    migrated = flow_template_jobs.migrate_flow_specs()
+    click.echo(f"Migrated {migrated} flow templates.")
+
+
+@flow_template_cli.command("compile-flow-templates")
+def compile_flow_templates():
+    """Compile the published flow templates that haven't been compiled."""
+    compiled = flow_template_jobs.compile_flow_templates()
+    click.echo(f"Compiled {compiled} flow templates.")
+
+
+@flow_template_cli.command("version-flow-templates")
+def version_flow_templates():
+    """Snapshot published flow templates and pin campaigns to their versions."""
+    versioned, pinned = flow_template_jobs.version_flow_templates()
+    click.echo(f"Versioned {versioned} flow templates, pinned {pinned} campaigns.")
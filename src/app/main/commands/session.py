@@ -0,0 +1,34 @@
+import click
+from flask.cli import AppGroup
+
+from ..jobs import session as session_jobs
+
+session_cli = AppGroup("session", help="Manage user sessions.")
+
+
+@session_cli.command("flush-last-seen")
+def flush_last_seen():
+    """Write buffered session last seen timestamps to the database."""
+    updated = session_jobs.flush_session_last_seen_at()
+    click.echo(f"Updated {updated} sessions.")
+
+
+@session_cli.command("sweep")
+@click.option("--batch-size", default=session_jobs.SESSION_SWEEP_BATCH_SIZE)
+def sweep(batch_size):
+    """Delete expired sessions."""
+    deleted = session_jobs.sweep_expired_sessions({"batch_size": batch_size})
+    click.echo(f"Deleted {deleted} sessions.")
+
+
+@session_cli.command("maintain-partitions")
+@click.option("--months-ahead", default=session_jobs.SESSION_PARTITION_MONTHS_AHEAD)
+def maintain_partitions(months_ahead):
+    """Create upcoming and drop expired monthly session partitions."""
+    created, dropped = session_jobs.maintain_session_partitions(
+        {"months_ahead": months_ahead}
+    )
+    for month in created:
+        click.echo(f"Created partition for {month:%Y-%m}.")
+    for month in dropped:
+        click.echo(f"Dropped partition for {month:%Y-%m}.")
@@ -0,0 +1,92 @@
+from ... import db
+from ...utils import job
+from ...utils.db import after_commit
+from ..models.main import (
+    AUDIO_STATUS_INVALID,
+    AUDIO_STATUS_PENDING,
+    AUDIO_STATUS_READY,
+    FlowTemplate,
+    FlowTemplateMessage,
+    RecordingInstruction,
+)
+
+AUDIO_KIND_MESSAGE = "message"
+AUDIO_KIND_RECORDING_INSTRUCTION = "recording_instruction"
+
+_MODELS = {
+    AUDIO_KIND_MESSAGE: FlowTemplateMessage,
+    AUDIO_KIND_RECORDING_INSTRUCTION: RecordingInstruction,
+}
+
+AUDIO_KINDS = tuple(_MODELS)
+
+
+def queue_audio_ingest(kind, row):
+    """
+    Marks the audio file of a message or recording instruction as pending and
+    queues its ingest once the transaction has been committed.
+    """
+    row.audio_status = AUDIO_STATUS_PENDING
+    params = {"kind": kind, "id": row.id}
+    after_commit(
+        lambda: job.queue_job(
+            name="ingest_audio", params=params, queue=job.JOB_QUEUE_LOW
+        )
+    )
+
+
+def get_pending_audio(kind, after_id, limit):
+    """
+    Returns the ids and audio file paths of the rows after 'after_id' whose
+    audio file hasn't been ingested, in id order.
+    """
+    model = _MODELS[kind]
+    return (
+        db.session.query(model.id, model.audio_file_path)
+        .filter(
+            model.id > after_id,
+            model.audio_file_path.isnot(None),
+            db.or_(
+                model.audio_status.is_(None),
+                model.audio_status == AUDIO_STATUS_PENDING,
+            ),
+        )
+        .order_by(model.id)
+        .limit(limit)
+        .all()
+    )
+
+
+def get_audio_row(kind, id, for_update=False):
+    query = _MODELS[kind].query.filter(_MODELS[kind].id == id)
+    if for_update:
+        query = query.with_for_update()
+    return query.first()
+
+
+def set_audio_info(row, info, audio_file_path):
+    row.audio_file_path = audio_file_path
+    row.audio_status = AUDIO_STATUS_READY
+    row.audio_duration_ms = info.duration_ms
+    row.audio_sample_rate = info.sample_rate
+    row.audio_channels = info.channels
+    row.audio_loudness_db = info.loudness_db
+    _invalidate_resolved_content(row)
+
+
+def set_audio_invalid(row):
+    row.audio_status = AUDIO_STATUS_INVALID
+    _invalidate_resolved_content(row)
+
+
+def _invalidate_resolved_content(row):
+    # Messages are cached by flow template and content version (see
+    # dao.flow_template.get_resolved_content). The flow template version is
+    # left alone since the template itself hasn't changed.
+    if isinstance(row, FlowTemplateMessage):
+        db.session.query(FlowTemplate).filter(
+            FlowTemplate.id == row.flow_template_id
+        ).update(
+            {FlowTemplate.content_version: FlowTemplate.content_version + 1},
+            synchronize_session="evaluate",
+        )
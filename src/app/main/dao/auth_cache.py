@@ -0,0 +1,172 @@
+import datetime
+
+from flask import current_app
+from sqlalchemy.orm.attributes import set_committed_value
+
+from ... import db
+from ...utils import cache, session_token
+from ...utils.db import after_commit, attach
+from ..models.main import Session, User, UserRole
+
+# Resolved auth state is cached under two keys. The session entry is keyed by
+# the auth token and only holds the session row. The user entry holds the user
+# row (without the password hash) and the user's permission mask, so
+# that a change to a user or to their roles invalidates a single key no matter
+# how many sessions the user has.
+SESSION_KEY = "auth:session:{uuid}"
+USER_KEY = "auth:user:{user_id}"
+
+USER_EXCLUDED_COLUMNS = {"password"}
+
+
+def is_enabled():
+    return current_app.config["AUTH_CACHE_TTL"] > 0
+
+
+def get_session_with_uuid(uuid):
+    """
+    Returns the session for the auth token with its user attached to the
+    current db session, or None if either entry is not cached.
+    """
+    if not is_enabled():
+        return None
+
+    session_data = cache.get_json(SESSION_KEY.format(uuid=uuid))
+    if not session_data:
+        return None
+
+    user_data = cache.get_json(USER_KEY.format(user_id=session_data["user_id"]))
+    if not user_data:
+        return None
+
+    user = attach(_from_dict(User, user_data["user"]))
+    session = _from_dict(Session, session_data)
+    set_committed_value(session, "user", user)
+    return attach(session)
+
+
+def get_user_with_id(user_id):
+    if not is_enabled():
+        return None
+
+    user_data = cache.get_json(USER_KEY.format(user_id=user_id))
+    if not user_data:
+        return None
+    return attach(_from_dict(User, user_data["user"]))
+
+
+def get_user_permission_mask(user_id):
+    if not is_enabled():
+        return None
+
+    user_data = cache.get_json(USER_KEY.format(user_id=user_id))
+    if not user_data:
+        return None
+    return user_data.get("permission_mask")
+
+
+def set_session(session):
+    if not is_enabled():
+        return
+
+    cache.set_json(
+        SESSION_KEY.format(uuid=session.uuid),
+        _to_dict(session),
+        current_app.config["AUTH_CACHE_TTL"],
+    )
+
+
+def set_user(user, permission_mask):
+    if not is_enabled():
+        return
+
+    user_data = {
+        "user": _to_dict(user, excluded_columns=USER_EXCLUDED_COLUMNS),
+        "permission_mask": permission_mask,
+    }
+    cache.set_json(
+        USER_KEY.format(user_id=user.id),
+        user_data,
+        current_app.config["AUTH_CACHE_TTL"],
+    )
+
+
+def invalidate_sessions(sessions):
+    """
+    Removes the cached entries of the given sessions, which can be any rows
+    with a 'uuid'.
+    """
+    keys = [SESSION_KEY.format(uuid=session.uuid) for session in sessions]
+    if keys:
+        cache.delete(*keys)
+
+
+def invalidate_users(user_ids):
+    """
+    Removes the cached user and permission entries of the given users. The
+    entries are removed right away and again once the transaction commits, so
+    that a concurrent request can't re-cache the state being replaced.
+    """
+    keys = [USER_KEY.format(user_id=user_id) for user_id in set(user_ids)]
+    if not keys:
+        return
+
+    cache.delete(*keys)
+    after_commit(lambda: cache.delete(*keys))
+
+
+def invalidate_user(user):
+    invalidate_users([user.id])
+
+
+def invalidate_user_roles(user_ids):
+    """
+    Invalidates the given users after their roles have changed. Their
+    permission version is incremented in the same transaction, and the signed
+    session tokens issued before the change are revoked once it commits.
+    """
+    user_ids = set(user_ids)
+    if not user_ids:
+        return
+
+    rows = db.session.execute(
+        db.update(User)
+        .where(User.id.in_(user_ids))
+        .values(permission_version=User.permission_version + 1)
+        .returning(User.id, User.permission_version)
+        .execution_options(synchronize_session=False)
+    )
+    permission_versions = dict(rows.all())
+    invalidate_users(user_ids)
+    after_commit(
+        lambda: session_token.revoke_permission_versions(permission_versions)
+    )
+
+
+def invalidate_role(role):
+    user_ids = db.session.query(UserRole.user_id).filter(UserRole.role_id == role.id)
+    invalidate_user_roles([user_id for user_id, in user_ids])
+
+
+def _to_dict(instance, excluded_columns=()):
+    data = {}
+    for column in instance.__table__.columns:
+        if column.key in excluded_columns:
+            continue
+        value = getattr(instance, column.key)
+        if isinstance(value, datetime.datetime):
+            value = value.isoformat()
+        data[column.key] = value
+    return data
+
+
+def _from_dict(model, data):
+    values = {}
+    for column in model.__table__.columns:
+        if column.key not in data:
+            continue
+        value = data[column.key]
+        if value is not None and isinstance(column.type, db.DateTime):
+            value = datetime.datetime.fromisoformat(value)
+        values[column.key] = value
+    return model(**values)
@@ -1,17 +1,103 @@
+import decimal
+
 from ... import db
-from ..models.main import Campaign
+from ...utils import pagination
+from ..models.main import Campaign, Org, User
+
+# Similarity of a campaign to a search, rounded so that it can be compared
+# exactly with the value in a cursor.
+SEARCH_RANK_SCALE = 4
 
 
 def get_campaign_with_id(campaign_id):
     return Campaign.query.get(campaign_id)
 
 
-def get_campaigns_with_criteria(org_id, query_text, current_user, limit=25):
-    query = Campaign.query
+def _escape_like(text):
+    return text.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+
+
+def _get_matching_campaign_ids(query_text):
+    """
+    Returns a select of the ids of the campaigns whose name, owner's name or
+    org's name contains 'query_text' or is similar to it. Each branch can use
+    the trigram index of its name.
+    """
+    pattern = f"%{_escape_like(query_text)}%"
+
+    def matches(column):
+        return db.or_(
+            column.op("%")(query_text), column.ilike(pattern, escape="\\")
+        )
+
+    return db.union(
+        db.select(Campaign.id).where(matches(Campaign.name)),
+        db.select(Campaign.id)
+        .join(User, User.id == Campaign.owner_user_id)
+        .where(matches(User.name)),
+        db.select(Campaign.id)
+        .join(Org, Org.id == Campaign.org_id)
+        .where(matches(Org.name)),
+    )
+
+
+def _parse_rank_cursor_values(values):
+    try:
+        rank, id = decimal.Decimal(values[0]), values[1]
+    except (TypeError, ValueError, decimal.InvalidOperation) as e:
+        raise ValueError("Invalid cursor") from e
+    if not isinstance(id, int):
+        raise ValueError("Invalid cursor")
+    return rank, id
+
+
+def get_campaigns_with_criteria(
+    org_id, query_text, current_user, cursor=None, page_size=None
+):
+    """
+    Returns a Page of campaigns. Without 'query_text' campaigns are ordered by
+    name, with it they are searched by name, owner's name and org's name and
+    ordered by decreasing similarity. 'cursor' is the next cursor of the
+    previous page. Raises ValueError if it's invalid.
+    """
+    if not query_text:
+        query = Campaign.query
+        if org_id:
+            query = query.filter(Campaign.org_id == org_id)
+        return pagination.paginate(
+            query, Campaign.name, Campaign.id, cursor, page_size
+        )
+
+    owner_user = db.aliased(User)
+    rank = db.func.round(
+        db.cast(
+            db.func.greatest(
+                db.func.similarity(Campaign.name, query_text),
+                db.func.similarity(owner_user.name, query_text),
+                db.func.similarity(Org.name, query_text),
+            ),
+            db.Numeric,
+        ),
+        SEARCH_RANK_SCALE,
+    )
+    query = (
+        db.session.query(Campaign, rank)
+        .join(owner_user, owner_user.id == Campaign.owner_user_id)
+        .join(Org, Org.id == Campaign.org_id)
+        .filter(Campaign.id.in_(_get_matching_campaign_ids(query_text)))
+    )
     if org_id:
         query = query.filter(Campaign.org_id == org_id)
-    if query:
+    if cursor:
+        last_rank, id = _parse_rank_cursor_values(pagination.decode_cursor(cursor, 2))
         query = query.filter(
-            db.func.lower(Campaign.name).ilike(f"%{query_text.lower()}%")
+            db.or_(rank < last_rank, db.and_(rank == last_rank, Campaign.id > id))
         )
-    return query.order_by(Campaign.name).limit(limit).all()
+    query = query.order_by(rank.desc(), Campaign.id)
+    page = pagination.get_page(
+        query,
+        pagination.get_page_size(page_size),
+        lambda row: (str(row[1]), row[0].id),
+    )
+    page.items = [campaign for campaign, _ in page.items]
+    return page
@@ -3,6 +3,7 @@ import datetime
 from sqlalchemy.exc import IntegrityError
 
 from ... import db
+from ...utils import pagination
 from ..models.main import Country
 
 
@@ -10,8 +11,10 @@ def get_country_with_id(country_id):
     return Country.query.get(country_id)
 
 
-def get_all_countries():
-    return Country.query.all()
+def get_all_countries(cursor=None, page_size=None):
+    return pagination.paginate(
+        Country.query, Country.name, Country.id, cursor, page_size
+    )
 
 
 def get_countries_with_ids(country_ids):
@@ -1,10 +1,21 @@
+import copy
 import datetime
+import hashlib
+import os
+from contextlib import contextmanager
 
 import shortuuid
+from flask import current_app
+from sqlalchemy.dialects import postgresql
 from sqlalchemy.orm import contains_eager
 
 from ... import db
+from ...utils import pagination, serialization
+from ...utils.db import after_commit, has_writes
+from ...utils.lru_cache import LRUCache
+from ..models import flow_graph
 from ..models import flow_template as flow_template_constants
+from ..models.compiled_template import CompiledTemplate, compile_template
 from ..models.flow_template import (
     CallStep,
     DelayStep,
@@ -23,13 +34,20 @@ from ..models.flow_template import (
     Template,
 )
 from ..models.main import (
+    CAMPAIGN_STATUS_STARTED,
+    FLOW_TEMPLATE_STATUS_DRAFT,
+    FLOW_TEMPLATE_STATUS_PUBLISHED,
+    Campaign,
     EmailTemplate,
     Field,
     FlowTemplate,
     FlowTemplateField,
+    FlowTemplateFlow,
     FlowTemplateMessage,
     FlowTemplatePage,
     FlowTemplateStatus,
+    FlowTemplateStep,
+    FlowTemplateVersion,
     SmsTemplate,
 )
 
@@ -47,6 +65,15 @@ def get_flow_template_with_id(flow_template_id):
     )
 
 
+def get_flow_template_version(flow_template_id, for_update=False):
+    query = db.session.query(FlowTemplate.version).filter(
+        FlowTemplate.id == flow_template_id
+    )
+    if for_update:
+        query = query.with_for_update()
+    return query.scalar()
+
+
 def get_flow_template_by_name_and_version_identifier(name, version_identifier):
     return FlowTemplate.query.filter(
         db.func.lower(FlowTemplate.name) == name.strip().lower(),
@@ -55,11 +82,12 @@ def get_flow_template_by_name_and_version_identifier(name, version_identifier):
     ).first()
 
 
-def get_all_flow_templates():
-    return (
-        FlowTemplate.query.join(FlowTemplate.flow_category)
-        .options(contains_eager(FlowTemplate.flow_category))
-        .all()
+def get_all_flow_templates(cursor=None, page_size=None):
+    query = FlowTemplate.query.join(FlowTemplate.flow_category).options(
+        contains_eager(FlowTemplate.flow_category)
+    )
+    return pagination.paginate(
+        query, FlowTemplate.name, FlowTemplate.id, cursor, page_size
     )
 
 
@@ -77,7 +105,7 @@ def create_flow_template(
         version_identifier=version_identifier,
         description=description,
         flow_category=flow_category,
-        flow_spec=template.to_json(),
+        flow_spec=template.to_json(with_flows=False),
         status=status,
         created_at=now,
         created_by_user=current_user,
@@ -89,12 +117,757 @@ def create_flow_template(
     return flow_template
 
 
+# Rows copied along with a flow template, in insert order. Statuses are copied
+# separately since Set Status steps refer to them by id.
+_CLONED_MODELS = (
+    FlowTemplateField,
+    FlowTemplateMessage,
+    EmailTemplate,
+    SmsTemplate,
+    FlowTemplatePage,
+    FlowTemplateFlow,
+    FlowTemplateStep,
+)
+
+
+def _copy_rows(table, criterion, values):
+    """
+    Returns an INSERT ... SELECT copying the rows of 'table' matching
+    'criterion', with the columns in 'values' replaced.
+    """
+    columns = [column for column in table.columns if column.name != "id"]
+    select = db.select(
+        *[
+            db.literal(values[column.name], column.type).label(column.name)
+            if column.name in values
+            else column
+            for column in columns
+        ]
+    ).where(criterion)
+    return table.insert().from_select([column.name for column in columns], select)
+
+
+def _copy_statuses(source_flow_template_id, flow_template_id):
+    """
+    Copies the statuses of a flow template to another with a single statement.
+    Returns the ids of the copies by the ids of the statuses they copy.
+    """
+    table = FlowTemplateStatus.__table__
+    # The ids of the copies are drawn from the sequence up front, so that each
+    # is known with the id of the status it copies.
+    sequence = db.func.pg_get_serial_sequence(table.name, "id")
+    ids = (
+        db.select(
+            table.c.id.label("status_id"), db.func.nextval(sequence).label("copy_id")
+        )
+        .where(table.c.flow_template_id == source_flow_template_id)
+        .cte("ids")
+    )
+    columns = list(table.columns)
+    select = db.select(
+        *[
+            ids.c.copy_id
+            if column.name == "id"
+            else db.literal(flow_template_id, column.type)
+            if column.name == "flow_template_id"
+            else column
+            for column in columns
+        ]
+    ).join_from(table, ids, table.c.id == ids.c.status_id)
+    copies = (
+        table.insert()
+        .from_select([column.name for column in columns], select)
+        .returning(table.c.id)
+        .cte("copies")
+    )
+    query = db.select(ids.c.status_id, copies.c.id).join_from(
+        ids, copies, copies.c.id == ids.c.copy_id
+    )
+    return dict(db.session.execute(query).all())
+
+
+def clone_flow_template(
+    flow_template, name, version_identifier, description, current_user
+):
+    """
+    Copies a flow template and all its rows to a new draft flow template. Flow
+    and step ids are only unique within a flow template, so they're kept, and
+    messages keep their audio files. The source flow template isn't written.
+    """
+    now = datetime.datetime.now()
+    audit_values = {
+        "created_at": now,
+        "created_by_user_id": current_user.id,
+        "updated_at": now,
+        "updated_by_user_id": current_user.id,
+    }
+
+    table = FlowTemplate.__table__
+    values = dict(
+        audit_values,
+        name=name,
+        version_identifier=version_identifier,
+        description=description,
+        status=FLOW_TEMPLATE_STATUS_DRAFT,
+        version=1,
+        compiled_spec=None,
+        published_version_id=None,
+    )
+    flow_template_id = db.session.execute(
+        _copy_rows(table, table.c.id == flow_template.id, values).returning(
+            table.c.id
+        )
+    ).scalar()
+
+    status_ids = _copy_statuses(flow_template.id, flow_template_id)
+
+    cloned_models = _CLONED_MODELS
+    template_json = flow_template.flow_spec
+    if "flows" in template_json:
+        # The source still holds its flows and steps in flow_spec. The clone
+        # gets them as rows instead, and the source is left to migrate_flow_spec.
+        clone = get_flow_template_with_id(flow_template_id)
+        template = Template(template_json=template_json)
+        clone.flow_spec = template.to_json(with_flows=False)
+        _add_flows(clone, template)
+        cloned_models = tuple(
+            model
+            for model in _CLONED_MODELS
+            if model not in (FlowTemplateFlow, FlowTemplateStep)
+        )
+
+    for model in cloned_models:
+        table = model.__table__
+        values = {key: value for key, value in audit_values.items() if key in table.c}
+        values["flow_template_id"] = flow_template_id
+        db.session.execute(
+            _copy_rows(table, table.c.flow_template_id == flow_template.id, values)
+        )
+
+    if status_ids:
+        table = FlowTemplateStep.__table__
+        status_id = table.c.spec["statusId"].as_integer()
+        db.session.execute(
+            table.update()
+            .where(table.c.flow_template_id == flow_template_id)
+            .where(status_id.in_(list(status_ids)))
+            .values(
+                spec=db.func.jsonb_set(
+                    table.c.spec,
+                    "{statusId}",
+                    db.func.to_jsonb(db.case(status_ids, value=status_id)),
+                )
+            )
+        )
+
+    return get_flow_template_with_id(flow_template_id)
+
+
 def set_flow_template_update_audit_fields(flow_template, current_user):
     now = datetime.datetime.now()
     flow_template.updated_by_user = current_user
     flow_template.updated_at = now
 
 
+# Parsed templates are cached per worker process, keyed by the flow template id
+# and version, so a cached template is never stale. The cache is bounded by the
+# total number of steps of the cached templates. Like name indexes and resolved
+# content, templates read by a transaction that writes are only cached once it
+# has been committed.
+_TEMPLATES = "templates"
+_template_cache = None
+_template_cache_pid = None
+
+
+def _get_template_cache():
+    global _template_cache, _template_cache_pid
+
+    pid = os.getpid()
+    if _template_cache is None or _template_cache_pid != pid:
+        _template_cache = LRUCache(
+            current_app.config["TEMPLATE_CACHE_MAX_STEPS"], weigh=_count_steps
+        )
+        _template_cache_pid = pid
+    return _template_cache
+
+
+def _count_steps(template):
+    return sum(len(flow.steps) for flow in template.flows) + 1
+
+
+def get_template(flow_template, for_update=False):
+    """
+    Returns the parsed flow spec of a flow template. The template returned for
+    reads is shared with other requests and must not be modified; pass
+    'for_update' to get a private copy that can be modified and saved.
+    """
+    cache = _get_template_cache()
+    if for_update:
+        migrate_flow_spec(flow_template)
+        template = cache.get((flow_template.id, flow_template.version))
+        if template is None:
+            return _load_template(flow_template)
+        return copy.deepcopy(template)
+
+    db.session.flush()
+    return _get_cached(
+        cache,
+        _TEMPLATES,
+        (flow_template.id, flow_template.version),
+        lambda: _load_template(flow_template),
+    )
+
+
+def _load_template(flow_template):
+    template_json = flow_template.flow_spec
+    if "flows" in template_json:
+        return Template(template_json=template_json)
+
+    flow_rows = (
+        FlowTemplateFlow.query.outerjoin(FlowTemplateFlow.steps)
+        .options(contains_eager(FlowTemplateFlow.steps))
+        .filter(FlowTemplateFlow.flow_template_id == flow_template.id)
+        .order_by(
+            FlowTemplateFlow.sequence, FlowTemplateStep.sequence, FlowTemplateStep.id
+        )
+        .all()
+    )
+    flows_json = [
+        dict(flow_row.spec, steps=[step_row.spec for step_row in flow_row.steps])
+        for flow_row in flow_rows
+    ]
+    return Template(template_json=dict(template_json, flows=flows_json))
+
+
+class TemplateAnalysisError(ValueError):
+    """
+    Raised when a change would save a published template whose analysis has
+    errors. The transaction must be rolled back.
+    """
+
+    def __init__(self, analysis):
+        super().__init__("A published flow template can't be saved with errors")
+        self.analysis = analysis
+
+
+def set_template_update_audit_fields(flow_template, template, current_user):
+    if _get_template_batch() is not None:
+        return
+
+    set_flow_template_update_audit_fields(flow_template, current_user)
+    # Unpinned campaigns follow the current template, so started ones are
+    # pinned to the published version before any save changes it, whether it
+    # replaces the published version or the template is no longer published.
+    pin_started_campaigns(flow_template)
+    analysis = None
+    if flow_template.status == FLOW_TEMPLATE_STATUS_PUBLISHED:
+        # Campaigns run the published version, so it's only replaced by a
+        # template without errors.
+        analysis = flow_graph.analyze(template)
+        if analysis.has_errors():
+            raise TemplateAnalysisError(analysis)
+        compile_flow_template(flow_template, template)
+        flow_template.published_version_id = save_template_version(template)
+
+    # The saved template becomes the cached template of the new version once
+    # it has been committed. Flushing the update increments the version.
+    db.session.flush()
+    key = (flow_template.id, flow_template.version)
+    cache = _get_template_cache()
+    after_commit(lambda: cache.set(key, template))
+    if analysis is not None:
+        analysis_cache = _get_analysis_cache()
+        after_commit(lambda: analysis_cache.set(key, analysis))
+
+
+# Batches defer writing the flows and steps changed by the create, update and
+# delete functions below until the end of the batch, so that every changed row
+# is written once and the flow template is updated once.
+_TEMPLATE_BATCH = "template_batch"
+
+
+class TemplateBatch:
+    __slots__ = (
+        "added_steps",
+        "saved_steps",
+        "deleted_steps",
+        "saved_flows",
+        "discarded",
+    )
+
+    def __init__(self):
+        self.added_steps = {}
+        self.saved_steps = {}
+        self.deleted_steps = {}
+        self.saved_flows = {}
+        self.discarded = False
+
+    def has_changes(self):
+        return bool(
+            self.added_steps
+            or self.saved_steps
+            or self.deleted_steps
+            or self.saved_flows
+        )
+
+    def discard(self):
+        self.discarded = True
+
+
+def _get_template_batch():
+    return db.session.info.get(_TEMPLATE_BATCH)
+
+
+@contextmanager
+def template_batch(flow_template, template, current_user):
+    """
+    Batches the changes made to a template in the block. The changes are
+    written at the end of the block unless it raises or the batch is
+    discarded.
+    """
+    batch = TemplateBatch()
+    db.session.info[_TEMPLATE_BATCH] = batch
+    try:
+        yield batch
+    finally:
+        del db.session.info[_TEMPLATE_BATCH]
+
+    if batch.discarded or not batch.has_changes():
+        return
+
+    if batch.deleted_steps:
+        FlowTemplateStep.query.filter(
+            FlowTemplateStep.flow_template_id == flow_template.id,
+            FlowTemplateStep.step_id.in_(list(batch.deleted_steps)),
+        ).delete(synchronize_session=False)
+
+    sequences = {}
+    for step in batch.added_steps.values():
+        flow_id = step.flow.id
+        if flow_id not in sequences:
+            sequences[flow_id] = db.session.query(
+                _next_sequence(
+                    FlowTemplateStep.sequence,
+                    FlowTemplateStep.flow_template_id == flow_template.id,
+                    FlowTemplateStep.flow_id == flow_id,
+                )
+            ).scalar()
+        _add_step(flow_template, step, sequences[flow_id])
+        sequences[flow_id] += 1
+
+    for step in batch.saved_steps.values():
+        _save_step(flow_template, step)
+    for flow in batch.saved_flows.values():
+        _save_flow(flow_template, flow)
+    set_template_update_audit_fields(flow_template, template, current_user)
+
+
+def _next_sequence(column, *criteria):
+    return (
+        db.select(db.func.coalesce(db.func.max(column), -1) + 1)
+        .where(*criteria)
+        .scalar_subquery()
+    )
+
+
+def _add_flow(flow_template, flow, sequence=None):
+    if sequence is None:
+        sequence = _next_sequence(
+            FlowTemplateFlow.sequence,
+            FlowTemplateFlow.flow_template_id == flow_template.id,
+        )
+    db.session.add(
+        FlowTemplateFlow(
+            flow_template_id=flow_template.id,
+            flow_id=flow.id,
+            sequence=sequence,
+            spec=flow.to_json(with_steps=False),
+        )
+    )
+
+
+def _save_flow(flow_template, flow):
+    batch = _get_template_batch()
+    if batch is not None:
+        batch.saved_flows[flow.id] = flow
+        return
+
+    FlowTemplateFlow.query.filter(
+        FlowTemplateFlow.flow_template_id == flow_template.id,
+        FlowTemplateFlow.flow_id == flow.id,
+    ).update(
+        {FlowTemplateFlow.spec: flow.to_json(with_steps=False)},
+        synchronize_session=False,
+    )
+
+
+def _add_step(flow_template, step, sequence=None):
+    batch = _get_template_batch()
+    if batch is not None:
+        batch.added_steps[step.id] = step
+        return
+
+    if sequence is None:
+        sequence = _next_sequence(
+            FlowTemplateStep.sequence,
+            FlowTemplateStep.flow_template_id == flow_template.id,
+            FlowTemplateStep.flow_id == step.flow.id,
+        )
+    db.session.add(
+        FlowTemplateStep(
+            flow_template_id=flow_template.id,
+            flow_id=step.flow.id,
+            step_id=step.id,
+            sequence=sequence,
+            spec=step.to_json(),
+        )
+    )
+
+
+def _save_step(flow_template, step):
+    batch = _get_template_batch()
+    if batch is not None:
+        if step.id not in batch.added_steps:
+            batch.saved_steps[step.id] = step
+        return
+
+    FlowTemplateStep.query.filter(
+        FlowTemplateStep.flow_template_id == flow_template.id,
+        FlowTemplateStep.step_id == step.id,
+    ).update({FlowTemplateStep.spec: step.to_json()}, synchronize_session=False)
+
+
+def _delete_step(flow_template, step):
+    batch = _get_template_batch()
+    if batch is not None:
+        if batch.added_steps.pop(step.id, None) is None:
+            batch.saved_steps.pop(step.id, None)
+            batch.deleted_steps[step.id] = step
+        return
+
+    FlowTemplateStep.query.filter(
+        FlowTemplateStep.flow_template_id == flow_template.id,
+        FlowTemplateStep.step_id == step.id,
+    ).delete(synchronize_session=False)
+
+
+def create_flow_and_step_tables():
+    connection = db.session.connection()
+    for model in (FlowTemplateFlow, FlowTemplateStep):
+        model.__table__.create(connection, checkfirst=True)
+
+
+def get_unmigrated_flow_template_ids():
+    return [
+        id
+        for (id,) in db.session.query(FlowTemplate.id)
+        .filter(FlowTemplate.flow_spec.has_key("flows"))
+        .order_by(FlowTemplate.id)
+    ]
+
+
+def migrate_flow_spec(flow_template):
+    """
+    Moves the flows and steps of a flow template that still holds them in
+    flow_spec to d_flow_template_flow and d_flow_template_step. Returns False
+    if the flow template had already been migrated.
+    """
+    if "flows" not in flow_template.flow_spec:
+        return False
+
+    # Lock the flow template so that it's migrated only once.
+    template_json = (
+        db.session.query(FlowTemplate.flow_spec)
+        .filter(FlowTemplate.id == flow_template.id)
+        .with_for_update()
+        .scalar()
+    )
+    if "flows" not in template_json:
+        db.session.expire(flow_template, ["flow_spec"])
+        return False
+
+    template = Template(template_json=template_json)
+    _add_flows(flow_template, template)
+    flow_template.flow_spec = template.to_json(with_flows=False)
+    db.session.flush()
+    return True
+
+
+def _add_flows(flow_template, template):
+    """
+    Adds the flows and steps of a template to the tables of a flow template.
+    """
+    for flow_sequence, flow in enumerate(template.flows):
+        _add_flow(flow_template, flow, flow_sequence)
+    db.session.flush()
+    for flow in template.flows:
+        for step_sequence, step in enumerate(flow.steps):
+            _add_step(flow_template, step, step_sequence)
+    db.session.flush()
+
+
+def get_template_cache_stats():
+    return _get_template_cache().get_stats()
+
+
+def compile_flow_template(flow_template, template):
+    flow_template.compiled_spec = compile_template(template)
+
+
+def get_uncompiled_flow_template_ids():
+    return [
+        id
+        for (id,) in db.session.query(FlowTemplate.id)
+        .filter(
+            FlowTemplate.status == FLOW_TEMPLATE_STATUS_PUBLISHED,
+            FlowTemplate.compiled_spec.is_(None),
+        )
+        .order_by(FlowTemplate.id)
+    ]
+
+
+def save_template_version(template):
+    """
+    Stores a snapshot of a template, unless an identical one already exists,
+    and returns its id.
+    """
+    # The canonical JSON is both hashed and stored, so the spec is serialized
+    # only once.
+    spec = serialization.dumps(template.to_json(), sort_keys=True)
+    spec_hash = hashlib.sha256(spec).hexdigest()
+    db.session.execute(
+        postgresql.insert(FlowTemplateVersion.__table__)
+        .values(
+            spec_hash=spec_hash,
+            # Bound as text: a value cast to JSONB would be bound as JSON
+            # and stored as a JSON string.
+            spec=db.cast(db.literal(spec.decode()), postgresql.JSONB),
+            created_at=datetime.datetime.now(),
+        )
+        .on_conflict_do_nothing(index_elements=["spec_hash"])
+    )
+    return (
+        db.session.query(FlowTemplateVersion.id)
+        .filter(FlowTemplateVersion.spec_hash == spec_hash)
+        .scalar()
+    )
+
+
+def get_template_version_json(version_id):
+    """
+    Returns a template version serialized to JSON as stored, or None if it
+    doesn't exist.
+    """
+    spec = (
+        db.session.query(db.cast(FlowTemplateVersion.spec, db.Text))
+        .filter(FlowTemplateVersion.id == version_id)
+        .scalar()
+    )
+    return spec.encode() if spec is not None else None
+
+
+def get_template_version_hash(version_id):
+    return (
+        db.session.query(FlowTemplateVersion.spec_hash)
+        .filter(FlowTemplateVersion.id == version_id)
+        .scalar()
+    )
+
+
+# Template versions never change, so their parsed templates are cached per
+# worker process without invalidation, bounded like the other templates.
+_version_cache = None
+_version_cache_pid = None
+
+
+def _get_version_cache():
+    global _version_cache, _version_cache_pid
+
+    pid = os.getpid()
+    if _version_cache is None or _version_cache_pid != pid:
+        _version_cache = LRUCache(
+            current_app.config["TEMPLATE_CACHE_MAX_STEPS"], weigh=_count_steps
+        )
+        _version_cache_pid = pid
+    return _version_cache
+
+
+def get_template_version(version_id):
+    """
+    Returns the parsed template of a template version, or None if it doesn't
+    exist. The template is shared and must not be modified.
+    """
+    cache = _get_version_cache()
+    template = cache.get(version_id)
+    if template is None:
+        spec = (
+            db.session.query(FlowTemplateVersion.spec)
+            .filter(FlowTemplateVersion.id == version_id)
+            .scalar()
+        )
+        if spec is None:
+            return None
+        template = Template(template_json=spec)
+        cache.set(version_id, template)
+    return template
+
+
+def get_campaign_template(campaign):
+    """
+    Returns the template a campaign runs: the version it's pinned to, or the
+    current template of its flow template if it isn't pinned.
+    """
+    if campaign.flow_template_version_id:
+        return get_template_version(campaign.flow_template_version_id)
+    return get_template(campaign.flow_template)
+
+
+def get_campaign_content(campaign):
+    """
+    Returns the messages, email templates and SMS templates a campaign uses:
+    its org's own and the defaults of its flow template.
+    """
+    return get_resolved_content(campaign.flow_template, campaign.org_id)
+
+
+def create_version_table():
+    FlowTemplateVersion.__table__.create(db.session.connection(), checkfirst=True)
+
+
+def get_unversioned_flow_template_ids():
+    return [
+        id
+        for (id,) in db.session.query(FlowTemplate.id)
+        .filter(
+            FlowTemplate.status == FLOW_TEMPLATE_STATUS_PUBLISHED,
+            FlowTemplate.published_version_id.is_(None),
+        )
+        .order_by(FlowTemplate.id)
+    ]
+
+
+def pin_started_campaigns(flow_template):
+    """
+    Pins the started campaigns of a flow template that aren't pinned to its
+    published version, so that they keep running it once a save replaces it
+    or changes the template after it's no longer published.
+    Draft campaigns follow the flow template until they're started; whatever
+    starts a campaign is expected to pin it, and campaigns started without
+    being pinned are pinned by pin_campaign_flow_template_versions. Returns
+    the number of pinned campaigns.
+    """
+    if flow_template.published_version_id is None:
+        return 0
+
+    return Campaign.query.filter(
+        Campaign.flow_template_id == flow_template.id,
+        Campaign.flow_template_version_id.is_(None),
+        Campaign.status == CAMPAIGN_STATUS_STARTED,
+    ).update(
+        {Campaign.flow_template_version_id: flow_template.published_version_id},
+        synchronize_session=False,
+    )
+
+
+def pin_campaign_flow_template_versions():
+    """
+    Pins the campaigns that aren't pinned to the published version of their
+    flow template. Returns the number of pinned campaigns. This is only done
+    by the version-flow-templates command.
+    """
+    return (
+        Campaign.query.filter(
+            Campaign.flow_template_version_id.is_(None),
+            Campaign.flow_template_id == FlowTemplate.id,
+            FlowTemplate.published_version_id.isnot(None),
+        )
+        .update(
+            {Campaign.flow_template_version_id: FlowTemplate.published_version_id},
+            synchronize_session=False,
+        )
+    )
+
+
+# Compiled templates are loaded once per worker process, keyed by the flow
+# template id and version like the parsed templates. The ids of the default
+# messages, email templates and SMS templates are resolved from the name index
+# of that version, which changes whenever they do.
+_COMPILED_TEMPLATES = "compiled_templates"
+_compiled_template_cache = None
+_compiled_template_cache_pid = None
+
+
+def _get_compiled_template_cache():
+    global _compiled_template_cache, _compiled_template_cache_pid
+
+    pid = os.getpid()
+    if _compiled_template_cache is None or _compiled_template_cache_pid != pid:
+        _compiled_template_cache = LRUCache(
+            current_app.config["TEMPLATE_CACHE_MAX_STEPS"],
+            weigh=lambda compiled_template: len(compiled_template) + 1,
+        )
+        _compiled_template_cache_pid = pid
+    return _compiled_template_cache
+
+
+def get_compiled_template(flow_template):
+    """
+    Returns the compiled template of a flow template, or None if it hasn't
+    been compiled. The compiled template is shared and must not be modified.
+    """
+    if flow_template.compiled_spec is None:
+        return None
+
+    def load():
+        names = get_flow_template_names(flow_template)
+        return CompiledTemplate(
+            flow_template.compiled_spec,
+            names.get_default_ids(names.message_ids),
+            names.get_default_ids(names.email_template_ids),
+            names.get_default_ids(names.sms_template_ids),
+        )
+
+    db.session.flush()
+    return _get_cached(
+        _get_compiled_template_cache(),
+        _COMPILED_TEMPLATES,
+        (flow_template.id, flow_template.version),
+        load,
+    )
+
+
+# Analyses of the flow graph of templates, cached per worker process like the
+# templates themselves.
+_analysis_cache = None
+_analysis_cache_pid = None
+
+
+def _get_analysis_cache():
+    global _analysis_cache, _analysis_cache_pid
+
+    pid = os.getpid()
+    if _analysis_cache is None or _analysis_cache_pid != pid:
+        _analysis_cache = LRUCache(current_app.config["TEMPLATE_ANALYSIS_CACHE_SIZE"])
+        _analysis_cache_pid = pid
+    return _analysis_cache
+
+
+def get_template_analysis(flow_template, template):
+    cache = _get_analysis_cache()
+    key = (flow_template.id, flow_template.version)
+    analysis = cache.get(key)
+    if analysis is None:
+        analysis = flow_graph.analyze(template)
+        cache.set(key, analysis)
+    return analysis
+
+
+def set_flow_template_status(flow_template, template, status, current_user):
+    flow_template.status = status
+    set_template_update_audit_fields(flow_template, template, current_user)
+    return flow_template
+
+
 def get_field_with_id(field_id):
     return Field.query.get(field_id)
 
@@ -234,6 +1007,203 @@ def delete_flow_template_status(flow_template_status):
     db.session.delete(flow_template_status)
 
 
+class TemplateNames:
+    """
+    The ids of the messages, email templates and SMS templates of a flow
+    template by name and then by org id, None being the flow template's
+    default.
+    """
+
+    __slots__ = ("message_ids", "email_template_ids", "sms_template_ids")
+
+    def __init__(self, message_ids, email_template_ids, sms_template_ids):
+        self.message_ids = message_ids
+        self.email_template_ids = email_template_ids
+        self.sms_template_ids = sms_template_ids
+
+    def has_message(self, name):
+        return name in self.message_ids
+
+    def get_message_id(self, name, org_id=None):
+        return self.message_ids.get(name, {}).get(org_id)
+
+    def get_email_template_id(self, name, org_id=None):
+        return self.email_template_ids.get(name, {}).get(org_id)
+
+    def get_sms_template_id(self, name, org_id=None):
+        return self.sms_template_ids.get(name, {}).get(org_id)
+
+    @staticmethod
+    def get_default_ids(ids_by_name):
+        return {
+            name: ids_by_org_id[None]
+            for name, ids_by_org_id in ids_by_name.items()
+            if None in ids_by_org_id
+        }
+
+
+# Name indexes and resolved content are cached per worker process, keyed by
+# the flow template id and version. Creating, updating and deleting messages,
+# email templates and SMS templates updates the flow template, so a cached
+# entry is never stale. Resolved content is also keyed by the content version,
+# which storing the audio metadata of a message increments. Entries loaded by
+# a transaction that writes are only cached once it has been committed, and
+# are reused by it until then.
+_TEMPLATE_NAMES = "template_names"
+_RESOLVED_CONTENT = "resolved_content"
+
+_names_cache = None
+_names_cache_pid = None
+_content_cache = None
+_content_cache_pid = None
+
+
+def _get_names_cache():
+    global _names_cache, _names_cache_pid
+
+    pid = os.getpid()
+    if _names_cache is None or _names_cache_pid != pid:
+        _names_cache = LRUCache(current_app.config["TEMPLATE_NAME_CACHE_SIZE"])
+        _names_cache_pid = pid
+    return _names_cache
+
+
+def _get_content_cache():
+    global _content_cache, _content_cache_pid
+
+    pid = os.getpid()
+    if _content_cache is None or _content_cache_pid != pid:
+        _content_cache = LRUCache(current_app.config["TEMPLATE_CONTENT_CACHE_SIZE"])
+        _content_cache_pid = pid
+    return _content_cache
+
+
+def _get_cached(cache, session_key, key, load):
+    """
+    Returns the value cached under 'key', loading it if it isn't cached.
+    """
+    value = cache.get(key)
+    if value is not None:
+        return value
+
+    if not has_writes():
+        value = load()
+        cache.set(key, value)
+        return value
+
+    loaded_values = db.session.info.setdefault(session_key, {})
+    value = loaded_values.get(key)
+    if value is None:
+        value = load()
+        loaded_values[key] = value
+        after_commit(lambda: cache.set(key, value))
+    return value
+
+
+def _get_ids_by_name(model, flow_template):
+    ids_by_name = {}
+    rows = db.session.query(model.id, model.name, model.org_id).filter(
+        model.flow_template_id == flow_template.id
+    )
+    for id, name, org_id in rows:
+        ids_by_name.setdefault(name, {})[org_id] = id
+    return ids_by_name
+
+
+def get_flow_template_names(flow_template):
+    """
+    Returns the name index of a flow template. The index is shared and must not
+    be modified.
+    """
+    db.session.flush()
+    return _get_cached(
+        _get_names_cache(),
+        _TEMPLATE_NAMES,
+        (flow_template.id, flow_template.version),
+        lambda: TemplateNames(
+            _get_ids_by_name(FlowTemplateMessage, flow_template),
+            _get_ids_by_name(EmailTemplate, flow_template),
+            _get_ids_by_name(SmsTemplate, flow_template),
+        ),
+    )
+
+
+class ResolvedContent:
+    """
+    The messages, email templates and SMS templates in effect for an org by
+    name: the org's own where it has one and the flow template's default
+    otherwise. Rows are kept as column values.
+    """
+
+    __slots__ = ("messages", "email_templates", "sms_templates")
+
+    def __init__(self, messages, email_templates, sms_templates):
+        self.messages = messages
+        self.email_templates = email_templates
+        self.sms_templates = sms_templates
+
+    def get_messages(self):
+        return [FlowTemplateMessage(**values) for values in self.messages.values()]
+
+    def get_message(self, name):
+        values = self.messages.get(name)
+        return FlowTemplateMessage(**values) if values else None
+
+    def get_email_templates(self):
+        return [EmailTemplate(**values) for values in self.email_templates.values()]
+
+    def get_email_template(self, name):
+        values = self.email_templates.get(name)
+        return EmailTemplate(**values) if values else None
+
+    def get_sms_templates(self):
+        return [SmsTemplate(**values) for values in self.sms_templates.values()]
+
+    def get_sms_template(self, name):
+        values = self.sms_templates.get(name)
+        return SmsTemplate(**values) if values else None
+
+
+def _get_resolved_rows(model, flow_template, org_id):
+    criterion = model.org_id.is_(None)
+    if org_id is not None:
+        criterion = db.or_(criterion, model.org_id == org_id)
+    columns = list(model.__table__.columns)
+    # The org's own row comes first for each name.
+    rows = (
+        db.session.query(*columns)
+        .filter(model.flow_template_id == flow_template.id, criterion)
+        .distinct(model.name)
+        .order_by(model.name, model.org_id.nullslast())
+    )
+    return {row.name: row._asdict() for row in rows}
+
+
+def get_resolved_content(flow_template, org_id):
+    """
+    Returns the content of a flow template in effect for an org, or the
+    defaults if 'org_id' is None. Each kind is resolved with a single query.
+    The rows returned by the getters are new instances that aren't added to
+    the session.
+    """
+    db.session.flush()
+    return _get_cached(
+        _get_content_cache(),
+        _RESOLVED_CONTENT,
+        (
+            flow_template.id,
+            flow_template.version,
+            flow_template.content_version,
+            org_id,
+        ),
+        lambda: ResolvedContent(
+            _get_resolved_rows(FlowTemplateMessage, flow_template, org_id),
+            _get_resolved_rows(EmailTemplate, flow_template, org_id),
+            _get_resolved_rows(SmsTemplate, flow_template, org_id),
+        ),
+    )
+
+
 def get_flow_template_messages(flow_template, org_id):
     return FlowTemplateMessage.query.filter(
         FlowTemplateMessage.flow_template == flow_template,
@@ -257,13 +1227,6 @@ def get_flow_template_message_with_name_and_org_id(
     return query.first()
 
 
-def get_flow_template_messages_with_names(flow_template, names):
-    return FlowTemplateMessage.query.filter(
-        FlowTemplateMessage.flow_template == flow_template,
-        FlowTemplateMessage.name.in_(names),
-    ).all()
-
-
 def get_flow_template_email_templates(flow_template, org_id):
     return EmailTemplate.query.filter(
         EmailTemplate.flow_template == flow_template, EmailTemplate.org_id == org_id
@@ -379,8 +1342,9 @@ def update_flow_template_email_template(
     set_flow_template_update_audit_fields(flow_template, current_user)
 
 
-def delete_flow_template_email_template(email_template):
+def delete_flow_template_email_template(flow_template, email_template, current_user):
     db.session.delete(email_template)
+    set_flow_template_update_audit_fields(flow_template, current_user)
 
 
 def get_flow_template_sms_templates(flow_template, org_id):
@@ -450,8 +1414,9 @@ def update_flow_template_sms_template(
     set_flow_template_update_audit_fields(flow_template, current_user)
 
 
-def delete_flow_template_sms_template(sms_template):
+def delete_flow_template_sms_template(flow_template, sms_template, current_user):
     db.session.delete(sms_template)
+    set_flow_template_update_audit_fields(flow_template, current_user)
 
 
 def get_flow_template_pages(flow_template):
@@ -475,8 +1440,8 @@ def update_template_settings(
     template.no_input_message_name = no_input_message_name
     template.invalid_input_message_name = invalid_input_message_name
     template.input_tries_exceeded_message_name = input_tries_exceeded_message_name
-    flow_template.flow_spec = template.to_json()
-    set_flow_template_update_audit_fields(flow_template, current_user)
+    flow_template.flow_spec = template.to_json(with_flows=False)
+    set_template_update_audit_fields(flow_template, template, current_user)
 
 
 def create_flow(flow_template, template, name, call_max_tries, current_user):
@@ -518,8 +1483,8 @@ def create_flow(flow_template, template, name, call_max_tries, current_user):
     flow.add_event(follow_ups_exceeded)
     flow.add_event(call_input_tries_exceeded)
     template.add_flow(flow)
-    flow_template.flow_spec = template.to_json()
-    set_flow_template_update_audit_fields(flow_template, current_user)
+    _add_flow(flow_template, flow)
+    set_template_update_audit_fields(flow_template, template, current_user)
     return flow
 
 
@@ -545,8 +1510,8 @@ def create_send_email_step(
         next_step_id=next_step_id,
     )
     flow.add_step(step)
-    flow_template.flow_spec = template.to_json()
-    set_flow_template_update_audit_fields(flow_template, current_user)
+    _add_step(flow_template, step)
+    set_template_update_audit_fields(flow_template, template, current_user)
     return step
 
 
@@ -562,13 +1527,15 @@ def update_send_email_step(
     next_step_id,
     current_user,
 ):
+    flow.unindex_step(step)
     step.name = name
     step.is_checkpoint = is_checkpoint
     step.recipient = recipient
     step.email_template_name = email_template_name
     step.next_step_id = next_step_id
-    flow_template.flow_spec = template.to_json()
-    set_flow_template_update_audit_fields(flow_template, current_user)
+    flow.index_step(step)
+    _save_step(flow_template, step)
+    set_template_update_audit_fields(flow_template, template, current_user)
     return step
 
 
@@ -594,8 +1561,8 @@ def create_send_sms_step(
         next_step_id=next_step_id,
     )
     flow.add_step(step)
-    flow_template.flow_spec = template.to_json()
-    set_flow_template_update_audit_fields(flow_template, current_user)
+    _add_step(flow_template, step)
+    set_template_update_audit_fields(flow_template, template, current_user)
     return step
 
 
@@ -611,13 +1578,15 @@ def update_send_sms_step(
     next_step_id,
     current_user,
 ):
+    flow.unindex_step(step)
     step.name = name
     step.is_checkpoint = is_checkpoint
     step.recipient = recipient
     step.sms_template_name = sms_template_name
     step.next_step_id = next_step_id
-    flow_template.flow_spec = template.to_json()
-    set_flow_template_update_audit_fields(flow_template, current_user)
+    flow.index_step(step)
+    _save_step(flow_template, step)
+    set_template_update_audit_fields(flow_template, template, current_user)
     return step
 
 
@@ -641,8 +1610,8 @@ def create_delay_step(
         next_step_id=next_step_id,
     )
     flow.add_step(step)
-    flow_template.flow_spec = template.to_json()
-    set_flow_template_update_audit_fields(flow_template, current_user)
+    _add_step(flow_template, step)
+    set_template_update_audit_fields(flow_template, template, current_user)
     return step
 
 
@@ -657,12 +1626,14 @@ def update_delay_step(
     next_step_id,
     current_user,
 ):
+    flow.unindex_step(step)
     step.name = name
     step.is_checkpoint = is_checkpoint
     step.duration = duration
     step.next_step_id = next_step_id
-    flow_template.flow_spec = template.to_json()
-    set_flow_template_update_audit_fields(flow_template, current_user)
+    flow.index_step(step)
+    _save_step(flow_template, step)
+    set_template_update_audit_fields(flow_template, template, current_user)
     return step
 
 
@@ -690,8 +1661,8 @@ def create_questions_step(
         next_step_id=next_step_id,
     )
     flow.add_step(step)
-    flow_template.flow_spec = template.to_json()
-    set_flow_template_update_audit_fields(flow_template, current_user)
+    _add_step(flow_template, step)
+    set_template_update_audit_fields(flow_template, template, current_user)
     return step
 
 
@@ -708,14 +1679,16 @@ def update_questions_step(
     next_step_id,
     current_user,
 ):
+    flow.unindex_step(step)
     step.name = name
     step.is_checkpoint = is_checkpoint
     step.question_set_name = question_set_name
     step.max_questions = max_questions
     step.max_options = max_options
     step.next_step_id = next_step_id
-    flow_template.flow_spec = template.to_json()
-    set_flow_template_update_audit_fields(flow_template, current_user)
+    flow.index_step(step)
+    _save_step(flow_template, step)
+    set_template_update_audit_fields(flow_template, template, current_user)
     return step
 
 
@@ -739,8 +1712,8 @@ def create_play_message_step(
         next_step_id=next_step_id,
     )
     flow.add_step(step)
-    flow_template.flow_spec = template.to_json()
-    set_flow_template_update_audit_fields(flow_template, current_user)
+    _add_step(flow_template, step)
+    set_template_update_audit_fields(flow_template, template, current_user)
     return step
 
 
@@ -755,12 +1728,14 @@ def update_play_message_step(
     next_step_id,
     current_user,
 ):
+    flow.unindex_step(step)
     step.name = name
     step.is_checkpoint = is_checkpoint
     step.message_names = message_names
     step.next_step_id = next_step_id
-    flow_template.flow_spec = template.to_json()
-    set_flow_template_update_audit_fields(flow_template, current_user)
+    flow.index_step(step)
+    _save_step(flow_template, step)
+    set_template_update_audit_fields(flow_template, template, current_user)
     return step
 
 
@@ -802,8 +1777,8 @@ def create_get_input_step(
         next_step_id=next_step_id,
     )
     flow.add_step(step)
-    flow_template.flow_spec = template.to_json()
-    set_flow_template_update_audit_fields(flow_template, current_user)
+    _add_step(flow_template, step)
+    set_template_update_audit_fields(flow_template, template, current_user)
     return step
 
 
@@ -830,6 +1805,7 @@ def update_get_input_step(
             Option(key=key, text=text, result=result, next_step_id=next_step_id)
             for (key, text, result, next_step_id) in options
         ]
+    flow.unindex_step(step)
     step.name = name
     step.is_checkpoint = is_checkpoint
     step.purpose = purpose
@@ -840,8 +1816,9 @@ def update_get_input_step(
     step.options = option_objs
     step.dynamic_options_attribute_name = dynamic_options_attribute_name
     step.next_step_id = next_step_id
-    flow_template.flow_spec = template.to_json()
-    set_flow_template_update_audit_fields(flow_template, current_user)
+    flow.index_step(step)
+    _save_step(flow_template, step)
+    set_template_update_audit_fields(flow_template, template, current_user)
     return step
 
 
@@ -867,8 +1844,8 @@ def create_record_audio_step(
         next_step_id=next_step_id,
     )
     flow.add_step(step)
-    flow_template.flow_spec = template.to_json()
-    set_flow_template_update_audit_fields(flow_template, current_user)
+    _add_step(flow_template, step)
+    set_template_update_audit_fields(flow_template, template, current_user)
     return step
 
 
@@ -884,13 +1861,15 @@ def update_record_audio_step(
     next_step_id,
     current_user,
 ):
+    flow.unindex_step(step)
     step.name = name
     step.is_checkpoint = is_checkpoint
     step.question_text = question_text
     step.result_name = result_name
     step.next_step_id = next_step_id
-    flow_template.flow_spec = template.to_json()
-    set_flow_template_update_audit_fields(flow_template, current_user)
+    flow.index_step(step)
+    _save_step(flow_template, step)
+    set_template_update_audit_fields(flow_template, template, current_user)
     return step
 
 
@@ -914,8 +1893,8 @@ def create_set_status_step(
         next_step_id=next_step_id,
     )
     flow.add_step(step)
-    flow_template.flow_spec = template.to_json()
-    set_flow_template_update_audit_fields(flow_template, current_user)
+    _add_step(flow_template, step)
+    set_template_update_audit_fields(flow_template, template, current_user)
     return step
 
 
@@ -930,12 +1909,14 @@ def update_set_status_step(
     next_step_id,
     current_user,
 ):
+    flow.unindex_step(step)
     step.name = name
     step.is_checkpoint = is_checkpoint
     step.status_id = status.id
     step.next_step_id = next_step_id
-    flow_template.flow_spec = template.to_json()
-    set_flow_template_update_audit_fields(flow_template, current_user)
+    flow.index_step(step)
+    _save_step(flow_template, step)
+    set_template_update_audit_fields(flow_template, template, current_user)
     return step
 
 
@@ -957,8 +1938,8 @@ def create_call_step(
         next_step_id=next_step_id,
     )
     flow.add_step(step)
-    flow_template.flow_spec = template.to_json()
-    set_flow_template_update_audit_fields(flow_template, current_user)
+    _add_step(flow_template, step)
+    set_template_update_audit_fields(flow_template, template, current_user)
     return step
 
 
@@ -972,11 +1953,13 @@ def update_call_step(
     next_step_id,
     current_user,
 ):
+    flow.unindex_step(step)
     step.name = name
     step.is_checkpoint = is_checkpoint
     step.next_step_id = next_step_id
-    flow_template.flow_spec = template.to_json()
-    set_flow_template_update_audit_fields(flow_template, current_user)
+    flow.index_step(step)
+    _save_step(flow_template, step)
+    set_template_update_audit_fields(flow_template, template, current_user)
     return step
 
 
@@ -998,8 +1981,8 @@ def create_hang_up_step(
         next_step_id=next_step_id,
     )
     flow.add_step(step)
-    flow_template.flow_spec = template.to_json()
-    set_flow_template_update_audit_fields(flow_template, current_user)
+    _add_step(flow_template, step)
+    set_template_update_audit_fields(flow_template, template, current_user)
     return step
 
 
@@ -1013,11 +1996,13 @@ def update_hang_up_step(
     next_step_id,
     current_user,
 ):
+    flow.unindex_step(step)
     step.name = name
     step.is_checkpoint = is_checkpoint
     step.next_step_id = next_step_id
-    flow_template.flow_spec = template.to_json()
-    set_flow_template_update_audit_fields(flow_template, current_user)
+    flow.index_step(step)
+    _save_step(flow_template, step)
+    set_template_update_audit_fields(flow_template, template, current_user)
     return step
 
 
@@ -1039,8 +2024,8 @@ def create_go_to_flow_step(
         go_to_flow_id=go_to_flow.id,
     )
     flow.add_step(step)
-    flow_template.flow_spec = template.to_json()
-    set_flow_template_update_audit_fields(flow_template, current_user)
+    _add_step(flow_template, step)
+    set_template_update_audit_fields(flow_template, template, current_user)
     return step
 
 
@@ -1054,11 +2039,13 @@ def update_go_to_flow_step(
     go_to_flow,
     current_user,
 ):
+    flow.unindex_step(step)
     step.name = name
     step.is_checkpoint = is_checkpoint
     step.go_to_flow_id = go_to_flow.id
-    flow_template.flow_spec = template.to_json()
-    set_flow_template_update_audit_fields(flow_template, current_user)
+    flow.index_step(step)
+    _save_step(flow_template, step)
+    set_template_update_audit_fields(flow_template, template, current_user)
     return step
 
 
@@ -1070,9 +2057,11 @@ def update_event(
     next_step_id,
     current_user,
 ):
+    flow.unindex_event(event)
     event.next_step_id = next_step_id
-    flow_template.flow_spec = template.to_json()
-    set_flow_template_update_audit_fields(flow_template, current_user)
+    flow.index_event(event)
+    _save_flow(flow_template, flow)
+    set_template_update_audit_fields(flow_template, template, current_user)
     return event
 
 
@@ -1083,6 +2072,10 @@ def delete_step(
     step,
     current_user,
 ):
-    flow.delete_step(step)
-    flow_template.flow_spec = template.to_json()
-    set_flow_template_update_audit_fields(flow_template, current_user)
+    steps, events = flow.delete_step(step)
+    _delete_step(flow_template, step)
+    for referencing_step in steps:
+        _save_step(flow_template, referencing_step)
+    if events:
+        _save_flow(flow_template, flow)
+    set_template_update_audit_fields(flow_template, template, current_user)
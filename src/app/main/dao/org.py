@@ -4,6 +4,7 @@ import shortuuid
 from sqlalchemy.orm import contains_eager
 
 from ... import db
+from ...utils import pagination
 from ..models import main as constants
 from ..models.main import Org, OrgUser
 
@@ -16,8 +17,8 @@ def get_org_with_name(name):
     return Org.query.filter(db.func.lower(Org.name) == name.strip().lower()).first()
 
 
-def get_all_orgs():
-    return Org.query.all()
+def get_all_orgs(cursor=None, page_size=None):
+    return pagination.paginate(Org.query, Org.name, Org.id, cursor, page_size)
 
 
 def get_org_with_id(org_id):
@@ -0,0 +1,49 @@
+from ... import db
+from ..models.main import Module, Permission
+
+# Each permission is represented by the bit at position Permission.id, so a set
+# of permissions is a single integer and checking for any of several
+# permissions is one AND. Permission rows are only added by migrations, so the
+# mapping of fully qualified identifiers to ids is loaded once per process and
+# reloaded when an unknown identifier is looked up.
+_permission_ids = None
+
+
+def get_permission_ids(reload=False):
+    global _permission_ids
+
+    if _permission_ids is None or reload:
+        rows = db.session.query(
+            Permission.id, Module.identifier, Permission.identifier
+        ).join(Module, Permission.module_id == Module.id)
+        _permission_ids = {
+            f"{module_identifier}.{identifier}": permission_id
+            for permission_id, module_identifier, identifier in rows
+        }
+    return _permission_ids
+
+
+def get_permission_mask(identifiers):
+    """
+    Returns the mask of the permissions with the given fully qualified
+    identifiers. Raises ValueError if any of them is unknown.
+    """
+    permission_ids = get_permission_ids()
+    if any(identifier not in permission_ids for identifier in identifiers):
+        permission_ids = get_permission_ids(reload=True)
+
+    unknown_identifiers = [
+        identifier for identifier in identifiers if identifier not in permission_ids
+    ]
+    if unknown_identifiers:
+        raise ValueError(f"Unknown permissions {', '.join(unknown_identifiers)}")
+    return permission_ids_to_mask(
+        permission_ids[identifier] for identifier in identifiers
+    )
+
+
+def permission_ids_to_mask(permission_ids):
+    mask = 0
+    for permission_id in permission_ids:
+        mask |= 1 << permission_id
+    return mask
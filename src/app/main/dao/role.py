@@ -3,6 +3,7 @@ import datetime
 from sqlalchemy.exc import IntegrityError
 
 from ... import db
+from . import auth_cache as auth_cache_dao
 from ..models.main import Role
 
 
@@ -40,6 +41,7 @@ def create_role(name, role_type, current_user):
 
 
 def delete_role(role):
+    auth_cache_dao.invalidate_role(role)
     try:
         db.session.delete(role)
         db.session.flush()
@@ -1,3 +1,8 @@
+import datetime
+import re
+
+from sqlalchemy import column, text, values
+
 from ... import db
 from ..models.main import Session, User
 
@@ -9,3 +14,133 @@ def get_session_with_uuid(uuid):
         .filter(Session.uuid == uuid)
         .first()
     )
+
+
+def get_session_with_id(session_id):
+    return (
+        Session.query.join(User)
+        .options(db.contains_eager(Session.user))
+        .filter(Session.id == session_id)
+        .first()
+    )
+
+
+def update_last_seen_at(last_seen_at_by_session_id):
+    """
+    Bulk updates 'last_seen_at' of the given sessions with a single
+    UPDATE ... FROM (VALUES ...) statement. Sessions are only moved forward in
+    time. Returns the (id, uuid) of the updated sessions.
+    """
+    if not last_seen_at_by_session_id:
+        return []
+
+    last_seen = values(
+        column("id", db.Integer),
+        column("last_seen_at", db.DateTime),
+        name="last_seen",
+    ).data(list(last_seen_at_by_session_id.items()))
+
+    query = (
+        db.update(Session)
+        .where(
+            Session.id == last_seen.c.id,
+            Session.last_seen_at < last_seen.c.last_seen_at,
+        )
+        .values(last_seen_at=last_seen.c.last_seen_at)
+        .returning(Session.id, Session.uuid)
+        .execution_options(synchronize_session=False)
+    )
+    return db.session.execute(query).all()
+
+
+def get_expired_sessions(cutoff, after, limit):
+    """
+    Returns (last_seen_at, id) of up to 'limit' sessions last seen before
+    'cutoff', in order, starting after the (last_seen_at, id) in 'after'.
+    """
+    query = db.session.query(Session.last_seen_at, Session.id).filter(
+        Session.last_seen_at < cutoff
+    )
+    if after:
+        query = query.filter(db.tuple_(Session.last_seen_at, Session.id) > after)
+    return query.order_by(Session.last_seen_at, Session.id).limit(limit).all()
+
+
+def delete_expired_sessions(session_ids, cutoff):
+    """
+    Deletes the given sessions unless they were seen since 'cutoff'. Returns
+    the (id, uuid) of the deleted sessions.
+    """
+    if not session_ids:
+        return []
+
+    query = (
+        db.delete(Session)
+        .where(Session.id.in_(session_ids), Session.last_seen_at < cutoff)
+        .returning(Session.id, Session.uuid)
+        .execution_options(synchronize_session=False)
+    )
+    return db.session.execute(query).all()
+
+
+SESSION_PARTITION_NAME = "d_session_p{year:04d}{month:02d}"
+SESSION_PARTITION_NAME_PATTERN = re.compile(r"^d_session_p(\d{4})(\d{2})$")
+
+
+def is_session_table_partitioned():
+    query = text(
+        "SELECT EXISTS ("
+        "SELECT 1 FROM pg_partitioned_table WHERE partrelid = to_regclass(:table)"
+        ")"
+    )
+    return db.session.execute(query, {"table": Session.__tablename__}).scalar()
+
+
+def get_session_partition_months():
+    """
+    Returns the first day of the month of every d_session partition that
+    follows the d_session_pYYYYMM naming convention.
+    """
+    query = text(
+        "SELECT c.relname FROM pg_inherits i "
+        "JOIN pg_class c ON c.oid = i.inhrelid "
+        "WHERE i.inhparent = to_regclass(:table)"
+    )
+    months = []
+    for (name,) in db.session.execute(query, {"table": Session.__tablename__}):
+        match = SESSION_PARTITION_NAME_PATTERN.match(name)
+        if match:
+            months.append(datetime.date(int(match[1]), int(match[2]), 1))
+    return sorted(months)
+
+
+def get_next_month(month):
+    return (month + datetime.timedelta(days=32)).replace(day=1)
+
+
+def get_expired_partition_months(months, cutoff):
+    """
+    Returns the months whose whole partition range is before 'cutoff'.
+    """
+    return [
+        month
+        for month in months
+        if datetime.datetime.combine(get_next_month(month), datetime.time()) <= cutoff
+    ]
+
+
+def create_session_partition(month):
+    name = SESSION_PARTITION_NAME.format(year=month.year, month=month.month)
+    db.session.execute(
+        text(
+            f"CREATE TABLE IF NOT EXISTS {name} "
+            f"PARTITION OF {Session.__tablename__} "
+            f"FOR VALUES FROM ('{month.isoformat()}') "
+            f"TO ('{get_next_month(month).isoformat()}')"
+        )
+    )
+
+
+def drop_session_partition(month):
+    name = SESSION_PARTITION_NAME.format(year=month.year, month=month.month)
+    db.session.execute(text(f"DROP TABLE IF EXISTS {name}"))
@@ -1,6 +1,7 @@
 import datetime
 
 from ... import db
+from ...utils import pagination
 from ..models.main import (
     InviteBalance,
     InviteTransaction,
@@ -57,8 +58,9 @@ def get_subscription_with_org_id_and_dates(
     return query.first()
 
 
-def get_subscriptions_with_org_id(org_id):
-    return Subscription.query.filter(Subscription.org_id == org_id).all()
+def get_subscriptions_with_org_id(org_id, cursor=None, page_size=None):
+    query = Subscription.query.filter(Subscription.org_id == org_id)
+    return pagination.paginate(query, None, Subscription.id, cursor, page_size)
 
 
 def get_subscription_with_id(subscription_id):
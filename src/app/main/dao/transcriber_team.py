@@ -3,6 +3,7 @@ import datetime
 from sqlalchemy.sql.expression import true
 
 from ... import db
+from ...utils import pagination
 from ..models.main import TranscriberTeam, TranscriberTeamOrg, TranscriberTeamUser
 
 
@@ -52,8 +53,14 @@ def get_default_transcriber_team_by_language_id(language_id):
     ).first()
 
 
-def get_all_transcriber_teams():
-    return TranscriberTeam.query.all()
+def get_all_transcriber_teams(cursor=None, page_size=None):
+    return pagination.paginate(
+        TranscriberTeam.query,
+        TranscriberTeam.name,
+        TranscriberTeam.id,
+        cursor,
+        page_size,
+    )
 
 
 def get_transcriber_team_user(transcriber_team_id, user_id):
@@ -80,8 +87,10 @@ def delete_transcriber_team_user(transcriber_team_user):
     db.session.flush()
 
 
-def get_all_transcriber_team_orgs():
-    return TranscriberTeamOrg.query.all()
+def get_all_transcriber_team_orgs(cursor=None, page_size=None):
+    return pagination.paginate(
+        TranscriberTeamOrg.query, None, TranscriberTeamOrg.id, cursor, page_size
+    )
 
 
 def get_transcriber_team_org_with_id(transcriber_team_org_id):
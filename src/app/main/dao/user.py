@@ -3,6 +3,9 @@ import datetime
 from sqlalchemy import exists
 
 from ... import db
+from ...utils import pagination
+from . import auth_cache as auth_cache_dao
+from . import permission as permission_dao
 from ..models import main as constants
 from ..models.main import (
     Module,
@@ -31,6 +34,18 @@ def get_user_permission_identifiers(user):
     return {p.fully_qualified_identifier for p in permissions}
 
 
+def get_user_permission_mask(user):
+    permission_ids = (
+        db.session.query(RolePermission.permission_id)
+        .join(UserRole, RolePermission.role_id == UserRole.role_id)
+        .filter(UserRole.user_id == user.id, UserRole.org_id.is_(None))
+        .distinct()
+    )
+    return permission_dao.permission_ids_to_mask(
+        permission_id for permission_id, in permission_ids
+    )
+
+
 def get_user_with_id(user_id):
     return User.query.get(user_id)
 
@@ -85,6 +100,7 @@ def create_user_role(user, role, org, current_user):
     )
     db.session.add(user_role)
     db.session.flush()
+    auth_cache_dao.invalidate_user_roles([user.id])
     return user_role
 
 
@@ -118,9 +134,11 @@ def update_user(
     user.mobile = mobile
     user.updated_at = datetime.datetime.now()
     user.updated_by_user = current_user
+    auth_cache_dao.invalidate_user(user)
 
 
 def delete_user_roles_with_user_id(user):
+    auth_cache_dao.invalidate_user_roles([user.id])
     return UserRole.query.filter(UserRole.user == user).delete()
 
 
@@ -132,19 +150,21 @@ def get_roles_with_user_id(user):
     )
 
 
-def get_users():
-    return User.query.filter(~exists().where(OrgUser.user_id == User.id)).all()
+def get_users(cursor=None, page_size=None):
+    query = User.query.filter(~exists().where(OrgUser.user_id == User.id))
+    return pagination.paginate(query, User.name, User.id, cursor, page_size)
 
 
-def get_transcriber_users():
-    return User.query.filter(
+def get_transcriber_users(cursor=None, page_size=None):
+    query = User.query.filter(
         UserRole.query.join(Role, UserRole.role_id == Role.id)
         .filter(
             UserRole.user_id == User.id,
             Role.role_type == constants.ROLE_TYPE_TRANSCRIBER,
         )
         .exists()
-    ).all()
+    )
+    return pagination.paginate(query, User.name, User.id, cursor, page_size)
 
 
 def user_has_role_type(user_id, role_type):
@@ -0,0 +1,156 @@
+import io
+import itertools
+from concurrent.futures import ProcessPoolExecutor
+
+import shortuuid
+from flask import Flask, current_app
+
+from ...decorators.transaction import transaction
+from ...utils import audio, s3
+from ..dao import audio as audio_dao
+
+AUDIO_INGEST_BATCH_SIZE = 20
+
+
+def _get_ingest_options():
+    config = current_app.config
+    return {
+        "transcode_min_size": config["AUDIO_TRANSCODE_MIN_SIZE"],
+        "transcode_options": {
+            "sample_rate": config["AUDIO_TRANSCODE_SAMPLE_RATE"],
+            "bit_rate": config["AUDIO_TRANSCODE_BIT_RATE"],
+            "ffmpeg_path": config["FFMPEG_PATH"],
+        },
+    }
+
+
+# Pool processes download the files they ingest, so that the job never holds
+# more than one file per process in memory. They have no app context, so the
+# S3 helpers run in a minimal app with the S3 settings of the job's app.
+_S3_CONFIG_KEYS = (
+    "AWS_ACCESS_KEY_ID",
+    "AWS_SECRET_ACCESS_KEY",
+    "AWS_DEFAULT_REGION",
+    "S3_BUCKET_NAME_PUBLIC",
+)
+_worker_app = None
+
+
+def _get_s3_config():
+    return {key: current_app.config[key] for key in _S3_CONFIG_KEYS}
+
+
+def _init_worker(s3_config):
+    global _worker_app
+
+    _worker_app = Flask(__name__)
+    _worker_app.config.update(s3_config)
+
+
+def _ingest_data(data, options):
+    try:
+        return audio.ingest(data, **options)
+    except ValueError:
+        return None, None
+
+
+def _download_and_ingest(audio_file_path, options):
+    # Runs in the processes of the pool of ingest_pending_audio.
+    with _worker_app.app_context():
+        data = s3.download_bytes_from_s3(audio_file_path, is_private=False)
+    return _ingest_data(data, options)
+
+
+def _get_transcoded_file_path(audio_file_path):
+    # Audio files are cached as immutable, so the transcoded file gets a key of
+    # its own, unique to this ingest so that a concurrent ingest of the same
+    # file can't overwrite or delete it. The original file is left in place.
+    return f"{audio_file_path.rsplit('.', 1)[0]}-{shortuuid.uuid()}.mp3"
+
+
+def _save_ingest_result(kind, id, audio_file_path, result):
+    """
+    Stores the result of ingesting the audio file of a row, uploading the
+    transcoded file next to the original one. Returns False if the row was
+    deleted or its audio file replaced in the meantime, in which case the
+    transcoded file is deleted again.
+    """
+    info, transcoded_data = result
+    new_audio_file_path = audio_file_path
+    if info is not None and transcoded_data is not None:
+        # Uploaded before the row is locked, so that edits of the row aren't
+        # blocked for the length of the upload.
+        new_audio_file_path = _get_transcoded_file_path(audio_file_path)
+        s3.upload_audio_to_s3(
+            new_audio_file_path, io.BytesIO(transcoded_data), is_private=False
+        )
+
+    is_saved = False
+    try:
+        with transaction():
+            row = audio_dao.get_audio_row(kind, id, for_update=True)
+            if row is not None and row.audio_file_path == audio_file_path:
+                if info is None:
+                    audio_dao.set_audio_invalid(row)
+                else:
+                    audio_dao.set_audio_info(row, info, new_audio_file_path)
+                is_saved = True
+    finally:
+        if not is_saved and new_audio_file_path != audio_file_path:
+            s3.delete_file_from_s3(new_audio_file_path, is_private=False)
+    return is_saved
+
+
+def ingest_audio(params):
+    """
+    Probes the audio file of a message or recording instruction, transcoding
+    it if it's a large wav file, and stores its metadata. Returns whether it
+    was ingested.
+    """
+    kind = params["kind"]
+    id = params["id"]
+    with transaction():
+        row = audio_dao.get_audio_row(kind, id)
+        audio_file_path = row.audio_file_path if row else None
+    if not audio_file_path:
+        return False
+
+    data = s3.download_bytes_from_s3(audio_file_path, is_private=False)
+    result = _ingest_data(data, _get_ingest_options())
+    return _save_ingest_result(kind, id, audio_file_path, result)
+
+
+def ingest_pending_audio(params=None):
+    """
+    Ingests the audio files of every message and recording instruction that
+    haven't been ingested, 'batch_size' at a time on a pool of
+    AUDIO_INGEST_POOL_SIZE processes. Returns the number of ingested files.
+    """
+    params = params or {}
+    batch_size = params.get("batch_size", AUDIO_INGEST_BATCH_SIZE)
+    options = _get_ingest_options()
+
+    ingested = 0
+    pool_size = current_app.config["AUDIO_INGEST_POOL_SIZE"]
+    with ProcessPoolExecutor(
+        max_workers=pool_size, initializer=_init_worker, initargs=(_get_s3_config(),)
+    ) as executor:
+        for kind in audio_dao.AUDIO_KINDS:
+            after_id = 0
+            while True:
+                with transaction():
+                    rows = audio_dao.get_pending_audio(kind, after_id, batch_size)
+                if not rows:
+                    break
+                after_id = rows[-1].id
+
+                results = executor.map(
+                    _download_and_ingest,
+                    [row.audio_file_path for row in rows],
+                    itertools.repeat(options),
+                )
+                for (id, audio_file_path), result in zip(rows, results):
+                    if _save_ingest_result(kind, id, audio_file_path, result):
+                        ingested += 1
+
+    return ingested
@@ -0,0 +1,67 @@
+from ...decorators.transaction import transaction
+from ..dao import flow_template as flow_template_dao
+
+
+def migrate_flow_specs(params=None):
+    """
+    Moves the flows and steps of every flow template that still holds them in
+    flow_spec to their own rows, one flow template per transaction. Returns
+    the number of migrated flow templates.
+    """
+    with transaction():
+        flow_template_dao.create_flow_and_step_tables()
+        flow_template_ids = flow_template_dao.get_unmigrated_flow_template_ids()
+
+    migrated = 0
+    for flow_template_id in flow_template_ids:
+        with transaction():
+            flow_template = flow_template_dao.get_flow_template_with_id(
+                flow_template_id
+            )
+            if flow_template_dao.migrate_flow_spec(flow_template):
+                migrated += 1
+    return migrated
+
+
+def compile_flow_templates(params=None):
+    """
+    Compiles every published flow template that hasn't been compiled, one flow
+    template per transaction. Returns the number of compiled flow templates.
+    """
+    with transaction():
+        flow_template_ids = flow_template_dao.get_uncompiled_flow_template_ids()
+
+    for flow_template_id in flow_template_ids:
+        with transaction():
+            flow_template = flow_template_dao.get_flow_template_with_id(
+                flow_template_id
+            )
+            template = flow_template_dao.get_template(flow_template)
+            flow_template_dao.compile_flow_template(flow_template, template)
+    return len(flow_template_ids)
+
+
+def version_flow_templates(params=None):
+    """
+    Snapshots every published flow template that has no published version, one
+    flow template per transaction, then pins the campaigns that aren't pinned
+    to a version. Returns the number of versioned flow templates and of
+    pinned campaigns.
+    """
+    with transaction():
+        flow_template_dao.create_version_table()
+        flow_template_ids = flow_template_dao.get_unversioned_flow_template_ids()
+
+    for flow_template_id in flow_template_ids:
+        with transaction():
+            flow_template = flow_template_dao.get_flow_template_with_id(
+                flow_template_id
+            )
+            template = flow_template_dao.get_template(flow_template)
+            flow_template.published_version_id = (
+                flow_template_dao.save_template_version(template)
+            )
+
+    with transaction():
+        pinned = flow_template_dao.pin_campaign_flow_template_versions()
+    return len(flow_template_ids), pinned
@@ -0,0 +1,131 @@
+import datetime
+
+from flask import current_app
+
+from ...decorators.transaction import transaction
+from ...utils import session_token, session_tracker
+from ..dao import auth_cache as auth_cache_dao
+from ..dao import session as session_dao
+
+LAST_SEEN_AT_FLUSH_BATCH_SIZE = 1000
+SESSION_SWEEP_BATCH_SIZE = 1000
+SESSION_PARTITION_MONTHS_AHEAD = 2
+
+
+def flush_session_last_seen_at(params=None):
+    """
+    Writes the last seen timestamps buffered by the session tracker to
+    d_session, one batch per transaction. Returns the number of updated
+    sessions.
+    """
+    last_seen_at_by_session_id = session_tracker.get_all_last_seen_at()
+    items = list(last_seen_at_by_session_id.items())
+
+    updated = 0
+    for i in range(0, len(items), LAST_SEEN_AT_FLUSH_BATCH_SIZE):
+        batch = dict(items[i : i + LAST_SEEN_AT_FLUSH_BATCH_SIZE])
+        with transaction():
+            sessions = session_dao.update_last_seen_at(batch)
+
+        # Cached copies of the sessions still hold the previous value.
+        auth_cache_dao.invalidate_sessions(sessions)
+        session_tracker.discard(batch)
+        updated += len(sessions)
+
+    return updated
+
+
+def sweep_expired_sessions(params=None):
+    """
+    Deletes sessions that haven't been seen for SESSION_MAX_AGE seconds, in
+    batches of 'batch_size' sessions per transaction. Partitions of a
+    partitioned d_session that only hold expired sessions are dropped first.
+    Returns the number of deleted sessions.
+    """
+    params = params or {}
+    batch_size = params.get("batch_size", SESSION_SWEEP_BATCH_SIZE)
+
+    max_age = current_app.config["SESSION_MAX_AGE"]
+    if max_age <= 0:
+        return 0
+
+    # Sessions are only expired by their flushed last_seen_at.
+    flush_session_last_seen_at()
+    cutoff = datetime.datetime.now() - datetime.timedelta(seconds=max_age)
+
+    with transaction():
+        is_partitioned = session_dao.is_session_table_partitioned()
+    if is_partitioned:
+        _maintain_session_partitions(SESSION_PARTITION_MONTHS_AHEAD)
+
+    deleted = 0
+    after = None
+    while True:
+        with transaction():
+            sessions = session_dao.get_expired_sessions(cutoff, after, batch_size)
+        if not sessions:
+            break
+        after = tuple(sessions[-1])
+
+        # Skip sessions seen again since the flush above.
+        session_ids = [session_id for _, session_id in sessions]
+        last_seen_at = session_tracker.get_last_seen_at_many(session_ids)
+        session_ids = [
+            session_id
+            for session_id in session_ids
+            if session_id not in last_seen_at or last_seen_at[session_id] < cutoff
+        ]
+
+        with transaction():
+            deleted_sessions = session_dao.delete_expired_sessions(
+                session_ids, cutoff
+            )
+        auth_cache_dao.invalidate_sessions(deleted_sessions)
+        session_token.revoke_sessions([session.id for session in deleted_sessions])
+        deleted += len(deleted_sessions)
+
+    return deleted
+
+
+def maintain_session_partitions(params=None):
+    """
+    Creates the monthly d_session partitions for the current month and the
+    next 'months_ahead' months, and drops partitions whose whole range is
+    older than SESSION_MAX_AGE. Does nothing unless d_session is partitioned.
+    Returns the months of the created and of the dropped partitions.
+    """
+    params = params or {}
+    months_ahead = params.get("months_ahead", SESSION_PARTITION_MONTHS_AHEAD)
+
+    # Partitions are dropped by their flushed last_seen_at, like sessions are
+    # swept.
+    flush_session_last_seen_at()
+    return _maintain_session_partitions(months_ahead)
+
+
+def _maintain_session_partitions(months_ahead):
+    created = []
+    dropped = []
+    with transaction():
+        if not session_dao.is_session_table_partitioned():
+            return created, dropped
+
+        existing_months = session_dao.get_session_partition_months()
+
+        month = datetime.date.today().replace(day=1)
+        for _ in range(months_ahead + 1):
+            if month not in existing_months:
+                session_dao.create_session_partition(month)
+                created.append(month)
+            month = session_dao.get_next_month(month)
+
+        max_age = current_app.config["SESSION_MAX_AGE"]
+        if max_age > 0:
+            cutoff = datetime.datetime.now() - datetime.timedelta(seconds=max_age)
+            for month in session_dao.get_expired_partition_months(
+                existing_months, cutoff
+            ):
+                session_dao.drop_session_partition(month)
+                dropped.append(month)
+
+    return created, dropped
@@ -0,0 +1,295 @@
+import msgpack
+
+from .flow_template import (
+    GET_INPUT_PURPOSE_MAKE_DECISION,
+    STEP_CLASSES,
+    STEP_GET_INPUT,
+    STEP_GO_TO_FLOW,
+    STEP_SEND_EMAIL,
+    STEP_SEND_SMS,
+    TRANSITION_NEXT,
+)
+
+# Compiled templates are the form of published templates used to run them.
+# Steps are numbered densely in flow and step order and every reference is an
+# index: next steps and option destinations to steps (NO_STEP when unset),
+# GoToFlow destinations and the start flow to flows, and message, email
+# template and SMS template names to tables of names. Messages, email templates
+# and SMS templates change without the template being compiled again, so the
+# ids of the flow template's defaults are resolved by name when a compiled
+# template is loaded (None when there is no default; organizations may
+# override them by name). Options of Make Decision steps are pre-folded into a
+# lookup of option keys and lower cased texts. The compiled template is
+# serialized with msgpack.
+FORMAT_VERSION = 1
+
+NO_STEP = -1
+NO_FLOW = -1
+NO_NAME = -1
+
+STEP_TYPES = tuple(STEP_CLASSES)
+
+# Step attributes stored as indexes, the rest are kept in the step's params.
+_COMPILED_STEP_KEYS = frozenset(
+    (
+        "id",
+        "name",
+        "type",
+        "isCheckpoint",
+        "nextStepId",
+        "options",
+        "messageNames",
+        "emailTemplateName",
+        "smsTemplateName",
+        "goToFlowId",
+    )
+)
+
+
+class _NameTable:
+    __slots__ = ("names", "indexes_by_name")
+
+    def __init__(self):
+        self.names = []
+        self.indexes_by_name = {}
+
+    def add(self, name):
+        if name is None:
+            return NO_NAME
+        index = self.indexes_by_name.get(name)
+        if index is None:
+            index = len(self.names)
+            self.names.append(name)
+            self.indexes_by_name[name] = index
+        return index
+
+    def to_json(self):
+        return {"names": self.names}
+
+
+def compile_template(template):
+    """
+    Compiles a template and returns it serialized.
+    """
+    messages = _NameTable()
+    email_templates = _NameTable()
+    sms_templates = _NameTable()
+
+    flow_indexes = {flow.id: index for index, flow in enumerate(template.flows)}
+    step_indexes = {}
+    for flow in template.flows:
+        for step in flow.steps:
+            step_indexes[(flow.id, step.id)] = len(step_indexes)
+
+    def get_step_index(flow, step_id):
+        if step_id is None:
+            return NO_STEP
+        return step_indexes.get((flow.id, step_id), NO_STEP)
+
+    flows = {"ids": [], "names": [], "callMaxTries": [], "events": []}
+    for flow in template.flows:
+        flows["ids"].append(flow.id)
+        flows["names"].append(flow.name)
+        flows["callMaxTries"].append(flow.call_max_tries)
+        flows["events"].append(
+            {
+                event.id: get_step_index(flow, event.next_step_id)
+                for event in flow.events
+            }
+        )
+
+    steps = {
+        "ids": [],
+        "names": [],
+        "types": [],
+        "flows": [],
+        "checkpoints": [],
+        "next": [],
+        "options": [],
+        "messages": [],
+        "templates": [],
+        "params": [],
+    }
+    for flow_index, flow in enumerate(template.flows):
+        for step in flow.steps:
+            step_json = step.to_json()
+            steps["ids"].append(step.id)
+            steps["names"].append(step.name)
+            steps["types"].append(STEP_TYPES.index(step.type))
+            steps["flows"].append(flow_index)
+            steps["checkpoints"].append(bool(step.is_checkpoint))
+            steps["next"].append(get_step_index(flow, step.next_step_id))
+
+            options = None
+            if (
+                step.type == STEP_GET_INPUT
+                and step.purpose == GET_INPUT_PURPOSE_MAKE_DECISION
+            ):
+                # The first matching option wins, as in get_next_step_id.
+                options = {}
+                for option in step.options or ():
+                    next_step_index = get_step_index(flow, option.next_step_id)
+                    options.setdefault(option.key, next_step_index)
+                    if option.text:
+                        options.setdefault(option.text.lower(), next_step_index)
+            steps["options"].append(options)
+
+            message_names = step_json.get("messageNames")
+            steps["messages"].append(
+                [messages.add(name) for name in message_names]
+                if message_names
+                else None
+            )
+
+            if step.type == STEP_SEND_EMAIL:
+                steps["templates"].append(email_templates.add(step.email_template_name))
+            elif step.type == STEP_SEND_SMS:
+                steps["templates"].append(sms_templates.add(step.sms_template_name))
+            else:
+                steps["templates"].append(NO_NAME)
+
+            params = {
+                key: value
+                for key, value in step_json.items()
+                if key not in _COMPILED_STEP_KEYS
+            }
+            if step.type == STEP_GO_TO_FLOW:
+                params["goToFlow"] = flow_indexes.get(step.go_to_flow_id, NO_FLOW)
+            steps["params"].append(params or None)
+
+    compiled = {
+        "format": FORMAT_VERSION,
+        "stepTypes": STEP_TYPES,
+        "startFlow": flow_indexes.get(template.start_flow_id, NO_FLOW),
+        "inputMaxTries": template.input_max_tries,
+        "noInputMessage": messages.add(template.no_input_message_name),
+        "invalidInputMessage": messages.add(template.invalid_input_message_name),
+        "inputTriesExceededMessage": messages.add(
+            template.input_tries_exceeded_message_name
+        ),
+        "flows": flows,
+        "steps": steps,
+        "messages": messages.to_json(),
+        "emailTemplates": email_templates.to_json(),
+        "smsTemplates": sms_templates.to_json(),
+    }
+    return msgpack.packb(compiled)
+
+
+def _get_ids(names, ids_by_name):
+    ids_by_name = ids_by_name or {}
+    return [ids_by_name.get(name) for name in names]
+
+
+class CompiledTemplate:
+    __slots__ = (
+        "start_flow",
+        "input_max_tries",
+        "no_input_message",
+        "invalid_input_message",
+        "input_tries_exceeded_message",
+        "flow_ids",
+        "flow_names",
+        "flow_call_max_tries",
+        "flow_events",
+        "step_ids",
+        "step_names",
+        "step_types",
+        "step_flows",
+        "step_checkpoints",
+        "step_next",
+        "step_options",
+        "step_messages",
+        "step_templates",
+        "step_params",
+        "message_names",
+        "message_ids",
+        "email_template_names",
+        "email_template_ids",
+        "sms_template_names",
+        "sms_template_ids",
+        "steps_by_flow_and_id",
+    )
+
+    def __init__(
+        self, data, message_ids=None, email_template_ids=None, sms_template_ids=None
+    ):
+        """
+        Loads a serialized compiled template. The ids of the default messages,
+        email templates and SMS templates are given by name.
+        """
+        compiled = msgpack.unpackb(data, strict_map_key=False)
+        if compiled["format"] != FORMAT_VERSION:
+            raise ValueError(
+                f"Unsupported compiled template format {compiled['format']}"
+            )
+
+        self.start_flow = compiled["startFlow"]
+        self.input_max_tries = compiled["inputMaxTries"]
+        self.no_input_message = compiled["noInputMessage"]
+        self.invalid_input_message = compiled["invalidInputMessage"]
+        self.input_tries_exceeded_message = compiled["inputTriesExceededMessage"]
+
+        flows = compiled["flows"]
+        self.flow_ids = flows["ids"]
+        self.flow_names = flows["names"]
+        self.flow_call_max_tries = flows["callMaxTries"]
+        self.flow_events = flows["events"]
+
+        steps = compiled["steps"]
+        step_types = compiled["stepTypes"]
+        self.step_ids = steps["ids"]
+        self.step_names = steps["names"]
+        self.step_types = [step_types[step_type] for step_type in steps["types"]]
+        self.step_flows = steps["flows"]
+        self.step_checkpoints = steps["checkpoints"]
+        self.step_next = steps["next"]
+        self.step_options = steps["options"]
+        self.step_messages = steps["messages"]
+        self.step_templates = steps["templates"]
+        self.step_params = steps["params"]
+
+        self.message_names = compiled["messages"]["names"]
+        self.message_ids = _get_ids(self.message_names, message_ids)
+        self.email_template_names = compiled["emailTemplates"]["names"]
+        self.email_template_ids = _get_ids(
+            self.email_template_names, email_template_ids
+        )
+        self.sms_template_names = compiled["smsTemplates"]["names"]
+        self.sms_template_ids = _get_ids(self.sms_template_names, sms_template_ids)
+
+        self.steps_by_flow_and_id = {
+            (self.flow_ids[flow], step_id): step
+            for step, (flow, step_id) in enumerate(
+                zip(self.step_flows, self.step_ids)
+            )
+        }
+
+    def __len__(self):
+        return len(self.step_ids)
+
+    def get_flow(self, flow_id):
+        try:
+            return self.flow_ids.index(flow_id)
+        except ValueError:
+            return NO_FLOW
+
+    def get_step(self, flow_id, step_id):
+        return self.steps_by_flow_and_id.get((flow_id, step_id), NO_STEP)
+
+    def get_event_step(self, flow, event_id):
+        return self.flow_events[flow].get(event_id, NO_STEP)
+
+    def get_next_step(self, step, value):
+        """
+        Returns the step that follows a step for a transition value, like
+        Step.get_next_step_id.
+        """
+        options = self.step_options[step]
+        if options is not None:
+            next_step = options.get(value)
+            if next_step is not None:
+                return next_step
+        if value == TRANSITION_NEXT:
+            return self.step_next[step]
+        return NO_STEP
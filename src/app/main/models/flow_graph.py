@@ -0,0 +1,329 @@
+from .flow_template import (
+    EVENT_START,
+    STEP_CALL,
+    STEP_DELAY,
+    STEP_GET_INPUT,
+    STEP_GO_TO_FLOW,
+    STEP_RECORD_AUDIO,
+)
+
+# Structural analysis of the transition graph of a template. The nodes are the
+# steps of every flow and the edges their next steps, including the options of
+# Make Decision steps, plus an edge from each GoToFlow step to the first step
+# of the flow it goes to. A flow runs when it's the start flow or the target of
+# a reachable GoToFlow step, and its events are the entry points of its steps.
+# ResumeFromCheckpoint steps return to a checkpoint that has already been
+# reached, so they don't add edges. The analysis is linear in the number of
+# steps and transitions.
+
+SEVERITY_ERROR = "error"
+SEVERITY_WARNING = "warning"
+
+ISSUE_NO_START_FLOW = "noStartFlow"
+ISSUE_INVALID_START_FLOW = "invalidStartFlow"
+ISSUE_DANGLING_NEXT_STEP = "danglingNextStep"
+ISSUE_INVALID_GO_TO_FLOW = "invalidGoToFlow"
+ISSUE_CYCLE_WITHOUT_INPUT = "cycleWithoutInput"
+ISSUE_UNREACHABLE_FLOW = "unreachableFlow"
+ISSUE_UNREACHABLE_STEPS = "unreachableSteps"
+
+# Steps that wait for the candidate or for time to pass. A cycle without one of
+# them would run forever.
+WAITING_STEP_TYPES = frozenset(
+    (STEP_CALL, STEP_DELAY, STEP_GET_INPUT, STEP_RECORD_AUDIO)
+)
+
+
+class Issue:
+    __slots__ = ("severity", "code", "message", "flow_id", "step_ids", "event_id")
+
+    def __init__(
+        self, severity, code, message, flow_id=None, step_ids=None, event_id=None
+    ):
+        self.severity = severity
+        self.code = code
+        self.message = message
+        self.flow_id = flow_id
+        self.step_ids = step_ids
+        self.event_id = event_id
+
+    def to_json(self):
+        issue_json = {
+            "severity": self.severity,
+            "code": self.code,
+            "message": self.message,
+        }
+        if self.flow_id is not None:
+            issue_json["flowId"] = self.flow_id
+        if self.step_ids is not None:
+            issue_json["stepIds"] = self.step_ids
+        if self.event_id is not None:
+            issue_json["eventId"] = self.event_id
+        return issue_json
+
+
+class FlowGraphAnalysis:
+    __slots__ = ("issues",)
+
+    def __init__(self, issues):
+        self.issues = issues
+
+    @property
+    def errors(self):
+        return [issue for issue in self.issues if issue.severity == SEVERITY_ERROR]
+
+    @property
+    def warnings(self):
+        return [issue for issue in self.issues if issue.severity == SEVERITY_WARNING]
+
+    def has_errors(self):
+        return any(issue.severity == SEVERITY_ERROR for issue in self.issues)
+
+    def to_json(self):
+        return {
+            "valid": not self.has_errors(),
+            "errors": [issue.to_json() for issue in self.errors],
+            "warnings": [issue.to_json() for issue in self.warnings],
+        }
+
+
+def _get_first_step(flow):
+    event = flow.get_event(EVENT_START)
+    if event is None or event.next_step_id is None:
+        return None
+    return flow.get_step(event.next_step_id)
+
+
+def _get_strongly_connected_components(successors):
+    """
+    Returns the strongly connected components of a graph given as the list of
+    successors of each node, using an iterative version of Tarjan's algorithm.
+    """
+    node_count = len(successors)
+    indexes = [None] * node_count
+    low_links = [0] * node_count
+    on_stack = [False] * node_count
+    stack = []
+    components = []
+    next_index = 0
+
+    for root in range(node_count):
+        if indexes[root] is not None:
+            continue
+
+        work = [(root, 0)]
+        while work:
+            node, edge = work[-1]
+            if edge == 0:
+                indexes[node] = low_links[node] = next_index
+                next_index += 1
+                stack.append(node)
+                on_stack[node] = True
+
+            node_successors = successors[node]
+            while edge < len(node_successors):
+                successor = node_successors[edge]
+                edge += 1
+                if indexes[successor] is None:
+                    work[-1] = (node, edge)
+                    work.append((successor, 0))
+                    break
+                if on_stack[successor]:
+                    low_links[node] = min(low_links[node], indexes[successor])
+            else:
+                work.pop()
+                if work:
+                    parent = work[-1][0]
+                    low_links[parent] = min(low_links[parent], low_links[node])
+
+                if low_links[node] == indexes[node]:
+                    component = []
+                    while True:
+                        member = stack.pop()
+                        on_stack[member] = False
+                        component.append(member)
+                        if member == node:
+                            break
+                    components.append(component)
+
+    return components
+
+
+def analyze(template):
+    issues = []
+
+    # Nodes are numbered in flow and step order.
+    flows = []
+    steps = []
+    node_by_step = {}
+    for flow in template.flows:
+        for step in flow.steps:
+            node_by_step[id(step)] = len(steps)
+            flows.append(flow)
+            steps.append(step)
+
+    successors = []
+    for flow, step in zip(flows, steps):
+        step_successors = [
+            node_by_step[id(flow.steps_by_id[next_step_id])]
+            for next_step_id in step.get_next_step_ids()
+            if next_step_id in flow.steps_by_id
+        ]
+
+        if step.type == STEP_GO_TO_FLOW:
+            go_to_flow = (
+                template.get_flow(step.go_to_flow_id) if step.go_to_flow_id else None
+            )
+            first_step = _get_first_step(go_to_flow) if go_to_flow else None
+            if go_to_flow is None:
+                issues.append(
+                    Issue(
+                        SEVERITY_ERROR,
+                        ISSUE_INVALID_GO_TO_FLOW,
+                        f"Step '{step.name}' goes to a flow that doesn't exist",
+                        flow_id=flow.id,
+                        step_ids=[step.id],
+                    )
+                )
+            elif first_step is None:
+                issues.append(
+                    Issue(
+                        SEVERITY_ERROR,
+                        ISSUE_INVALID_GO_TO_FLOW,
+                        f"Step '{step.name}' goes to flow '{go_to_flow.name}' "
+                        "which has no start step",
+                        flow_id=flow.id,
+                        step_ids=[step.id],
+                    )
+                )
+            else:
+                step_successors.append(node_by_step[id(first_step)])
+
+        successors.append(step_successors)
+
+    for flow in template.flows:
+        for next_step_id in list(flow.predecessors_by_step_id):
+            if next_step_id in flow.steps_by_id:
+                continue
+            predecessor_steps, predecessor_events = flow.get_predecessors(
+                next_step_id
+            )
+            for step in predecessor_steps:
+                issues.append(
+                    Issue(
+                        SEVERITY_ERROR,
+                        ISSUE_DANGLING_NEXT_STEP,
+                        f"Step '{step.name}' leads to a step that doesn't exist",
+                        flow_id=flow.id,
+                        step_ids=[step.id],
+                    )
+                )
+            for event in predecessor_events:
+                issues.append(
+                    Issue(
+                        SEVERITY_ERROR,
+                        ISSUE_DANGLING_NEXT_STEP,
+                        f"Event '{event.name}' leads to a step that doesn't exist",
+                        flow_id=flow.id,
+                        event_id=event.id,
+                    )
+                )
+
+    for component in _get_strongly_connected_components(successors):
+        if len(component) == 1 and component[0] not in successors[component[0]]:
+            continue
+        if any(steps[node].type in WAITING_STEP_TYPES for node in component):
+            continue
+        component.sort()
+        first_node = component[0]
+        # Cycles through GoToFlow steps span several flows.
+        flow_ids = {flows[node].id for node in component}
+        issues.append(
+            Issue(
+                SEVERITY_ERROR,
+                ISSUE_CYCLE_WITHOUT_INPUT,
+                f"Step '{steps[first_node].name}' is part of a cycle that never "
+                "waits for input",
+                flow_id=flows[first_node].id if len(flow_ids) == 1 else None,
+                step_ids=[steps[node].id for node in component],
+            )
+        )
+
+    if not template.start_flow_id:
+        issues.append(
+            Issue(SEVERITY_ERROR, ISSUE_NO_START_FLOW, "The start flow is not set")
+        )
+    elif template.start_flow is None:
+        issues.append(
+            Issue(
+                SEVERITY_ERROR,
+                ISSUE_INVALID_START_FLOW,
+                "The start flow doesn't exist",
+                flow_id=template.start_flow_id,
+            )
+        )
+    else:
+        issues.extend(
+            _get_reachability_issues(template, steps, node_by_step, successors)
+        )
+
+    return FlowGraphAnalysis(issues)
+
+
+def _get_reachability_issues(template, steps, node_by_step, successors):
+    reached = [False] * len(steps)
+    running_flow_ids = set()
+    pending_flows = [template.start_flow]
+    pending_nodes = []
+
+    while pending_flows or pending_nodes:
+        if pending_flows:
+            flow = pending_flows.pop()
+            if flow.id in running_flow_ids:
+                continue
+            running_flow_ids.add(flow.id)
+            for event in flow.events:
+                step = flow.get_step(event.next_step_id) if event.next_step_id else None
+                if step is not None:
+                    pending_nodes.append(node_by_step[id(step)])
+            continue
+
+        node = pending_nodes.pop()
+        if reached[node]:
+            continue
+        reached[node] = True
+        pending_nodes.extend(successors[node])
+
+        step = steps[node]
+        if step.type == STEP_GO_TO_FLOW and step.go_to_flow_id:
+            go_to_flow = template.get_flow(step.go_to_flow_id)
+            if go_to_flow is not None:
+                pending_flows.append(go_to_flow)
+
+    issues = []
+    for flow in template.flows:
+        if flow.id not in running_flow_ids:
+            issues.append(
+                Issue(
+                    SEVERITY_WARNING,
+                    ISSUE_UNREACHABLE_FLOW,
+                    f"Flow '{flow.name}' is never run",
+                    flow_id=flow.id,
+                )
+            )
+            continue
+
+        unreachable_step_ids = [
+            step.id for step in flow.steps if not reached[node_by_step[id(step)]]
+        ]
+        if unreachable_step_ids:
+            issues.append(
+                Issue(
+                    SEVERITY_WARNING,
+                    ISSUE_UNREACHABLE_STEPS,
+                    f"Flow '{flow.name}' has steps that can't be reached",
+                    flow_id=flow.id,
+                    step_ids=unreachable_step_ids,
+                )
+            )
+    return issues
@@ -2,6 +2,8 @@ TRANSITION_NEXT = "next"
 
 
 class Transition:
+    __slots__ = ("name", "destination")
+
     def __init__(self, *, transition_json=None, name=None, destination=None):
         if transition_json:
             self.name = transition_json["name"]
@@ -15,6 +17,8 @@ class Transition:
 
 
 class Event:
+    __slots__ = ("id", "name", "next_step_id")
+
     def __init__(self, *, event_json=None, id=None, name=None, next_step_id=None):
         if event_json:
             self.id = event_json["id"]
@@ -25,9 +29,14 @@ class Event:
             self.name = name
             self.next_step_id = next_step_id
 
+    def get_next_step_ids(self):
+        return {self.next_step_id} if self.next_step_id else set()
+
     def delete_references_to_step(self, deleted_step_id):
         if self.next_step_id == deleted_step_id:
             self.next_step_id = None
+            return True
+        return False
 
     def to_json(self):
         return {
@@ -38,6 +47,8 @@ class Event:
 
 
 class Condition:
+    __slots__ = ("attribute", "value", "else_transition")
+
     def __init__(
         self, *, condition_json=None, attribute=None, value=None, else_transition=None
     ):
@@ -59,6 +70,8 @@ class Condition:
 
 
 class Option:
+    __slots__ = ("key", "text", "result", "next_step_id")
+
     def __init__(
         self, *, option_json=None, key=None, text=None, result=None, next_step_id=None
     ):
@@ -101,6 +114,13 @@ STEP_GO_TO_FLOW = "GoToFlow"
 
 
 class Step:
+    # Templates with thousands of steps are cached, so steps are slotted and
+    # their transitions are derived from next_step_id (and options) on access
+    # instead of being stored.
+    __slots__ = ("flow", "id", "name", "is_checkpoint", "next_step_id", "condition")
+
+    type = None
+
     def __init__(
         self,
         *,
@@ -108,61 +128,43 @@ class Step:
         step_json=None,
         id=None,
         name=None,
-        type=None,
         is_checkpoint=None,
         next_step_id=None,
     ):
         self.flow = flow
+        self.condition = None
         if step_json:
             self.id = step_json["id"]
             self.name = step_json["name"]
-            self.type = step_json.get("type")
             self.is_checkpoint = step_json.get("isCheckpoint", False)
             self.next_step_id = step_json.get("nextStepId")
-            self.condition = None
             if "condition" in step_json:
                 self.condition = Condition(condition_json=step_json["condition"])
         else:
             self.id = id
             self.name = name
-            self.type = type
             self.is_checkpoint = is_checkpoint
             self.next_step_id = next_step_id
-            self.condition = None
-
-        self.next_step_ids = {}
-        self.transitions = []
 
+    @property
+    def transitions(self):
         if self.next_step_id:
-            self.add_next_step_id(TRANSITION_NEXT, self.next_step_id)
-            self.add_transition(TRANSITION_NEXT, self.next_step_id)
+            return [Transition(name=TRANSITION_NEXT, destination=self.next_step_id)]
+        return []
 
     def get_next_step_id(self, value):
-        return self.next_step_ids.get(value)
-
-    def add_next_step_id(self, value, next_step_id):
-        self.next_step_ids[value] = next_step_id
-
-    def delete_next_step_id(self, value):
-        if value in self.next_step_ids:
-            del self.next_step_ids[value]
-
-    def add_transition(self, name, destination):
-        transition = Transition(name=name, destination=destination)
-        self.transitions.append(transition)
+        if value == TRANSITION_NEXT:
+            return self.next_step_id
+        return None
 
-    def delete_transition(self, destination):
-        self.transitions = [
-            transition
-            for transition in self.transitions
-            if transition.destination != destination
-        ]
+    def get_next_step_ids(self):
+        return {self.next_step_id} if self.next_step_id else set()
 
     def delete_references_to_step(self, deleted_step_id):
         if self.next_step_id == deleted_step_id:
             self.next_step_id = None
-            self.delete_next_step_id(TRANSITION_NEXT)
-            self.delete_transition(deleted_step_id)
+            return True
+        return False
 
     def to_json(self):
         step_json = {
@@ -185,6 +187,10 @@ RECIPIENT_SYS_ADMIN = "System Administrator"
 
 
 class SendSmsStep(Step):
+    __slots__ = ("recipient", "sms_template_name")
+
+    type = STEP_SEND_SMS
+
     def __init__(
         self,
         *,
@@ -202,7 +208,6 @@ class SendSmsStep(Step):
             step_json=step_json,
             id=id,
             name=name,
-            type=STEP_SEND_SMS,
             is_checkpoint=is_checkpoint,
             next_step_id=next_step_id,
         )
@@ -221,6 +226,10 @@ class SendSmsStep(Step):
 
 
 class SendEmailStep(Step):
+    __slots__ = ("recipient", "email_template_name")
+
+    type = STEP_SEND_EMAIL
+
     def __init__(
         self,
         *,
@@ -238,7 +247,6 @@ class SendEmailStep(Step):
             step_json=step_json,
             id=id,
             name=name,
-            type=STEP_SEND_EMAIL,
             is_checkpoint=is_checkpoint,
             next_step_id=next_step_id,
         )
@@ -257,6 +265,10 @@ class SendEmailStep(Step):
 
 
 class DelayStep(Step):
+    __slots__ = ("duration",)
+
+    type = STEP_DELAY
+
     def __init__(
         self,
         *,
@@ -273,7 +285,6 @@ class DelayStep(Step):
             step_json=step_json,
             id=id,
             name=name,
-            type=STEP_DELAY,
             is_checkpoint=is_checkpoint,
             next_step_id=next_step_id,
         )
@@ -289,6 +300,10 @@ class DelayStep(Step):
 
 
 class CallStep(Step):
+    __slots__ = ()
+
+    type = STEP_CALL
+
     def __init__(
         self,
         *,
@@ -304,13 +319,16 @@ class CallStep(Step):
             step_json=step_json,
             id=id,
             name=name,
-            type=STEP_CALL,
             is_checkpoint=is_checkpoint,
             next_step_id=next_step_id,
         )
 
 
 class HangUpStep(Step):
+    __slots__ = ()
+
+    type = STEP_HANG_UP
+
     def __init__(
         self,
         *,
@@ -326,13 +344,16 @@ class HangUpStep(Step):
             step_json=step_json,
             id=id,
             name=name,
-            type=STEP_HANG_UP,
             is_checkpoint=is_checkpoint,
             next_step_id=next_step_id,
         )
 
 
 class QuestionsStep(Step):
+    __slots__ = ("question_set_name", "max_questions", "max_options")
+
+    type = STEP_QUESTIONS
+
     def __init__(
         self,
         *,
@@ -351,7 +372,6 @@ class QuestionsStep(Step):
             step_json=step_json,
             id=id,
             name=name,
-            type=STEP_QUESTIONS,
             is_checkpoint=is_checkpoint,
             next_step_id=next_step_id,
         )
@@ -373,6 +393,10 @@ class QuestionsStep(Step):
 
 
 class PlayMessageStep(Step):
+    __slots__ = ("message_names",)
+
+    type = STEP_PLAY_MESSAGE
+
     def __init__(
         self,
         *,
@@ -389,7 +413,6 @@ class PlayMessageStep(Step):
             step_json=step_json,
             id=id,
             name=name,
-            type=STEP_PLAY_MESSAGE,
             is_checkpoint=is_checkpoint,
             next_step_id=next_step_id,
         )
@@ -422,6 +445,18 @@ GET_INPUT_OPTIONS_TYPE_DYNAMIC = "Dynamic"
 
 
 class GetInputStep(Step):
+    __slots__ = (
+        "purpose",
+        "message_names",
+        "result_name",
+        "result_data_type",
+        "options_type",
+        "options",
+        "dynamic_options_attribute_name",
+    )
+
+    type = STEP_GET_INPUT
+
     def __init__(
         self,
         *,
@@ -444,7 +479,6 @@ class GetInputStep(Step):
             step_json=step_json,
             id=id,
             name=name,
-            type=STEP_GET_INPUT,
             is_checkpoint=is_checkpoint,
             next_step_id=next_step_id,
         )
@@ -476,25 +510,42 @@ class GetInputStep(Step):
             self.options = options
             self.dynamic_options_attribute_name = dynamic_options_attribute_name
 
+    @property
+    def transitions(self):
+        transitions = super().transitions
         if self.purpose == GET_INPUT_PURPOSE_MAKE_DECISION:
             for option in self.options:
-                self.add_next_step_id(option.key, option.next_step_id)
-                if option.text:
-                    self.add_next_step_id(option.text.lower(), option.next_step_id)
                 transition_name = (
                     f"{option.key} - {option.text}" if option.text else str(option.key)
                 )
-                self.add_transition(transition_name, option.next_step_id)
+                transitions.append(
+                    Transition(name=transition_name, destination=option.next_step_id)
+                )
+        return transitions
+
+    def get_next_step_id(self, value):
+        if self.purpose == GET_INPUT_PURPOSE_MAKE_DECISION:
+            for option in self.options:
+                if option.key == value or (
+                    option.text and option.text.lower() == value
+                ):
+                    return option.next_step_id
+        return super().get_next_step_id(value)
+
+    def get_next_step_ids(self):
+        next_step_ids = super().get_next_step_ids()
+        for option in self.options or ():
+            if option.next_step_id:
+                next_step_ids.add(option.next_step_id)
+        return next_step_ids
 
     def delete_references_to_step(self, deleted_step_id):
-        super().delete_references_to_step(deleted_step_id)
-        for option in self.options:
+        deleted = super().delete_references_to_step(deleted_step_id)
+        for option in self.options or ():
             if option.next_step_id == deleted_step_id:
                 option.next_step_id = None
-                self.delete_next_step_id(option.key)
-                if option.text:
-                    self.delete_next_step_id(option.text.lower())
-                self.delete_transition(deleted_step_id)
+                deleted = True
+        return deleted
 
     def get_option_by_key(self, key):
         if self.options:
@@ -535,6 +586,10 @@ class GetInputStep(Step):
 
 
 class RecordAudioStep(Step):
+    __slots__ = ("question_text", "result_name")
+
+    type = STEP_RECORD_AUDIO
+
     def __init__(
         self,
         *,
@@ -552,7 +607,6 @@ class RecordAudioStep(Step):
             step_json=step_json,
             id=id,
             name=name,
-            type=STEP_RECORD_AUDIO,
             is_checkpoint=is_checkpoint,
             next_step_id=next_step_id,
         )
@@ -571,6 +625,10 @@ class RecordAudioStep(Step):
 
 
 class SetStatusStep(Step):
+    __slots__ = ("status_id",)
+
+    type = STEP_SET_STATUS
+
     def __init__(
         self,
         *,
@@ -587,7 +645,6 @@ class SetStatusStep(Step):
             step_json=step_json,
             id=id,
             name=name,
-            type=STEP_SET_STATUS,
             is_checkpoint=is_checkpoint,
             next_step_id=next_step_id,
         )
@@ -603,6 +660,10 @@ class SetStatusStep(Step):
 
 
 class ResumeFromCheckpointStep(Step):
+    __slots__ = ()
+
+    type = STEP_RESUME_FROM_CHECKPOINT
+
     def __init__(
         self,
         *,
@@ -618,13 +679,16 @@ class ResumeFromCheckpointStep(Step):
             step_json=step_json,
             id=id,
             name=name,
-            type=STEP_RESUME_FROM_CHECKPOINT,
             is_checkpoint=is_checkpoint,
             next_step_id=next_step_id,
         )
 
 
 class GoToFlowStep(Step):
+    __slots__ = ("go_to_flow_id",)
+
+    type = STEP_GO_TO_FLOW
+
     def __init__(
         self,
         *,
@@ -640,7 +704,6 @@ class GoToFlowStep(Step):
             step_json=step_json,
             id=id,
             name=name,
-            type=STEP_GO_TO_FLOW,
             is_checkpoint=is_checkpoint,
             next_step_id=None,
         )
@@ -669,6 +732,10 @@ EVENT_FOLLOW_UP_CALL_PREVIOUSLY_ANSWERED = "follow-up-call-previously-answered"
 EVENT_FOLLOW_UPS_EXCEEDED = "follow-ups-exceeded"
 EVENT_CALL_INPUT_TRIES_EXCEEDED = "call-input-tries-exceeded"
 
+STEP_OPERATION_CREATE = "create"
+STEP_OPERATION_UPDATE = "update"
+STEP_OPERATION_DELETE = "delete"
+
 
 STEP_CLASSES = {
     STEP_SEND_EMAIL: SendEmailStep,
@@ -686,13 +753,84 @@ STEP_CLASSES = {
 }
 
 
+# Index values are a single item, or a list of the items when several share a
+# key, as most keys (names, result names) are unique.
+def _add_to_index(index, key, item):
+    indexed = index.get(key)
+    if indexed is None:
+        index[key] = item
+    elif isinstance(indexed, list):
+        indexed.append(item)
+    else:
+        index[key] = [indexed, item]
+
+
+def _remove_from_index(index, key, item):
+    indexed = index.get(key)
+    if indexed is item:
+        del index[key]
+    elif isinstance(indexed, list):
+        items = [indexed_item for indexed_item in indexed if indexed_item is not item]
+        index[key] = items if len(items) > 1 else items[0]
+
+
+def _get_from_index(index, key):
+    indexed = index.get(key)
+    if indexed is None:
+        return ()
+    if isinstance(indexed, list):
+        return indexed
+    return (indexed,)
+
+
+def _get_step_name_key(name):
+    return name.strip().lower()
+
+
+def _get_result_name(step):
+    if step.type == STEP_RECORD_AUDIO or (
+        step.type == STEP_GET_INPUT
+        and step.purpose == GET_INPUT_PURPOSE_COLLECT_INFORMATION
+    ):
+        return step.result_name
+    return None
+
+
+def _get_dynamic_options_attribute_name(step):
+    if (
+        step.type == STEP_GET_INPUT
+        and step.purpose == GET_INPUT_PURPOSE_COLLECT_INFORMATION
+    ):
+        return step.dynamic_options_attribute_name
+    return None
+
+
 class Flow:
+    # Steps are indexed by their lower cased name and by type, and the steps
+    # and events that lead to each step by its id. Steps and events whose
+    # indexed attributes or next steps are modified must be unindexed first
+    # and indexed again afterwards (see unindex_step and index_step).
+    __slots__ = (
+        "template",
+        "id",
+        "name",
+        "call_max_tries",
+        "steps_by_id",
+        "steps_by_name",
+        "steps_by_type",
+        "predecessors_by_step_id",
+        "events",
+        "events_by_id",
+    )
+
     def __init__(
         self, *, template=None, flow_json=None, id=None, name=None, call_max_tries=None
     ):
         self.template = template
-        self.steps = []
         self.steps_by_id = {}
+        self.steps_by_name = {}
+        self.steps_by_type = {}
+        self.predecessors_by_step_id = {}
         self.events = []
         self.events_by_id = {}
 
@@ -716,50 +854,102 @@ class Flow:
             self.name = name
             self.call_max_tries = call_max_tries
 
+    @property
+    def steps(self):
+        return self.steps_by_id.values()
+
     def get_step(self, step_id):
         return self.steps_by_id.get(step_id)
 
     def get_step_by_name(self, step_name, case_insensitive=False):
-        for step in self.steps:
-            if (
-                case_insensitive and step.name.lower() == step_name.strip().lower()
-            ) or (not case_insensitive and step.name == step_name):
+        for step in _get_from_index(self.steps_by_name, _get_step_name_key(step_name)):
+            if case_insensitive or step.name == step_name:
                 return step
         return None
 
     def get_steps_by_type(self, step_type):
+        return list(_get_from_index(self.steps_by_type, step_type))
+
+    def is_attached(self):
+        return self.template is not None and self.template.get_flow(self.id) is self
+
+    def index_step(self, step):
+        _add_to_index(self.steps_by_name, _get_step_name_key(step.name), step)
+        _add_to_index(self.steps_by_type, step.type, step)
+        self._index_predecessor(step)
+        if self.is_attached():
+            self.template.index_step(step)
+
+    def unindex_step(self, step):
+        _remove_from_index(self.steps_by_name, _get_step_name_key(step.name), step)
+        _remove_from_index(self.steps_by_type, step.type, step)
+        self._unindex_predecessor(step)
+        if self.is_attached():
+            self.template.unindex_step(step)
+
+    def _index_predecessor(self, step_or_event):
+        for next_step_id in step_or_event.get_next_step_ids():
+            _add_to_index(self.predecessors_by_step_id, next_step_id, step_or_event)
+
+    def _unindex_predecessor(self, step_or_event):
+        for next_step_id in step_or_event.get_next_step_ids():
+            _remove_from_index(
+                self.predecessors_by_step_id, next_step_id, step_or_event
+            )
+
+    def get_predecessors(self, step_id):
+        """
+        Returns the steps and the events that lead to a step.
+        """
         steps = []
-        for step in self.steps:
-            if step.type == step_type:
-                steps.append(step)
-        return steps
+        events = []
+        for predecessor in _get_from_index(self.predecessors_by_step_id, step_id):
+            if isinstance(predecessor, Event):
+                events.append(predecessor)
+            else:
+                steps.append(predecessor)
+        return steps, events
 
     def add_step(self, step):
-        self.steps.append(step)
         self.steps_by_id[step.id] = step
+        self.index_step(step)
 
     def delete_step(self, step_to_delete):
-        self.steps = [step for step in self.steps if step.id != step_to_delete.id]
+        """
+        Deletes a step and the references to it. Returns the steps and the
+        events that referenced the deleted step.
+        """
+        self.unindex_step(step_to_delete)
         del self.steps_by_id[step_to_delete.id]
-        for step in self.steps:
-            step.delete_references_to_step(step_to_delete.id)
-        for event in self.events:
-            event.delete_references_to_step(step_to_delete.id)
+
+        steps, events = self.get_predecessors(step_to_delete.id)
+        self.predecessors_by_step_id.pop(step_to_delete.id, None)
+        for predecessor in steps + events:
+            predecessor.delete_references_to_step(step_to_delete.id)
+        return steps, events
 
     def get_event(self, event_id):
         return self.events_by_id.get(event_id)
 
+    def index_event(self, event):
+        self._index_predecessor(event)
+
+    def unindex_event(self, event):
+        self._unindex_predecessor(event)
+
     def add_event(self, event):
         self.events.append(event)
         self.events_by_id[event.id] = event
+        self.index_event(event)
 
-    def to_json(self):
+    def to_json(self, with_steps=True):
         flow_json = {
             "id": self.id,
             "name": self.name,
             "events": [event.to_json() for event in self.events],
-            "steps": [step.to_json() for step in self.steps],
         }
+        if with_steps:
+            flow_json["steps"] = [step.to_json() for step in self.steps]
         if self.call_max_tries:
             flow_json["data"] = {}
             flow_json["data"]["maxTries"] = self.call_max_tries
@@ -767,6 +957,21 @@ class Flow:
 
 
 class Template:
+    # Steps of every flow are indexed by their lower cased result name and,
+    # for steps collecting information from dynamic options, by the options
+    # attribute. The indexes are maintained by the flows.
+    __slots__ = (
+        "flows",
+        "flows_by_id",
+        "steps_by_result_name",
+        "steps_by_dynamic_options_attribute_name",
+        "start_flow_id",
+        "input_max_tries",
+        "no_input_message_name",
+        "invalid_input_message_name",
+        "input_tries_exceeded_message_name",
+    )
+
     def __init__(
         self,
         *,
@@ -779,6 +984,8 @@ class Template:
     ):
         self.flows = []
         self.flows_by_id = {}
+        self.steps_by_result_name = {}
+        self.steps_by_dynamic_options_attribute_name = {}
 
         if template_json:
             self.start_flow_id = template_json.get("start")
@@ -801,57 +1008,82 @@ class Template:
             self.invalid_input_message_name = invalid_input_message_name
             self.input_tries_exceeded_message_name = input_tries_exceeded_message_name
 
+    @property
+    def start_flow(self):
+        return self.get_flow(self.start_flow_id) if self.start_flow_id else None
+
     def get_flow(self, flow_id):
         return self.flows_by_id.get(flow_id)
 
     def add_flow(self, flow):
         self.flows.append(flow)
         self.flows_by_id[flow.id] = flow
+        for step in flow.steps:
+            self.index_step(step)
+
+    def index_step(self, step):
+        result_name = _get_result_name(step)
+        if result_name:
+            _add_to_index(
+                self.steps_by_result_name, _get_step_name_key(result_name), step
+            )
+        attribute_name = _get_dynamic_options_attribute_name(step)
+        if attribute_name:
+            _add_to_index(
+                self.steps_by_dynamic_options_attribute_name, attribute_name, step
+            )
+
+    def unindex_step(self, step):
+        result_name = _get_result_name(step)
+        if result_name:
+            _remove_from_index(
+                self.steps_by_result_name, _get_step_name_key(result_name), step
+            )
+        attribute_name = _get_dynamic_options_attribute_name(step)
+        if attribute_name:
+            _remove_from_index(
+                self.steps_by_dynamic_options_attribute_name, attribute_name, step
+            )
 
     def get_steps_by_type(self, step_type):
         steps = []
         for flow in self.flows:
-            flow_steps = flow.get_steps_by_type(step_type)
-            steps.extend(flow_steps)
+            steps.extend(_get_from_index(flow.steps_by_type, step_type))
         return steps
 
     def get_step_by_dynamic_options_attribute_name(
         self, dynamic_options_attribute_name
     ):
-        step = None
-        get_input_steps = self.get_steps_by_type(STEP_GET_INPUT)
-        for get_input_step in get_input_steps:
-            if get_input_step.purpose == GET_INPUT_PURPOSE_COLLECT_INFORMATION:
-                if (
-                    get_input_step.dynamic_options_attribute_name
-                    == dynamic_options_attribute_name
-                ):
-                    step = get_input_step
-                    break
-        return step
+        steps = _get_from_index(
+            self.steps_by_dynamic_options_attribute_name,
+            dynamic_options_attribute_name,
+        )
+        return steps[0] if steps else None
 
     def get_result_names(self, excluded_step_id=None):
-        result_names = set()
-
-        get_input_steps = self.get_steps_by_type(STEP_GET_INPUT)
-        for get_input_step in get_input_steps:
-            if get_input_step.purpose == GET_INPUT_PURPOSE_COLLECT_INFORMATION:
-                if not excluded_step_id or get_input_step.id != excluded_step_id:
-                    result_names.add(get_input_step.result_name)
-
-        record_audio_steps = self.get_steps_by_type(STEP_RECORD_AUDIO)
-        for record_audio_step in record_audio_steps:
-            if not excluded_step_id or record_audio_step.id != excluded_step_id:
-                result_names.add(record_audio_step.result_name)
+        return {
+            step.result_name
+            for key in self.steps_by_result_name
+            for step in _get_from_index(self.steps_by_result_name, key)
+            if not excluded_step_id or step.id != excluded_step_id
+        }
 
-        return result_names
+    def has_result_name(self, result_name, excluded_step_id=None):
+        steps = _get_from_index(
+            self.steps_by_result_name, _get_step_name_key(result_name)
+        )
+        return any(
+            not excluded_step_id or step.id != excluded_step_id for step in steps
+        )
 
-    def to_json(self):
-        return {
+    def to_json(self, with_flows=True):
+        template_json = {
             "start": self.start_flow_id,
             "inputMaxTries": self.input_max_tries,
             "noInputMessageName": self.no_input_message_name,
             "invalidInputMessageName": self.invalid_input_message_name,
             "inputTriesExceededMessageName": self.input_tries_exceeded_message_name,
-            "flows": [flow.to_json() for flow in self.flows],
         }
+        if with_flows:
+            template_json["flows"] = [flow.to_json() for flow in self.flows]
+        return template_json
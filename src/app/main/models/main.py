@@ -4,8 +4,8 @@ from flask import current_app
 from flask_login import UserMixin
 from sqlalchemy.dialects import postgresql
 
-from ... import argon2, db
-from ...utils import phone_number, s3
+from ... import db
+from ...utils import password_hasher, phone_number, s3, session_tracker
 
 
 class Timezone(db.Model):
@@ -133,6 +133,9 @@ class User(db.Model, UserMixin):
     updated_by_user_id = db.Column(
         db.Integer, db.ForeignKey("d_user.id"), nullable=True
     )
+    # Incremented whenever the user's roles change. Signed session tokens carry
+    # the version they were issued with and are rejected once it moves on.
+    permission_version = db.Column(db.Integer, nullable=False, server_default="0")
 
     created_by_user = db.relationship("User", foreign_keys=[created_by_user_id])
     updated_by_user = db.relationship("User", foreign_keys=[updated_by_user_id])
@@ -142,11 +145,22 @@ class User(db.Model, UserMixin):
     # So the code to create the functional index has been manually added to
     # db/versions/<Revision ID>_add_user.py
 
+    __table_args__ = (
+        db.Index("ix_d_user_name_id", "name", "id"),
+        # For campaign search (see Campaign).
+        db.Index(
+            "ix_d_user_name_trgm",
+            "name",
+            postgresql_using="gin",
+            postgresql_ops={"name": "gin_trgm_ops"},
+        ),
+    )
+
     def set_password(self, password):
-        self.password = argon2.generate_password_hash(password)
+        self.password = password_hasher.hash_password(password)
 
     def verify_password(self, password):
-        return argon2.check_password_hash(self.password, password)
+        return password_hasher.check_password(self.password, password)
 
     @property
     def country_code(self):
@@ -165,21 +179,35 @@ class Session(db.Model):
         db.Integer, db.ForeignKey("d_user.id"), nullable=False, index=True
     )
     created_at = db.Column(db.DateTime, nullable=False)
-    last_seen_at = db.Column(db.DateTime, nullable=False)
+    last_seen_at = db.Column(db.DateTime, nullable=False, index=True)
 
     user = db.relationship("User")
 
+    # d_session may be range partitioned by month on last_seen_at, with
+    # partitions named d_session_pYYYYMM, so that expired sessions can be
+    # dropped a partition at a time. The migration that partitions the table
+    # has to include last_seen_at in the primary key and in the unique index
+    # on uuid, as Postgres requires for partitioned tables.
+
     def is_valid(self):
         # If 'SESSION_MAX_AGE' is 0, don't invalidate session
         if current_app.config["SESSION_MAX_AGE"] <= 0:
             return True
 
-        session_age = datetime.datetime.now() - self.last_seen_at
+        session_age = datetime.datetime.now() - self.get_last_seen_at()
         session_age = session_age.total_seconds()
         return session_age < current_app.config["SESSION_MAX_AGE"]
 
+    def get_last_seen_at(self):
+        # 'last_seen_at' is written behind by the session tracker, so a more
+        # recent value may still be buffered.
+        last_seen_at = session_tracker.get_last_seen_at(self.id)
+        if last_seen_at and last_seen_at > self.last_seen_at:
+            return last_seen_at
+        return self.last_seen_at
+
     def refresh(self):
-        self.last_seen_at = datetime.datetime.now()
+        session_tracker.touch(self.id)
 
 
 MODULE_TYPE_CUSTOMER = "C"
@@ -238,6 +266,17 @@ class Org(db.Model):
     created_by_user = db.relationship("User", foreign_keys=[created_by_user_id])
     updated_by_user = db.relationship("User", foreign_keys=[updated_by_user_id])
 
+    __table_args__ = (
+        db.Index("ix_d_org_name_id", "name", "id"),
+        # For campaign search (see Campaign).
+        db.Index(
+            "ix_d_org_name_trgm",
+            "name",
+            postgresql_using="gin",
+            postgresql_ops={"name": "gin_trgm_ops"},
+        ),
+    )
+
 
 ORG_USER_STATUS_ACTIVE = "A"
 ORG_USER_STATUS_INACTIVE = "I"
@@ -418,12 +457,23 @@ RECORDING_INSTRUCTION_TYPE_QUESTIONS = [
 ]
 
 
+AUDIO_STATUS_PENDING = "P"
+AUDIO_STATUS_READY = "R"
+AUDIO_STATUS_INVALID = "I"
+
+
 class RecordingInstruction(db.Model):
     __tablename__ = "d_recording_instruction"
     id = db.Column(db.Integer, nullable=False, primary_key=True)
     name = db.Column(db.String(100), nullable=False)
     instruction_type = db.Column(db.String(3), nullable=False)
     audio_file_path = db.Column(db.String(200), nullable=False)
+    # Set by the audio ingest job (see jobs.audio).
+    audio_status = db.Column(db.String(1), nullable=True)
+    audio_duration_ms = db.Column(db.Integer, nullable=True)
+    audio_sample_rate = db.Column(db.Integer, nullable=True)
+    audio_channels = db.Column(db.SmallInteger, nullable=True)
+    audio_loudness_db = db.Column(db.Float, nullable=True)
     created_at = db.Column(db.DateTime, nullable=False)
     created_by_user_id = db.Column(
         db.Integer, db.ForeignKey("d_user.id"), nullable=False
@@ -487,7 +537,15 @@ class FlowTemplate(db.Model):
     flow_category_id = db.Column(
         db.Integer, db.ForeignKey("d_flow_category.id"), nullable=False
     )
-    flow_spec = db.Column(postgresql.JSONB, nullable=False)
+    # Template level settings. Flows and steps are stored in
+    # d_flow_template_flow and d_flow_template_step; templates that haven't
+    # been migrated still hold them under "flows". Loaded on first access,
+    # templates are usually served from the parsed template cache (see
+    # dao.flow_template.get_template).
+    flow_spec = db.deferred(db.Column(postgresql.JSONB, nullable=False))
+    # The template compiled when the flow template is published (see
+    # models.compiled_template), kept up to date while it's published.
+    compiled_spec = db.deferred(db.Column(db.LargeBinary, nullable=True))
     status = db.Column(db.String(1), nullable=False)
     created_at = db.Column(db.DateTime, nullable=False)
     created_by_user_id = db.Column(
@@ -497,11 +555,90 @@ class FlowTemplate(db.Model):
     updated_by_user_id = db.Column(
         db.Integer, db.ForeignKey("d_user.id"), nullable=False
     )
+    # Incremented on every update of the flow template row, which every
+    # change to its flows and steps makes through the audit fields.
+    version = db.Column(db.Integer, nullable=False, server_default="1")
+    # Incremented when the audio metadata of a message is stored, which changes
+    # the resolved content of the flow template without changing the template.
+    content_version = db.Column(db.Integer, nullable=False, server_default="0")
+    # The snapshot of the template taken when it was last published or saved
+    # while published.
+    published_version_id = db.Column(
+        db.Integer, db.ForeignKey("d_flow_template_version.id"), nullable=True
+    )
 
     flow_category = db.relationship("FlowCategory")
+    published_version = db.relationship("FlowTemplateVersion")
     created_by_user = db.relationship("User", foreign_keys=[created_by_user_id])
     updated_by_user = db.relationship("User", foreign_keys=[updated_by_user_id])
 
+    __mapper_args__ = {"version_id_col": version}
+
+
+class FlowTemplateVersion(db.Model):
+    # Immutable snapshots of templates, with flows and steps, keyed by the
+    # SHA-256 of their canonical JSON so that identical templates are stored
+    # once.
+    __tablename__ = "d_flow_template_version"
+    id = db.Column(db.Integer, nullable=False, primary_key=True)
+    spec_hash = db.Column(db.String(64), nullable=False, unique=True)
+    spec = db.deferred(db.Column(postgresql.JSONB, nullable=False))
+    created_at = db.Column(db.DateTime, nullable=False)
+
+
+class FlowTemplateFlow(db.Model):
+    __tablename__ = "d_flow_template_flow"
+    id = db.Column(db.Integer, nullable=False, primary_key=True)
+    flow_template_id = db.Column(
+        db.Integer, db.ForeignKey("d_flow_template.id"), nullable=False
+    )
+    flow_id = db.Column(db.String(22), nullable=False)
+    sequence = db.Column(db.Integer, nullable=False)
+    # The flow's JSON without its steps.
+    spec = db.Column(postgresql.JSONB, nullable=False)
+
+    steps = db.relationship(
+        "FlowTemplateStep",
+        order_by="FlowTemplateStep.sequence",
+        viewonly=True,
+    )
+
+    __table_args__ = (
+        db.UniqueConstraint(
+            "flow_template_id",
+            "flow_id",
+            name="uc_d_flow_template_flow_flow_template_flow",
+        ),
+    )
+
+
+class FlowTemplateStep(db.Model):
+    __tablename__ = "d_flow_template_step"
+    id = db.Column(db.Integer, nullable=False, primary_key=True)
+    flow_template_id = db.Column(db.Integer, nullable=False)
+    flow_id = db.Column(db.String(22), nullable=False)
+    step_id = db.Column(db.String(22), nullable=False)
+    sequence = db.Column(db.Integer, nullable=False)
+    spec = db.Column(postgresql.JSONB, nullable=False)
+
+    __table_args__ = (
+        db.ForeignKeyConstraint(
+            ["flow_template_id", "flow_id"],
+            ["d_flow_template_flow.flow_template_id", "d_flow_template_flow.flow_id"],
+        ),
+        db.UniqueConstraint(
+            "flow_template_id",
+            "step_id",
+            name="uc_d_flow_template_step_flow_template_step",
+        ),
+        db.Index(
+            "ix_d_flow_template_step_flow_template_flow_sequence",
+            "flow_template_id",
+            "flow_id",
+            "sequence",
+        ),
+    )
+
 
 FIELD_TYPE_TEXT = "TE"
 FIELD_TYPE_INTEGER = "IN"
@@ -644,6 +781,12 @@ class FlowTemplateMessage(db.Model):
     message_type = db.Column(db.String(2), nullable=False)
     message_text = db.Column(db.Text, nullable=True)
     audio_file_path = db.Column(db.String(200), nullable=True)
+    # Set by the audio ingest job (see jobs.audio).
+    audio_status = db.Column(db.String(1), nullable=True)
+    audio_duration_ms = db.Column(db.Integer, nullable=True)
+    audio_sample_rate = db.Column(db.Integer, nullable=True)
+    audio_channels = db.Column(db.SmallInteger, nullable=True)
+    audio_loudness_db = db.Column(db.Float, nullable=True)
     attribute = db.Column(db.String(100), nullable=True)
     recording_instruction_id = db.Column(
         db.Integer,
@@ -1181,6 +1324,16 @@ class Campaign(db.Model):
     flow_template_id = db.Column(
         db.Integer, db.ForeignKey("d_flow_template.id"), nullable=False, index=True
     )
+    # The published version of the flow template the campaign runs. Unpinned
+    # campaigns run the current template. Started campaigns are pinned when a
+    # flow template with a published version is saved, and any campaign by
+    # the version-flow-templates command.
+    flow_template_version_id = db.Column(
+        db.Integer,
+        db.ForeignKey("d_flow_template_version.id"),
+        nullable=True,
+        index=True,
+    )
     country_id = db.Column(
         db.Integer, db.ForeignKey("d_country.id"), nullable=False, index=True
     )
@@ -1208,6 +1361,7 @@ class Campaign(db.Model):
 
     org = db.relationship("Org")
     flow_template = db.relationship("FlowTemplate")
+    flow_template_version = db.relationship("FlowTemplateVersion")
     country = db.relationship("Country")
     timezone = db.relationship("Timezone")
     language = db.relationship("Language")
@@ -1215,6 +1369,21 @@ class Campaign(db.Model):
     created_by_user = db.relationship("User", foreign_keys=[created_by_user_id])
     updated_by_user = db.relationship("User", foreign_keys=[updated_by_user_id])
 
+    # Campaigns are searched by their name and the names of their owner and
+    # org with the trigram indexes of pg_trgm, which can serve both similarity
+    # (%) and ILIKE matches. The migration that adds them has to create the
+    # pg_trgm extension first. Campaigns are listed by name and id.
+    __table_args__ = (
+        db.Index(
+            "ix_d_campaign_name_trgm",
+            "name",
+            postgresql_using="gin",
+            postgresql_ops={"name": "gin_trgm_ops"},
+        ),
+        db.Index("ix_d_campaign_name_id", "name", "id"),
+        db.Index("ix_d_campaign_org_name_id", "org_id", "name", "id"),
+    )
+
 
 class CampaignField(db.Model):
     __tablename__ = "d_campaign_field"
@@ -56,7 +56,24 @@ class FlowTemplateSchema(Schema):
         },
     )
     flow_category = fields.Nested(FlowCategorySchema, data_key="flowCategory")
-    status = fields.String()
+    status = fields.String(
+        required=True,
+        validate=OneOf(
+            [
+                constants.FLOW_TEMPLATE_STATUS_DRAFT,
+                constants.FLOW_TEMPLATE_STATUS_PUBLISHED,
+                constants.FLOW_TEMPLATE_STATUS_ARCHIVED,
+            ],
+            error="Status must be one of - {choices}.",
+        ),
+        error_messages={
+            "required": "Status is required",
+            "null": "Status is required",
+            "invalid": "Status must be a string",
+        },
+    )
+    version = fields.Integer(dump_only=True)
+    published_version_id = fields.Integer(data_key="publishedVersionId", dump_only=True)
 
 
 flow_template_schema = FlowTemplateSchema(
@@ -68,6 +85,8 @@ flow_template_schema = FlowTemplateSchema(
         "flow_category.id",
         "flow_category.name",
         "status",
+        "version",
+        "published_version_id",
     ),
 )
 
@@ -75,6 +94,12 @@ create_flow_template_schema = FlowTemplateSchema(
     only=("name", "version_identifier", "description", "flow_category_id"),
 )
 
+clone_flow_template_schema = FlowTemplateSchema(
+    only=("name", "version_identifier", "description"),
+)
+
+set_flow_template_status_schema = FlowTemplateSchema(only=("status",))
+
 
 class FlowTemplateSettings(Schema):
     start_flow_id = fields.String(
@@ -744,6 +769,66 @@ event_schema = EventSchema(only=("id", "name", "next_step_id"))
 update_event_schema = EventSchema(only=("next_step_id",))
 
 
+class StepOperationSchema(Schema):
+    action = fields.String(
+        required=True,
+        validate=OneOf(
+            [
+                flow_template_constants.STEP_OPERATION_CREATE,
+                flow_template_constants.STEP_OPERATION_UPDATE,
+                flow_template_constants.STEP_OPERATION_DELETE,
+            ],
+            error="Action must be one of - {choices}.",
+        ),
+        error_messages={
+            "required": "Action is required",
+            "null": "Action is required",
+            "invalid": "Action must be a string",
+        },
+    )
+    step_type = fields.String(
+        data_key="stepType",
+        error_messages={"invalid": "Step Type must be a string"},
+    )
+    temp_id = fields.String(
+        data_key="tempId",
+        validate=[Length(min=1, max=100)],
+        error_messages={"invalid": "Temp Id must be a string"},
+    )
+    step_id = fields.String(
+        data_key="stepId",
+        error_messages={"invalid": "Step Id must be a string"},
+    )
+    event_id = fields.String(
+        data_key="eventId",
+        error_messages={"invalid": "Event Id must be a string"},
+    )
+    data = fields.Dict(
+        load_default=dict,
+        error_messages={"invalid": "Data must be an object"},
+    )
+
+
+class StepOperationsSchema(Schema):
+    operations = fields.List(
+        fields.Nested(StepOperationSchema),
+        required=True,
+        validate=[
+            Length(
+                min=1, max=500, error="Operations must be between {min} and {max}"
+            ),
+        ],
+        error_messages={
+            "required": "Operations are required",
+            "null": "Operations are required",
+            "invalid": "Operations must be a list",
+        },
+    )
+
+
+step_operations_schema = StepOperationsSchema()
+
+
 class FlowTemplateFieldSchema(Schema):
     id = fields.String()
     field_id = fields.Integer(
@@ -922,6 +1007,23 @@ class FlowTemplateMessageSchema(Schema):
     )
     message_text = fields.String(data_key="messageText", required=True, allow_none=True)
     audio_file_url = fields.String(data_key="audioFileUrl")
+    # The key of an audio file uploaded with a presigned POST.
+    audio_file_key = fields.String(data_key="audioFileKey", allow_none=True)
+    # Set by the audio ingest job.
+    audio_status = fields.String(data_key="audioStatus", dump_only=True)
+    audio_duration_ms = fields.Integer(data_key="audioDurationMs", dump_only=True)
+    audio_sample_rate = fields.Integer(data_key="audioSampleRate", dump_only=True)
+    audio_channels = fields.Integer(data_key="audioChannels", dump_only=True)
+    audio_loudness_db = fields.Float(data_key="audioLoudnessDb", dump_only=True)
+    file_name = fields.String(
+        data_key="fileName",
+        required=True,
+        error_messages={
+            "required": "File Name is required",
+            "null": "File Name is required",
+            "invalid": "File Name must be a string",
+        },
+    )
     attribute = fields.String(data_key="attribute", required=True, allow_none=True)
     recording_instruction_id = fields.Integer(
         data_key="recordingInstructionId",
@@ -952,6 +1054,11 @@ flow_template_message_schema = FlowTemplateMessageSchema(
         "message_text",
         "attribute",
         "audio_file_url",
+        "audio_status",
+        "audio_duration_ms",
+        "audio_sample_rate",
+        "audio_channels",
+        "audio_loudness_db",
         "sequence",
     )
 )
@@ -967,5 +1074,10 @@ create_flow_template_message_schema = FlowTemplateMessageSchema(
         "attribute",
         "recording_instruction_id",
         "sequence",
+        "audio_file_key",
     )
 )
+
+message_audio_upload_schema = FlowTemplateMessageSchema(
+    only=("org_id", "file_name"),
+)
@@ -43,6 +43,23 @@ class RecordingInstructionSchema(Schema):
         ),
     )
     audio_file_url = fields.String(data_key="audioFileUrl")
+    # The key of an audio file uploaded with a presigned POST.
+    audio_file_key = fields.String(data_key="audioFileKey", allow_none=True)
+    # Set by the audio ingest job.
+    audio_status = fields.String(data_key="audioStatus", dump_only=True)
+    audio_duration_ms = fields.Integer(data_key="audioDurationMs", dump_only=True)
+    audio_sample_rate = fields.Integer(data_key="audioSampleRate", dump_only=True)
+    audio_channels = fields.Integer(data_key="audioChannels", dump_only=True)
+    audio_loudness_db = fields.Float(data_key="audioLoudnessDb", dump_only=True)
+    file_name = fields.String(
+        data_key="fileName",
+        required=True,
+        error_messages={
+            "required": "File Name is required",
+            "null": "File Name is required",
+            "invalid": "File Name must be a string",
+        },
+    )
 
 
 recording_instruction_schema = RecordingInstructionSchema(
@@ -51,6 +68,11 @@ recording_instruction_schema = RecordingInstructionSchema(
         "name",
         "instruction_type",
         "audio_file_url",
+        "audio_status",
+        "audio_duration_ms",
+        "audio_sample_rate",
+        "audio_channels",
+        "audio_loudness_db",
     )
 )
 
@@ -59,5 +81,13 @@ create_recording_instruction_schema = RecordingInstructionSchema(
     only=(
         "name",
         "instruction_type",
+        "audio_file_key",
+    )
+)
+
+audio_upload_schema = RecordingInstructionSchema(
+    only=(
+        "instruction_type",
+        "file_name",
     )
 )
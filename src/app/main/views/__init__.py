@@ -12,6 +12,7 @@ from . import (  # noqa: F401
     recording_instruction,
     role,
     sender_id,
+    session_token,
     sms_provider,
     subscription,
     telephony_provider,
@@ -10,6 +10,10 @@ from ..api import campaign as campaign_api
 @login_required
 @sys_admin_required()
 def search_campaigns():
-    org_id = request.args.get("orgId")
+    org_id = request.args.get("orgId", type=int)
     query = request.args.get("query")
-    return campaign_api.search_campaigns(org_id, query, g.current_user)
+    cursor = request.args.get("cursor")
+    page_size = request.args.get("pageSize", type=int)
+    return campaign_api.search_campaigns(
+        org_id, query, cursor, page_size, g.current_user
+    )
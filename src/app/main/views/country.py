@@ -11,7 +11,9 @@ from ..api import country as country_api
 @login_required
 @sys_admin_required()
 def get_all_countries():
-    return country_api.get_all_countries()
+    cursor = request.args.get("cursor")
+    page_size = request.args.get("pageSize", type=int)
+    return country_api.get_all_countries(cursor, page_size)
 
 
 @main.route("/v1/countries/<int:country_id>/", methods=["GET"])
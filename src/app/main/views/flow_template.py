@@ -3,10 +3,18 @@ import json
 from flask import abort, g, request
 from flask_login import login_required
 
+from ...decorators.conditional_request import conditional_request
 from ...decorators.permission import sys_admin_required
 from ...decorators.transaction import transaction
 from .. import main
 from ..api import flow_template as flow_template_api
+from ..dao.flow_template import TemplateAnalysisError
+
+
+@main.errorhandler(TemplateAnalysisError)
+def invalid_published_template(e):
+    # transaction() has rolled back the change by the time this is called.
+    return flow_template_api.invalid_published_template(e.analysis)
 
 
 @main.route("/v1/fields/", methods=["GET"])
@@ -20,7 +28,25 @@ def get_fields():
 @login_required
 @sys_admin_required()
 def get_all_flow_templates():
-    return flow_template_api.get_all_flow_templates()
+    cursor = request.args.get("cursor")
+    page_size = request.args.get("pageSize", type=int)
+    return flow_template_api.get_all_flow_templates(cursor, page_size)
+
+
+@main.route("/v1/flow-templates/template-cache/", methods=["GET"])
+@login_required
+@sys_admin_required()
+def get_template_cache_stats():
+    # Statistics of the worker process that serves the request.
+    return flow_template_api.get_template_cache_stats()
+
+
+@main.route("/v1/flow-template-versions/<int:version_id>/", methods=["GET"])
+@login_required
+@sys_admin_required()
+@conditional_request(flow_template_api.get_template_version_hash)
+def get_template_version(version_id):
+    return flow_template_api.get_template_version(version_id, g.current_user)
 
 
 @main.route("/v1/flow-templates/<int:flow_template_id>/", methods=["GET"])
@@ -38,6 +64,37 @@ def create_flow_template():
     return flow_template_api.create_flow_template(request.json, g.current_user)
 
 
+@main.route("/v1/flow-templates/<int:flow_template_id>/clone/", methods=["POST"])
+@login_required
+@sys_admin_required()
+@transaction()
+def clone_flow_template(flow_template_id):
+    return flow_template_api.clone_flow_template(
+        flow_template_id, request.json, g.current_user
+    )
+
+
+@main.route("/v1/flow-templates/<int:flow_template_id>/status/", methods=["PUT"])
+@login_required
+@sys_admin_required()
+@transaction()
+@conditional_request(flow_template_api.get_flow_template_version)
+def set_flow_template_status(flow_template_id):
+    return flow_template_api.set_flow_template_status(
+        flow_template_id, request.json, g.current_user
+    )
+
+
+@main.route("/v1/flow-templates/<int:flow_template_id>/analysis/", methods=["GET"])
+@login_required
+@sys_admin_required()
+@conditional_request(flow_template_api.get_flow_template_version)
+def get_flow_template_analysis(flow_template_id):
+    return flow_template_api.get_flow_template_analysis(
+        flow_template_id, g.current_user
+    )
+
+
 @main.route("/v1/flow-templates/<int:flow_template_id>/fields/", methods=["GET"])
 @login_required
 @sys_admin_required()
@@ -173,6 +230,28 @@ def get_flow_template_messages(flow_template_id):
     )
 
 
+@main.route("/v1/flow-templates/<int:flow_template_id>/content/", methods=["GET"])
+@login_required
+@sys_admin_required()
+def get_flow_template_content(flow_template_id):
+    org_id = request.args.get("orgId", type=int)
+    return flow_template_api.get_flow_template_content(
+        flow_template_id, org_id, g.current_user
+    )
+
+
+@main.route(
+    "/v1/flow-templates/<int:flow_template_id>/messages/audio-uploads/",
+    methods=["POST"],
+)
+@login_required
+@sys_admin_required()
+def create_flow_template_message_audio_upload(flow_template_id):
+    return flow_template_api.create_flow_template_message_audio_upload(
+        flow_template_id, request.json, g.current_user
+    )
+
+
 @main.route("/v1/flow-templates/<int:flow_template_id>/messages/", methods=["POST"])
 @login_required
 @sys_admin_required()
@@ -180,6 +259,13 @@ def get_flow_template_messages(flow_template_id):
 def create_flow_template_message(flow_template_id):
     message_data = None
 
+    # Audio files uploaded with a presigned POST are referred to by key in a
+    # JSON body, other audio files are sent with the form.
+    if request.is_json:
+        return flow_template_api.create_flow_template_message(
+            flow_template_id, request.json, None, g.current_user
+        )
+
     try:
         message_data_str = request.form.get("messageData")
         message_data = json.loads(message_data_str)
@@ -254,7 +340,7 @@ def update_flow_template_email_template(flow_template_id, email_template_id):
 @transaction()
 def delete_flow_template_email_template(flow_template_id, email_template_id):
     return flow_template_api.delete_flow_template_email_template(
-        flow_template_id, email_template_id
+        flow_template_id, email_template_id, g.current_user
     )
 
 
@@ -314,13 +400,14 @@ def update_flow_template_sms_template(flow_template_id, sms_template_id):
 @transaction()
 def delete_flow_template_sms_template(flow_template_id, sms_template_id):
     return flow_template_api.delete_flow_template_sms_template(
-        flow_template_id, sms_template_id
+        flow_template_id, sms_template_id, g.current_user
     )
 
 
 @main.route("/v1/flow-templates/<int:flow_template_id>/flows/", methods=["GET"])
 @login_required
 @sys_admin_required()
+@conditional_request(flow_template_api.get_flow_template_version)
 def get_flow_template_flows(flow_template_id):
     return flow_template_api.get_flow_template_flows(flow_template_id, g.current_user)
 
@@ -330,6 +417,7 @@ def get_flow_template_flows(flow_template_id):
 )
 @login_required
 @sys_admin_required()
+@conditional_request(flow_template_api.get_flow_template_version)
 def get_flow_template_flow_details(flow_template_id, flow_id):
     return flow_template_api.get_flow_template_flow_details(
         flow_template_id, flow_id, g.current_user
@@ -346,6 +434,7 @@ def get_flow_template_pages(flow_template_id):
 @main.route("/v1/flow-templates/<int:flow_template_id>/settings/", methods=["GET"])
 @login_required
 @sys_admin_required()
+@conditional_request(flow_template_api.get_flow_template_version)
 def get_flow_template_settings(flow_template_id):
     return flow_template_api.get_flow_template_settings(
         flow_template_id, g.current_user
@@ -356,6 +445,7 @@ def get_flow_template_settings(flow_template_id):
 @login_required
 @sys_admin_required()
 @transaction()
+@conditional_request(flow_template_api.get_flow_template_version)
 def upload_flow_template_settings(flow_template_id):
     return flow_template_api.update_flow_template_settings(
         flow_template_id, request.json, g.current_user
@@ -366,6 +456,7 @@ def upload_flow_template_settings(flow_template_id):
 @login_required
 @sys_admin_required()
 @transaction()
+@conditional_request(flow_template_api.get_flow_template_version)
 def create_flow_template_flow(flow_template_id):
     return flow_template_api.create_flow_template_flow(
         flow_template_id, request.json, g.current_user
@@ -377,6 +468,7 @@ def create_flow_template_flow(flow_template_id):
 )
 @login_required
 @sys_admin_required()
+@conditional_request(flow_template_api.get_flow_template_version)
 def get_flow_template_steps(flow_template_id, flow_id):
     return flow_template_api.get_flow_template_steps(
         flow_template_id, flow_id, g.current_user
@@ -390,6 +482,7 @@ def get_flow_template_steps(flow_template_id, flow_id):
 @login_required
 @sys_admin_required()
 @transaction()
+@conditional_request(flow_template_api.get_flow_template_version)
 def create_send_email_step(flow_template_id, flow_id):
     return flow_template_api.create_send_email_step(
         flow_template_id, flow_id, request.json, g.current_user
@@ -404,6 +497,7 @@ def create_send_email_step(flow_template_id, flow_id):
 @login_required
 @sys_admin_required()
 @transaction()
+@conditional_request(flow_template_api.get_flow_template_version)
 def update_send_email_step(flow_template_id, flow_id, step_id):
     return flow_template_api.update_send_email_step(
         flow_template_id, flow_id, step_id, request.json, g.current_user
@@ -417,6 +511,7 @@ def update_send_email_step(flow_template_id, flow_id, step_id):
 @login_required
 @sys_admin_required()
 @transaction()
+@conditional_request(flow_template_api.get_flow_template_version)
 def create_send_sms_step(flow_template_id, flow_id):
     return flow_template_api.create_send_sms_step(
         flow_template_id, flow_id, request.json, g.current_user
@@ -431,6 +526,7 @@ def create_send_sms_step(flow_template_id, flow_id):
 @login_required
 @sys_admin_required()
 @transaction()
+@conditional_request(flow_template_api.get_flow_template_version)
 def update_send_sms_step(flow_template_id, flow_id, step_id):
     return flow_template_api.update_send_sms_step(
         flow_template_id, flow_id, step_id, request.json, g.current_user
@@ -444,6 +540,7 @@ def update_send_sms_step(flow_template_id, flow_id, step_id):
 @login_required
 @sys_admin_required()
 @transaction()
+@conditional_request(flow_template_api.get_flow_template_version)
 def create_delay_step(flow_template_id, flow_id):
     return flow_template_api.create_delay_step(
         flow_template_id, flow_id, request.json, g.current_user
@@ -457,6 +554,7 @@ def create_delay_step(flow_template_id, flow_id):
 @login_required
 @sys_admin_required()
 @transaction()
+@conditional_request(flow_template_api.get_flow_template_version)
 def update_delay_step(flow_template_id, flow_id, step_id):
     return flow_template_api.update_delay_step(
         flow_template_id, flow_id, step_id, request.json, g.current_user
@@ -470,6 +568,7 @@ def update_delay_step(flow_template_id, flow_id, step_id):
 @login_required
 @sys_admin_required()
 @transaction()
+@conditional_request(flow_template_api.get_flow_template_version)
 def create_questions_step(flow_template_id, flow_id):
     return flow_template_api.create_questions_step(
         flow_template_id, flow_id, request.json, g.current_user
@@ -484,6 +583,7 @@ def create_questions_step(flow_template_id, flow_id):
 @login_required
 @sys_admin_required()
 @transaction()
+@conditional_request(flow_template_api.get_flow_template_version)
 def update_questions_step(flow_template_id, flow_id, step_id):
     return flow_template_api.update_questions_step(
         flow_template_id, flow_id, step_id, request.json, g.current_user
@@ -497,6 +597,7 @@ def update_questions_step(flow_template_id, flow_id, step_id):
 @login_required
 @sys_admin_required()
 @transaction()
+@conditional_request(flow_template_api.get_flow_template_version)
 def create_play_message_step(flow_template_id, flow_id):
     return flow_template_api.create_play_message_step(
         flow_template_id, flow_id, request.json, g.current_user
@@ -511,6 +612,7 @@ def create_play_message_step(flow_template_id, flow_id):
 @login_required
 @sys_admin_required()
 @transaction()
+@conditional_request(flow_template_api.get_flow_template_version)
 def update_play_message_step(flow_template_id, flow_id, step_id):
     return flow_template_api.update_play_message_step(
         flow_template_id, flow_id, step_id, request.json, g.current_user
@@ -524,6 +626,7 @@ def update_play_message_step(flow_template_id, flow_id, step_id):
 @login_required
 @sys_admin_required()
 @transaction()
+@conditional_request(flow_template_api.get_flow_template_version)
 def create_get_input_step(flow_template_id, flow_id):
     return flow_template_api.create_get_input_step(
         flow_template_id, flow_id, request.json, g.current_user
@@ -538,6 +641,7 @@ def create_get_input_step(flow_template_id, flow_id):
 @login_required
 @sys_admin_required()
 @transaction()
+@conditional_request(flow_template_api.get_flow_template_version)
 def update_get_input_step(flow_template_id, flow_id, step_id):
     return flow_template_api.update_get_input_step(
         flow_template_id, flow_id, step_id, request.json, g.current_user
@@ -551,6 +655,7 @@ def update_get_input_step(flow_template_id, flow_id, step_id):
 @login_required
 @sys_admin_required()
 @transaction()
+@conditional_request(flow_template_api.get_flow_template_version)
 def create_record_audio_step(flow_template_id, flow_id):
     return flow_template_api.create_record_audio_step(
         flow_template_id, flow_id, request.json, g.current_user
@@ -565,6 +670,7 @@ def create_record_audio_step(flow_template_id, flow_id):
 @login_required
 @sys_admin_required()
 @transaction()
+@conditional_request(flow_template_api.get_flow_template_version)
 def update_record_audio_step(flow_template_id, flow_id, step_id):
     return flow_template_api.update_record_audio_step(
         flow_template_id, flow_id, step_id, request.json, g.current_user
@@ -578,6 +684,7 @@ def update_record_audio_step(flow_template_id, flow_id, step_id):
 @login_required
 @sys_admin_required()
 @transaction()
+@conditional_request(flow_template_api.get_flow_template_version)
 def create_set_status_step(flow_template_id, flow_id):
     return flow_template_api.create_set_status_step(
         flow_template_id, flow_id, request.json, g.current_user
@@ -592,6 +699,7 @@ def create_set_status_step(flow_template_id, flow_id):
 @login_required
 @sys_admin_required()
 @transaction()
+@conditional_request(flow_template_api.get_flow_template_version)
 def update_set_status_step(flow_template_id, flow_id, step_id):
     return flow_template_api.update_set_status_step(
         flow_template_id, flow_id, step_id, request.json, g.current_user
@@ -605,6 +713,7 @@ def update_set_status_step(flow_template_id, flow_id, step_id):
 @login_required
 @sys_admin_required()
 @transaction()
+@conditional_request(flow_template_api.get_flow_template_version)
 def create_call_step(flow_template_id, flow_id):
     return flow_template_api.create_call_step(
         flow_template_id, flow_id, request.json, g.current_user
@@ -619,6 +728,7 @@ def create_call_step(flow_template_id, flow_id):
 @login_required
 @sys_admin_required()
 @transaction()
+@conditional_request(flow_template_api.get_flow_template_version)
 def update_call_step(flow_template_id, flow_id, step_id):
     return flow_template_api.update_call_step(
         flow_template_id, flow_id, step_id, request.json, g.current_user
@@ -632,6 +742,7 @@ def update_call_step(flow_template_id, flow_id, step_id):
 @login_required
 @sys_admin_required()
 @transaction()
+@conditional_request(flow_template_api.get_flow_template_version)
 def create_hang_up_step(flow_template_id, flow_id):
     return flow_template_api.create_hang_up_step(
         flow_template_id, flow_id, request.json, g.current_user
@@ -646,6 +757,7 @@ def create_hang_up_step(flow_template_id, flow_id):
 @login_required
 @sys_admin_required()
 @transaction()
+@conditional_request(flow_template_api.get_flow_template_version)
 def update_hang_up_step(flow_template_id, flow_id, step_id):
     return flow_template_api.update_hang_up_step(
         flow_template_id, flow_id, step_id, request.json, g.current_user
@@ -659,6 +771,7 @@ def update_hang_up_step(flow_template_id, flow_id, step_id):
 @login_required
 @sys_admin_required()
 @transaction()
+@conditional_request(flow_template_api.get_flow_template_version)
 def create_go_to_flow_step(flow_template_id, flow_id):
     return flow_template_api.create_go_to_flow_step(
         flow_template_id, flow_id, request.json, g.current_user
@@ -673,6 +786,7 @@ def create_go_to_flow_step(flow_template_id, flow_id):
 @login_required
 @sys_admin_required()
 @transaction()
+@conditional_request(flow_template_api.get_flow_template_version)
 def update_go_to_flow_step(flow_template_id, flow_id, step_id):
     return flow_template_api.update_go_to_flow_step(
         flow_template_id, flow_id, step_id, request.json, g.current_user
@@ -686,17 +800,47 @@ def update_go_to_flow_step(flow_template_id, flow_id, step_id):
 @login_required
 @sys_admin_required()
 @transaction()
+@conditional_request(flow_template_api.get_flow_template_version)
 def delete_step(flow_template_id, flow_id, step_id):
     return flow_template_api.delete_step(
         flow_template_id, flow_id, step_id, g.current_user
     )
 
 
+@main.route(
+    "/v1/flow-templates/<int:flow_template_id>/flows/<flow_id>/steps/<step_id>"
+    "/references/",
+    methods=["GET"],
+)
+@login_required
+@sys_admin_required()
+@conditional_request(flow_template_api.get_flow_template_version)
+def get_step_references(flow_template_id, flow_id, step_id):
+    return flow_template_api.get_step_references(
+        flow_template_id, flow_id, step_id, g.current_user
+    )
+
+
+@main.route(
+    "/v1/flow-templates/<int:flow_template_id>/flows/<flow_id>/operations/",
+    methods=["POST"],
+)
+@login_required
+@sys_admin_required()
+@transaction()
+@conditional_request(flow_template_api.get_flow_template_version)
+def apply_step_operations(flow_template_id, flow_id):
+    return flow_template_api.apply_step_operations(
+        flow_template_id, flow_id, request.json, g.current_user
+    )
+
+
 @main.route(
     "/v1/flow-templates/<int:flow_template_id>/flows/<flow_id>/events/", methods=["GET"]
 )
 @login_required
 @sys_admin_required()
+@conditional_request(flow_template_api.get_flow_template_version)
 def get_flow_template_events(flow_template_id, flow_id):
     return flow_template_api.get_flow_template_events(
         flow_template_id, flow_id, g.current_user
@@ -710,6 +854,7 @@ def get_flow_template_events(flow_template_id, flow_id):
 @login_required
 @sys_admin_required()
 @transaction()
+@conditional_request(flow_template_api.get_flow_template_version)
 def update_event(flow_template_id, flow_id, event_id):
     return flow_template_api.update_event(
         flow_template_id, flow_id, event_id, request.json, g.current_user
@@ -19,7 +19,9 @@ def create_org():
 @login_required
 @sys_admin_required()
 def get_all_orgs():
-    return org_api.get_all_orgs()
+    cursor = request.args.get("cursor")
+    page_size = request.args.get("pageSize", type=int)
+    return org_api.get_all_orgs(cursor, page_size)
 
 
 @main.route("/v1/orgs/<int:org_id>/", methods=["GET"])
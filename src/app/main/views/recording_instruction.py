@@ -16,6 +16,15 @@ def get_recording_instructions():
     return recording_instruction_api.get_recording_instructions()
 
 
+@main.route("/v1/recording-instructions/audio-uploads/", methods=["POST"])
+@login_required
+@sys_admin_required()
+def create_recording_instruction_audio_upload():
+    return recording_instruction_api.create_recording_instruction_audio_upload(
+        request.json, g.current_user
+    )
+
+
 @main.route("/v1/recording-instructions/", methods=["POST"])
 @login_required
 @sys_admin_required()
@@ -23,6 +32,13 @@ def get_recording_instructions():
 def create_recording_instruction():
     data = None
 
+    # Audio files uploaded with a presigned POST are referred to by key in a
+    # JSON body, other audio files are sent with the form.
+    if request.is_json:
+        return recording_instruction_api.create_recording_instruction(
+            request.json, None, g.current_user
+        )
+
     try:
         data_str = request.form.get("data")
         data = json.loads(data_str)
@@ -0,0 +1,17 @@
+from flask import g
+from flask_login import login_required
+
+from .. import main
+from ..api import session_token as session_token_api
+
+
+@main.route("/v1/session-tokens/", methods=["POST"])
+@login_required
+def create_session_token():
+    return session_token_api.create_session_token(g.current_session)
+
+
+@main.route("/v1/session-tokens/", methods=["DELETE"])
+@login_required
+def revoke_session_tokens():
+    return session_token_api.revoke_session_tokens(g.current_session)
@@ -31,7 +31,11 @@ def update_subscription(org_id, subscription_id):
 @login_required
 @sys_admin_required()
 def get_all_subscriptions_for_org(org_id):
-    return subscription_api.get_all_subscriptions_for_org(org_id)
+    cursor = request.args.get("cursor")
+    page_size = request.args.get("pageSize", type=int)
+    return subscription_api.get_all_subscriptions_for_org(
+        org_id, cursor, page_size
+    )
 
 
 @main.route(
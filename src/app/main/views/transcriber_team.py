@@ -57,7 +57,9 @@ def delete_transcriber(transcriber_team_id, user_id):
 @login_required
 @sys_admin_required()
 def get_transcriber_teams():
-    return transcriber_team_api.get_transcriber_teams()
+    cursor = request.args.get("cursor")
+    page_size = request.args.get("pageSize", type=int)
+    return transcriber_team_api.get_transcriber_teams(cursor, page_size)
 
 
 @main.route(
@@ -74,7 +76,9 @@ def get_transcriber_team(transcriber_team_id):
 @login_required
 @sys_admin_required()
 def get_transcriber_team_orgs():
-    return transcriber_team_api.get_transcriber_team_orgs()
+    cursor = request.args.get("cursor")
+    page_size = request.args.get("pageSize", type=int)
+    return transcriber_team_api.get_transcriber_team_orgs(cursor, page_size)
 
 
 @main.route("/v1/transcriber-team-orgs/", methods=["POST"])
@@ -34,11 +34,15 @@ def get_user(user_id):
 @login_required
 @sys_admin_required()
 def get_users():
-    return user_api.get_users()
+    cursor = request.args.get("cursor")
+    page_size = request.args.get("pageSize", type=int)
+    return user_api.get_users(cursor, page_size)
 
 
 @main.route("/v1/users/transcribers/", methods=["GET"])
 @login_required
 @sys_admin_required()
 def get_transcriber_users():
-    return user_api.get_transcriber_users()
+    cursor = request.args.get("cursor")
+    page_size = request.args.get("pageSize", type=int)
+    return user_api.get_transcriber_users(cursor, page_size)
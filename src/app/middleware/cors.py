@@ -1,5 +1,12 @@
+from ..utils.pagination import NEXT_CURSOR_HEADER
+
+
 def add_cors_headers(res):
     res.headers.add("Access-Control-Allow-Origin", "*")
-    res.headers.add("Access-Control-Allow-Headers", "Content-Type,Authorization")
+    res.headers.add(
+        "Access-Control-Allow-Headers",
+        "Content-Type,Authorization,If-Match,If-None-Match",
+    )
     res.headers.add("Access-Control-Allow-Methods", "GET,PUT,POST,DELETE")
+    res.headers.add("Access-Control-Expose-Headers", f"ETag,{NEXT_CURSOR_HEADER}")
     return res
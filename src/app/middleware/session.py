@@ -1,44 +1,148 @@
-from flask import g, request
+from flask import current_app, g, has_request_context, request
+from flask.ctx import _AppCtxGlobals
+from sqlalchemy.orm.attributes import set_committed_value
 
-from .. import login_manager
+from .. import db, login_manager
+from ..main.dao import auth_cache as auth_cache_dao
 from ..main.dao import session as session_dao
 from ..main.dao import user as user_dao
+from ..main.models.main import Session
+from ..utils import session_token
+from ..utils.db import attach
 from ..utils.response import unauthorized_error
 
 AUTH_TOKEN_LENGTH = 22
 
+AUTH_CONTEXT_ATTRIBUTES = (
+    "current_session",
+    "current_user",
+    "current_user_permissions",
+)
+
+
+class AuthContextGlobals(_AppCtxGlobals):
+    """
+    Context global object that loads the current session, user and
+    permissions the first time one of them is accessed, so that requests
+    which never check authentication don't query them.
+    """
+
+    def __getattr__(self, name):
+        if name in AUTH_CONTEXT_ATTRIBUTES:
+            load_session_and_user_and_permissions()
+            return self.__dict__[name]
+        return super().__getattr__(name)
+
 
 def load_session_and_user_and_permissions():
     """
-    Middleware to read authentication token from the request headers
-    and load the current session, user and permissions. The current session,
-    user and permissions are set in the context global object 'g' as
-    'current_session', 'current_user' and 'current_user_permissions' attributes.
+    Read authentication token from the request headers and load the current
+    session, user and permissions. The current session, user and permissions
+    are set in the context global object 'g' as 'current_session',
+    'current_user' and 'current_user_permissions' attributes.
+    The permissions are an integer mask with the bit at each Permission.id set.
+    Nothing is loaded outside of requests, for CORS preflight requests and for
+    views marked as public.
     """
     g.current_session = None
     g.current_user = None
     g.current_user_permissions = None
 
+    if not has_request_context() or is_public_request():
+        return
+
     session = load_session()
     if not session:
         return
 
-    permissions = user_dao.get_user_permission_identifiers(session.user)
+    permissions = load_permissions(session.user)
 
     g.current_session = session
     g.current_user = session.user
     g.current_user_permissions = permissions
 
 
+def is_public_request():
+    if request.method == "OPTIONS":
+        return True
+
+    view_function = current_app.view_functions.get(request.endpoint)
+    return getattr(view_function, "is_public", False)
+
+
 def load_session():
     auth_token = request.headers.get("Authorization")
-    if auth_token and len(auth_token) == AUTH_TOKEN_LENGTH:
+    if not auth_token:
+        return None
+
+    if len(auth_token) == AUTH_TOKEN_LENGTH:
+        return load_opaque_session(auth_token)
+    if session_token.is_enabled():
+        return load_signed_session(auth_token)
+    return None
+
+
+def load_opaque_session(auth_token):
+    db_session = auth_cache_dao.get_session_with_uuid(auth_token)
+    if not db_session:
         db_session = session_dao.get_session_with_uuid(auth_token)
-        if db_session and db_session.is_valid():
-            return db_session
+        if db_session:
+            auth_cache_dao.set_session(db_session)
+    if db_session and db_session.is_valid():
+        db_session.refresh()
+        return db_session
     return None
 
 
+def load_signed_session(auth_token):
+    claims = session_token.get_claims(auth_token)
+    if not claims or session_token.is_revoked(claims):
+        return None
+
+    user = load_user(claims["uid"])
+    if not user or user.permission_version != claims["pv"]:
+        return None
+
+    db_session = attach(
+        Session(
+            id=claims["sid"],
+            user_id=claims["uid"],
+            created_at=claims["iat"],
+            last_seen_at=claims["iat"],
+        )
+    )
+    set_committed_value(db_session, "user", user)
+    if not db_session.is_valid():
+        # The session may have been seen since the token was issued without
+        # the tracker still holding it, which only the row can tell.
+        db.session.expunge(db_session)
+        db_session = session_dao.get_session_with_id(claims["sid"])
+        if (
+            not db_session
+            or db_session.user_id != claims["uid"]
+            or not db_session.is_valid()
+        ):
+            return None
+
+    db_session.refresh()
+    return db_session
+
+
+def load_user(user_id):
+    user = auth_cache_dao.get_user_with_id(user_id)
+    if not user:
+        user = user_dao.get_user_with_id(user_id)
+    return user
+
+
+def load_permissions(user):
+    permission_mask = auth_cache_dao.get_user_permission_mask(user.id)
+    if permission_mask is None:
+        permission_mask = user_dao.get_user_permission_mask(user)
+        auth_cache_dao.set_user(user, permission_mask)
+    return permission_mask
+
+
 @login_manager.request_loader
 def load_user_from_request(_):
     return g.current_user
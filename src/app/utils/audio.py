@@ -0,0 +1,261 @@
+import array
+import math
+import operator
+import struct
+import subprocess
+import sys
+
+# Audio files are probed from their container headers: the fmt and data chunks
+# of wav files, and the first frame header of mp3 files with its Xing, Info or
+# VBRI header for variable bit rates. Loudness is the RMS level in dBFS of
+# 16-bit PCM wav files; mp3 files would have to be decoded.
+
+AUDIO_FORMAT_WAV = "wav"
+AUDIO_FORMAT_MP3 = "mp3"
+
+_WAVE_FORMAT_PCM = 0x0001
+_WAVE_FORMAT_EXTENSIBLE = 0xFFFE
+
+# Layer III bit rates in kbps, by MPEG version (1, or 2 and 2.5).
+_MP3_BIT_RATES = {
+    1: (None, 32, 40, 48, 56, 64, 80, 96, 112, 128, 160, 192, 224, 256, 320),
+    2: (None, 8, 16, 24, 32, 40, 48, 56, 64, 80, 96, 112, 128, 144, 160),
+}
+# Sample rates by the version bits of the frame header: MPEG 2.5, reserved,
+# MPEG 2 and MPEG 1.
+_MP3_SAMPLE_RATES = {
+    0: (11025, 12000, 8000),
+    2: (22050, 24000, 16000),
+    3: (44100, 48000, 32000),
+}
+_MP3_CHANNEL_MODE_MONO = 3
+# Bytes searched for the first frame after the ID3v2 tag.
+_MP3_SYNC_SEARCH_LENGTH = 64 * 1024
+
+
+class AudioInfo:
+    __slots__ = ("format", "duration_ms", "sample_rate", "channels", "loudness_db")
+
+    def __init__(self, format, duration_ms, sample_rate, channels, loudness_db=None):
+        self.format = format
+        self.duration_ms = duration_ms
+        self.sample_rate = sample_rate
+        self.channels = channels
+        self.loudness_db = loudness_db
+
+
+def probe(data):
+    """
+    Returns the AudioInfo of a wav or mp3 file. Raises ValueError if the file
+    isn't a valid wav or mp3 file.
+    """
+    try:
+        if data[:4] == b"RIFF" and data[8:12] == b"WAVE":
+            return _probe_wav(data)
+        return _probe_mp3(data)
+    except struct.error as e:
+        # A header runs past the end of a truncated file.
+        raise ValueError(f"Truncated audio file: {e}") from e
+
+
+def _probe_wav(data):
+    fmt = None
+    offset = 12
+    while offset + 8 <= len(data):
+        chunk_id, chunk_size = struct.unpack_from("<4sI", data, offset)
+        chunk_start = offset + 8
+        if chunk_id == b"fmt ":
+            if chunk_size < 16 or chunk_start + 16 > len(data):
+                raise ValueError("Invalid wav fmt chunk")
+            fmt = struct.unpack_from("<HHIIHH", data, chunk_start)
+        elif chunk_id == b"data":
+            if fmt is None:
+                raise ValueError("Wav data chunk before the fmt chunk")
+            # The data chunk of a truncated file or of a file written as a
+            # stream may be shorter than its size says.
+            chunk_size = min(chunk_size, len(data) - chunk_start)
+            return _get_wav_info(fmt, data, chunk_start, chunk_size)
+        offset = chunk_start + chunk_size + (chunk_size & 1)
+    raise ValueError("Missing wav fmt or data chunk")
+
+
+def _get_wav_info(fmt, data, data_start, data_size):
+    format_tag, channels, sample_rate, byte_rate, _, bits_per_sample = fmt
+    if not channels or not sample_rate or not byte_rate:
+        raise ValueError("Invalid wav format")
+
+    loudness_db = None
+    if format_tag in {_WAVE_FORMAT_PCM, _WAVE_FORMAT_EXTENSIBLE} and (
+        bits_per_sample == 16
+    ):
+        loudness_db = _get_pcm16_loudness(data, data_start, data_size)
+
+    return AudioInfo(
+        AUDIO_FORMAT_WAV,
+        data_size * 1000 // byte_rate,
+        sample_rate,
+        channels,
+        loudness_db,
+    )
+
+
+def _get_pcm16_loudness(data, start, size):
+    samples = array.array("h")
+    samples.frombytes(data[start : start + size - size % 2])
+    if not samples:
+        return None
+    if sys.byteorder == "big":
+        samples.byteswap()
+    mean_square = sum(map(operator.mul, samples, samples)) / len(samples)
+    if not mean_square:
+        return None
+    return round(10 * math.log10(mean_square / 32768**2), 2)
+
+
+def _parse_mp3_header(data, offset):
+    """
+    Returns the version bits, sample rate, bit rate, channels and length of the
+    Layer III frame at 'offset', or None if there's no valid frame header.
+    """
+    if offset + 4 > len(data):
+        return None
+    header = struct.unpack_from(">I", data, offset)[0]
+    if header >> 21 != 0x7FF:
+        return None
+    version_bits = (header >> 19) & 0x3
+    layer_bits = (header >> 17) & 0x3
+    bit_rate_index = (header >> 12) & 0xF
+    sample_rate_index = (header >> 10) & 0x3
+    padding = (header >> 9) & 0x1
+    channel_mode = (header >> 6) & 0x3
+    if (
+        version_bits not in _MP3_SAMPLE_RATES
+        or layer_bits != 1
+        or bit_rate_index in {0, 15}
+        or sample_rate_index == 3
+    ):
+        return None
+
+    bit_rate = _MP3_BIT_RATES[1 if version_bits == 3 else 2][bit_rate_index] * 1000
+    sample_rate = _MP3_SAMPLE_RATES[version_bits][sample_rate_index]
+    channels = 1 if channel_mode == _MP3_CHANNEL_MODE_MONO else 2
+    coefficient = 144 if version_bits == 3 else 72
+    frame_length = coefficient * bit_rate // sample_rate + padding
+    return version_bits, sample_rate, bit_rate, channels, frame_length
+
+
+def _find_mp3_frame(data):
+    start = 0
+    if data[:3] == b"ID3" and len(data) >= 10:
+        size = 0
+        for byte in data[6:10]:
+            size = (size << 7) | (byte & 0x7F)
+        start = 10 + size + (10 if data[5] & 0x10 else 0)
+
+    end = min(len(data), start + _MP3_SYNC_SEARCH_LENGTH)
+    for offset in range(start, end):
+        if data[offset] != 0xFF:
+            continue
+        frame = _parse_mp3_header(data, offset)
+        if frame is None:
+            continue
+        # A false sync is unlikely to be followed by another frame.
+        next_offset = offset + frame[4]
+        if next_offset + 4 <= len(data) and not _parse_mp3_header(data, next_offset):
+            continue
+        return offset, frame
+    raise ValueError("Not a wav or mp3 file")
+
+
+def _probe_mp3(data):
+    offset, frame = _find_mp3_frame(data)
+    version_bits, sample_rate, bit_rate, channels, _ = frame
+    samples_per_frame = 1152 if version_bits == 3 else 576
+
+    # The Xing or Info header follows the side information of the first frame,
+    # the VBRI header is at a fixed offset.
+    if version_bits == 3:
+        side_info_length = 17 if channels == 1 else 32
+    else:
+        side_info_length = 9 if channels == 1 else 17
+    xing_offset = offset + 4 + side_info_length
+    vbri_offset = offset + 4 + 32
+
+    frame_count = None
+    if data[xing_offset : xing_offset + 4] in {b"Xing", b"Info"}:
+        flags = struct.unpack_from(">I", data, xing_offset + 4)[0]
+        if flags & 0x1:
+            frame_count = struct.unpack_from(">I", data, xing_offset + 8)[0]
+    elif data[vbri_offset : vbri_offset + 4] == b"VBRI":
+        frame_count = struct.unpack_from(">I", data, vbri_offset + 14)[0]
+
+    if frame_count is not None:
+        duration_ms = frame_count * samples_per_frame * 1000 // sample_rate
+    else:
+        audio_size = len(data) - offset
+        if data[-128:-125] == b"TAG":
+            audio_size -= 128
+        duration_ms = audio_size * 8 * 1000 // bit_rate
+
+    return AudioInfo(AUDIO_FORMAT_MP3, duration_ms, sample_rate, channels)
+
+
+def transcode_to_mp3(data, sample_rate, bit_rate, ffmpeg_path="ffmpeg"):
+    """
+    Transcodes an audio file to a mono mp3 file with ffmpeg. Raises ValueError
+    if ffmpeg fails.
+    """
+    try:
+        result = subprocess.run(
+            [
+                ffmpeg_path,
+                "-nostdin",
+                "-loglevel",
+                "error",
+                "-i",
+                "pipe:0",
+                "-ac",
+                "1",
+                "-ar",
+                str(sample_rate),
+                "-b:a",
+                str(bit_rate),
+                "-f",
+                "mp3",
+                "pipe:1",
+            ],
+            input=data,
+            capture_output=True,
+            check=True,
+        )
+    except (OSError, subprocess.CalledProcessError) as e:
+        raise ValueError(f"Could not transcode audio: {e}") from e
+    return result.stdout
+
+
+def ingest(data, transcode_min_size=0, transcode_options=None):
+    """
+    Probes an audio file and, if it's a wav file of at least
+    'transcode_min_size' bytes (0 never transcodes), transcodes it with
+    'transcode_options' (see transcode_to_mp3). Returns the AudioInfo of the
+    file to keep and its data if it was transcoded, or None. Raises ValueError
+    if the file isn't a valid wav or mp3 file. It's independent of the app so
+    that it can run in a process pool.
+    """
+    info = probe(data)
+    if (
+        info.format != AUDIO_FORMAT_WAV
+        or not transcode_min_size
+        or len(data) < transcode_min_size
+    ):
+        return info, None
+
+    # The original file is kept if it can't be transcoded.
+    try:
+        transcoded_data = transcode_to_mp3(data, **(transcode_options or {}))
+        transcoded_info = probe(transcoded_data)
+    except ValueError:
+        return info, None
+    # The level doesn't change, and can't be measured on the mp3 file.
+    transcoded_info.loudness_db = info.loudness_db
+    return transcoded_info, transcoded_data
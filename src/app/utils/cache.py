@@ -0,0 +1,38 @@
+import json
+
+from flask import current_app
+from redis.exceptions import RedisError
+
+from .. import redis_cache
+
+# The cache is an optimisation only. If Redis is unavailable, reads behave
+# like misses and writes are dropped so that callers fall back to Postgres.
+
+
+def get_json(key):
+    try:
+        value = redis_cache.connection.get(key)
+    except RedisError:
+        current_app.logger.exception("Unable to read %s from the cache", key)
+        return None
+
+    if value is None:
+        return None
+    return json.loads(value)
+
+
+def set_json(key, value, ttl):
+    try:
+        redis_cache.connection.set(key, json.dumps(value), ex=ttl)
+    except RedisError:
+        current_app.logger.exception("Unable to write %s to the cache", key)
+
+
+def delete(*keys):
+    if not keys:
+        return
+
+    try:
+        redis_cache.connection.delete(*keys)
+    except RedisError:
+        current_app.logger.exception("Unable to delete %s from the cache", keys)
@@ -0,0 +1,57 @@
+from sqlalchemy import event
+from sqlalchemy.orm import make_transient_to_detached
+
+from .. import db
+
+_AFTER_COMMIT_CALLBACKS = "after_commit_callbacks"
+_HAS_FLUSHED = "has_flushed"
+
+
+def after_commit(callback):
+    """
+    Run 'callback' once the current transaction has been committed. The
+    callback is discarded if the transaction is rolled back.
+    """
+    db.session.info.setdefault(_AFTER_COMMIT_CALLBACKS, []).append(callback)
+
+
+def has_writes():
+    """
+    Returns whether the current transaction has written or is about to write
+    anything, in which case what it reads may not have been committed.
+    """
+    return bool(
+        db.session.info.get(_HAS_FLUSHED)
+        or db.session.new
+        or db.session.dirty
+        or db.session.deleted
+    )
+
+
+def attach(instance):
+    """
+    Adds an instance built from cached column values to the current session as
+    if it had been loaded by a query, without querying the database. Columns
+    that weren't set are loaded on first access.
+    """
+    make_transient_to_detached(instance)
+    return db.session.merge(instance, load=False)
+
+
+@event.listens_for(db.session, "after_flush")
+def _record_flush(session, flush_context):
+    session.info[_HAS_FLUSHED] = True
+
+
+@event.listens_for(db.session, "after_commit")
+def _run_after_commit_callbacks(session):
+    session.info.pop(_HAS_FLUSHED, None)
+    callbacks = session.info.pop(_AFTER_COMMIT_CALLBACKS, [])
+    for callback in callbacks:
+        callback()
+
+
+@event.listens_for(db.session, "after_rollback")
+def _discard_after_commit_callbacks(session):
+    session.info.pop(_HAS_FLUSHED, None)
+    session.info.pop(_AFTER_COMMIT_CALLBACKS, None)
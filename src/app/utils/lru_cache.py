@@ -0,0 +1,71 @@
+import threading
+from collections import OrderedDict
+
+
+class LRUCache:
+    """
+    In-process least recently used cache bounded by the total weight of its
+    values. 'weigh' returns the weight of a value, 1 by default. Values
+    heavier than 'max_weight' are never cached.
+    """
+
+    def __init__(self, max_weight, weigh=None):
+        self.max_weight = max_weight
+        self.weigh = weigh or (lambda value: 1)
+        self.weight = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[0]
+
+    def set(self, key, value):
+        weight = self.weigh(value)
+        with self._lock:
+            self._remove(key)
+            if weight > self.max_weight:
+                return
+
+            self._entries[key] = (value, weight)
+            self.weight += weight
+            while self.weight > self.max_weight:
+                oldest_key = next(iter(self._entries))
+                self._remove(oldest_key)
+                self.evictions += 1
+
+    def delete(self, key):
+        with self._lock:
+            self._remove(key)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.weight = 0
+
+    def get_stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "weight": self.weight,
+                "max_weight": self.max_weight,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_ratio": self.hits / lookups if lookups else None,
+            }
+
+    def _remove(self, key):
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self.weight -= entry[1]
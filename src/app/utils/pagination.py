@@ -0,0 +1,88 @@
+import base64
+import binascii
+
+from flask import current_app
+from sqlalchemy import tuple_
+
+from . import serialization
+
+# List endpoints return a page of items and, when there are more, the cursor
+# of the next page in the X-Next-Cursor header. Cursors are opaque to clients:
+# they hold the sort key values of the last item of a page, serialized to JSON
+# and base64 encoded, from which the next page is read with a keyset query
+# instead of an offset.
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+
+class Page:
+    __slots__ = ("items", "next_cursor")
+
+    def __init__(self, items, next_cursor=None):
+        self.items = items
+        self.next_cursor = next_cursor
+
+
+def encode_cursor(values):
+    return base64.urlsafe_b64encode(serialization.dumps(list(values))).decode()
+
+
+def decode_cursor(cursor, length):
+    """
+    Returns the list of 'length' values of a cursor. Raises ValueError if the
+    cursor is invalid.
+    """
+    try:
+        values = serialization.loads(base64.urlsafe_b64decode(cursor.encode()))
+    except (binascii.Error, serialization.JSONDecodeError) as e:
+        raise ValueError("Invalid cursor") from e
+    if not isinstance(values, list) or len(values) != length:
+        raise ValueError("Invalid cursor")
+    return values
+
+
+def get_page_size(page_size=None):
+    """
+    Returns the requested page size, DEFAULT_PAGE_SIZE if there's none, capped
+    at MAX_PAGE_SIZE.
+    """
+    config = current_app.config
+    if not page_size or page_size < 1:
+        return config["DEFAULT_PAGE_SIZE"]
+    return min(page_size, config["MAX_PAGE_SIZE"])
+
+
+def paginate(query, sort_column, id_column, cursor=None, page_size=None):
+    """
+    Returns the Page after 'cursor' of a query of model instances ordered by
+    'sort_column' and then by 'id_column', which makes the order unique.
+    'sort_column' may be None to order by 'id_column' only. Both must be non
+    nullable columns with JSON serializable values. Raises ValueError if the
+    cursor is invalid.
+    """
+    columns = (id_column,) if sort_column is None else (sort_column, id_column)
+    if cursor:
+        values = decode_cursor(cursor, len(columns))
+        for column, value in zip(columns, values):
+            if not isinstance(value, column.type.python_type):
+                raise ValueError("Invalid cursor")
+        query = query.filter(tuple_(*columns) > tuple(values))
+    query = query.order_by(*columns)
+
+    keys = [column.key for column in columns]
+    return get_page(
+        query,
+        get_page_size(page_size),
+        lambda row: [getattr(row, key) for key in keys],
+    )
+
+
+def get_page(query, limit, get_cursor_values):
+    """
+    Returns the Page of the first 'limit' rows of a query ordered by its
+    cursor values. 'get_cursor_values' returns the cursor values of a row.
+    """
+    rows = query.limit(limit + 1).all()
+    if len(rows) <= limit:
+        return Page(rows)
+    rows = rows[:limit]
+    return Page(rows, encode_cursor(get_cursor_values(rows[-1])))
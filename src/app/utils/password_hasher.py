@@ -0,0 +1,43 @@
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+from flask import current_app
+
+from .. import argon2
+
+# Passwords are hashed and checked on a thread pool, which bounds the number of
+# concurrent hashes, and with it the memory used (ARGON2_MEMORY_COST KiB per
+# hash), per worker process whatever the number of threads serving requests.
+# argon2 releases the GIL while hashing, so the hashes run in parallel. The
+# pool is created lazily so that every forked worker gets its own.
+_executor = None
+_executor_pid = None
+_executor_size = None
+
+
+def _get_executor():
+    global _executor, _executor_pid, _executor_size
+
+    size = current_app.config["PASSWORD_HASH_POOL_SIZE"]
+    pid = os.getpid()
+    if _executor is None or _executor_pid != pid or _executor_size != size:
+        if _executor is not None and _executor_pid == pid:
+            _executor.shutdown(wait=False)
+        _executor = ThreadPoolExecutor(
+            max_workers=size, thread_name_prefix="password-hasher"
+        )
+        _executor_pid = pid
+        _executor_size = size
+    return _executor
+
+
+def hash_password(password):
+    return _get_executor().submit(argon2.generate_password_hash, password).result()
+
+
+def check_password(password_hash, password):
+    return (
+        _get_executor()
+        .submit(argon2.check_password_hash, password_hash, password)
+        .result()
+    )
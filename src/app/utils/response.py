@@ -1,10 +1,39 @@
 from flask import current_app, jsonify, make_response
 
+from .pagination import NEXT_CURSOR_HEADER
+
 
 def success(data):
     return jsonify(data), 200
 
 
+def success_page(data, next_cursor):
+    """
+    Success response for a page of a list, with the cursor of the next page
+    (see utils.pagination).
+    """
+    res = jsonify(data)
+    if next_cursor:
+        res.headers[NEXT_CURSOR_HEADER] = next_cursor
+    return res, 200
+
+
+def invalid_cursor():
+    return validation_failed({"cursor": ["Invalid cursor"]})
+
+
+def immutable(body):
+    """
+    Success response for resources that never change, which clients may cache
+    for as long as they like. 'body' is the resource serialized to JSON.
+    """
+    res = current_app.response_class(body, mimetype="application/json")
+    res.cache_control.private = True
+    res.cache_control.max_age = 365 * 24 * 60 * 60
+    res.cache_control.immutable = True
+    return res
+
+
 def invalid_request(errors):
     return jsonify(errors), 400
 
@@ -27,3 +56,11 @@ def not_found():
 
 def validation_failed(errors):
     return jsonify(errors), 422
+
+
+def not_modified():
+    return "", 304
+
+
+def precondition_failed():
+    return "", 412
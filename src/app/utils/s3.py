@@ -1,6 +1,9 @@
 import boto3
+import shortuuid
 from botocore.client import Config
+from botocore.exceptions import ClientError
 from flask import current_app
+from slugify import slugify
 
 AWS_S3_SERVICE = "s3"
 AWS_S3_SIGNATURE_VERSION = "s3v4"
@@ -51,20 +54,101 @@ def upload_bytes_to_s3(key_name, data, is_private, extra_args=None):
     s3_bucket.upload_fileobj(data, key_name, extra_args)
 
 
+def download_bytes_from_s3(key_name, is_private, s3_client=None):
+    bucket_name = _get_s3_bucket_name(is_private)
+    if s3_client is None:
+        s3_client = _get_s3_client()
+    return s3_client.get_object(Bucket=bucket_name, Key=key_name)["Body"].read()
+
+
+def delete_file_from_s3(key_name, is_private):
+    bucket_name = _get_s3_bucket_name(is_private)
+    _get_s3_client().delete_object(Bucket=bucket_name, Key=key_name)
+
+
 CONTENT_TYPES = {
     "mp3": "audio/mpeg",
     "wav": "audio/wav",
 }
 
 
+AUDIO_CACHE_CONTROL = "max-age=31536000, immutable"
+
+
+def _get_audio_content_type(key_name):
+    ext = key_name.split(".")[-1].lower()
+    return CONTENT_TYPES.get(ext)
+
+
 def upload_audio_to_s3(key_name, data, is_private):
     extra_args = {}
-    ext = key_name.split(".")[-1].lower()
-    extra_args["ContentType"] = CONTENT_TYPES[ext]
-    extra_args["CacheControl"] = "max-age=31536000, immutable"
+    extra_args["ContentType"] = _get_audio_content_type(key_name)
+    extra_args["CacheControl"] = AUDIO_CACHE_CONTROL
     upload_bytes_to_s3(key_name, data, is_private, extra_args)
 
 
+def generate_audio_file_name(file_name):
+    """
+    Returns a unique S3 file name for an audio file, or None if it isn't a wav
+    or mp3 file.
+    """
+    filename_parts = file_name.split(".")
+    if len(filename_parts) != 2:
+        return None
+    file_ext = filename_parts[1].lower()
+    if file_ext not in CONTENT_TYPES:
+        return None
+    return f"{slugify(filename_parts[0])}-{shortuuid.uuid()}.{file_ext}"
+
+
+def generate_presigned_audio_upload(key_name, is_private, s3_client=None):
+    """
+    Returns the URL and the form fields of a presigned POST with which a client
+    uploads an audio file to 'key_name' directly, stored like by
+    upload_audio_to_s3.
+    """
+    bucket_name = _get_s3_bucket_name(is_private)
+    if s3_client is None:
+        s3_client = _get_s3_client()
+    fields = {
+        "Content-Type": _get_audio_content_type(key_name),
+        "Cache-Control": AUDIO_CACHE_CONTROL,
+    }
+    conditions = [
+        {"Content-Type": fields["Content-Type"]},
+        {"Cache-Control": fields["Cache-Control"]},
+        ["content-length-range", 1, current_app.config["S3_AUDIO_UPLOAD_MAX_SIZE"]],
+    ]
+    return s3_client.generate_presigned_post(
+        Bucket=bucket_name,
+        Key=key_name,
+        Fields=fields,
+        Conditions=conditions,
+        ExpiresIn=current_app.config["S3_UPLOAD_EXPIRY"],
+    )
+
+
+def is_audio_uploaded(key_name, is_private, s3_client=None):
+    """
+    Checks with a HEAD request that an audio file has been uploaded to
+    'key_name' with the content type of its extension.
+    """
+    content_type = _get_audio_content_type(key_name)
+    if content_type is None:
+        return False
+
+    bucket_name = _get_s3_bucket_name(is_private)
+    if s3_client is None:
+        s3_client = _get_s3_client()
+    try:
+        metadata = s3_client.head_object(Bucket=bucket_name, Key=key_name)
+    except ClientError as e:
+        if e.response["Error"]["Code"] in {"404", "NoSuchKey", "NotFound"}:
+            return False
+        raise
+    return metadata.get("ContentType") == content_type
+
+
 def generate_url(key_name, is_private):
     bucket_name = _get_s3_bucket_name(is_private)
     return f"https://{bucket_name}.s3.amazonaws.com/{key_name}"
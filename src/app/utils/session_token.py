@@ -0,0 +1,108 @@
+from flask import current_app
+from itsdangerous import BadSignature, URLSafeTimedSerializer
+from redis.exceptions import RedisError
+
+from .. import redis_cache
+
+# Signed session tokens carry the session id, the user id and the user's
+# permission version, and are verified from their claims without reading
+# d_session. They expire SESSION_TOKEN_MAX_AGE seconds after being issued.
+# Until then they are revoked through Redis: logging out, or a sweep deleting
+# the session, revokes the tokens of a session, and role changes revoke the
+# tokens issued with an older permission version. Revocations are kept as
+# long as a revoked token could still be accepted, so each one is a key of its
+# own expiring after SESSION_TOKEN_MAX_AGE.
+SALT = "session-token"
+
+REVOKED_SESSION_KEY = "session_token:revoked_session:{session_id}"
+REVOKED_PERMISSION_VERSION_KEY = "session_token:revoked_permission_version:{user_id}"
+
+
+def _get_serializer():
+    return URLSafeTimedSerializer(
+        current_app.config["SESSION_TOKEN_SECRET"], salt=SALT
+    )
+
+
+def is_enabled():
+    return current_app.config["SESSION_TOKEN_SIGNING_ENABLED"]
+
+
+def issue_session_token(session):
+    return _get_serializer().dumps(
+        {
+            "sid": session.id,
+            "uid": session.user_id,
+            "pv": session.user.permission_version,
+        }
+    )
+
+
+def get_claims(token):
+    """
+    Returns the claims of a signed session token, or None if the signature
+    doesn't match or the token has expired. The issue time is returned as
+    'iat'.
+    """
+    try:
+        claims, issued_at = _get_serializer().loads(
+            token,
+            max_age=current_app.config["SESSION_TOKEN_MAX_AGE"],
+            return_timestamp=True,
+        )
+    except BadSignature:
+        return None
+
+    # Session timestamps are stored as naive local times.
+    claims["iat"] = issued_at.astimezone().replace(tzinfo=None)
+    return claims
+
+
+def is_revoked(claims):
+    try:
+        with redis_cache.connection.pipeline(transaction=False) as pipeline:
+            pipeline.exists(REVOKED_SESSION_KEY.format(session_id=claims["sid"]))
+            pipeline.get(REVOKED_PERMISSION_VERSION_KEY.format(user_id=claims["uid"]))
+            is_session_revoked, revoked_version = pipeline.execute()
+    except RedisError:
+        # Tokens can't be checked against revocations, so reject them.
+        current_app.logger.exception("Unable to check session %s", claims["sid"])
+        return True
+
+    return bool(is_session_revoked) or (
+        revoked_version is not None and claims["pv"] <= int(revoked_version)
+    )
+
+
+def revoke_sessions(session_ids):
+    """
+    Revokes the signed tokens of the given sessions. Called on logout and when
+    sessions are deleted.
+    """
+    if not is_enabled() or not session_ids:
+        return
+
+    max_age = current_app.config["SESSION_TOKEN_MAX_AGE"]
+    with redis_cache.connection.pipeline(transaction=False) as pipeline:
+        for session_id in session_ids:
+            pipeline.set(REVOKED_SESSION_KEY.format(session_id=session_id), 1, max_age)
+        pipeline.execute()
+
+
+def revoke_permission_versions(permission_versions_by_user_id):
+    """
+    Revokes the signed tokens of users issued before their permission version
+    was incremented to the given one.
+    """
+    if not is_enabled() or not permission_versions_by_user_id:
+        return
+
+    max_age = current_app.config["SESSION_TOKEN_MAX_AGE"]
+    with redis_cache.connection.pipeline(transaction=False) as pipeline:
+        for user_id, version in permission_versions_by_user_id.items():
+            pipeline.set(
+                REVOKED_PERMISSION_VERSION_KEY.format(user_id=user_id),
+                version - 1,
+                max_age,
+            )
+        pipeline.execute()
@@ -0,0 +1,74 @@
+import datetime
+
+from flask import current_app
+from redis.exceptions import RedisError
+
+from .. import redis_cache
+
+# Write-behind buffer for Session.last_seen_at. Requests record the time a
+# session was last seen in a Redis hash keyed by session id, and a periodic
+# flush writes the buffered values to d_session in bulk. If the buffer is lost
+# sessions fall back to the last flushed value of last_seen_at.
+LAST_SEEN_AT_KEY = "session:last_seen_at"
+
+# Deletes a buffered value only if it hasn't changed since it was read, so
+# that a request seen during a flush is kept for the next one.
+_DISCARD_SCRIPT = """
+local discarded = 0
+for i = 1, #ARGV, 2 do
+    if redis.call('HGET', KEYS[1], ARGV[i]) == ARGV[i + 1] then
+        discarded = discarded + redis.call('HDEL', KEYS[1], ARGV[i])
+    end
+end
+return discarded
+"""
+
+
+def touch(session_id, seen_at=None):
+    seen_at = seen_at or datetime.datetime.now()
+    try:
+        redis_cache.connection.hset(LAST_SEEN_AT_KEY, session_id, seen_at.isoformat())
+    except RedisError:
+        current_app.logger.exception("Unable to record session %s", session_id)
+
+
+def get_last_seen_at(session_id):
+    try:
+        value = redis_cache.connection.hget(LAST_SEEN_AT_KEY, session_id)
+    except RedisError:
+        current_app.logger.exception("Unable to read session %s", session_id)
+        return None
+
+    if value is None:
+        return None
+    return datetime.datetime.fromisoformat(value.decode())
+
+
+def get_last_seen_at_many(session_ids):
+    if not session_ids:
+        return {}
+
+    values = redis_cache.connection.hmget(LAST_SEEN_AT_KEY, session_ids)
+    return {
+        session_id: datetime.datetime.fromisoformat(value.decode())
+        for session_id, value in zip(session_ids, values)
+        if value is not None
+    }
+
+
+def get_all_last_seen_at():
+    values = redis_cache.connection.hgetall(LAST_SEEN_AT_KEY)
+    return {
+        int(session_id): datetime.datetime.fromisoformat(value.decode())
+        for session_id, value in values.items()
+    }
+
+
+def discard(last_seen_at_by_session_id):
+    if not last_seen_at_by_session_id:
+        return 0
+
+    args = []
+    for session_id, last_seen_at in last_seen_at_by_session_id.items():
+        args.extend((session_id, last_seen_at.isoformat()))
+    return redis_cache.connection.eval(_DISCARD_SCRIPT, 1, LAST_SEEN_AT_KEY, *args)
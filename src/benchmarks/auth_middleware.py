@@ -0,0 +1,64 @@
+"""
+Counts the database queries and measures the time spent by the auth middleware
+per request, with the auth cache disabled and enabled.
+
+Run from the src directory against a configured database and Redis, with the
+auth token of an existing session:
+
+    python -m benchmarks.auth_middleware <auth token> [requests]
+"""
+import sys
+import time
+
+from sqlalchemy import event
+
+from app import create_app, db
+from app.middleware.session import load_session_and_user_and_permissions
+
+
+def run(auth_token, requests, auth_cache_ttl):
+    app = create_app(config_override={"AUTH_CACHE_TTL": auth_cache_ttl})
+    query_counts = []
+
+    with app.app_context():
+        statements = []
+
+        def count_statement(*_):
+            statements.append(1)
+
+        event.listen(db.engine, "before_cursor_execute", count_statement)
+
+        started_at = time.perf_counter()
+        for _ in range(requests):
+            statements.clear()
+            with app.test_request_context(headers={"Authorization": auth_token}):
+                load_session_and_user_and_permissions()
+                db.session.remove()
+            query_counts.append(len(statements))
+        elapsed = time.perf_counter() - started_at
+
+        event.remove(db.engine, "before_cursor_execute", count_statement)
+
+    # The first request populates the cache, so report it separately.
+    return query_counts[0], query_counts[1:], elapsed / requests
+
+
+def main():
+    if len(sys.argv) < 2:
+        sys.exit(__doc__)
+
+    auth_token = sys.argv[1]
+    requests = int(sys.argv[2]) if len(sys.argv) > 2 else 1000
+
+    for label, auth_cache_ttl in (("cache disabled", 0), ("cache enabled", 60)):
+        first, rest, per_request = run(auth_token, requests, auth_cache_ttl)
+        average = sum(rest) / len(rest) if rest else first
+        print(
+            f"{label:>15}: first request {first} queries, "
+            f"then {average:.2f} queries/request, "
+            f"{per_request * 1000:.3f} ms/request"
+        )
+
+
+if __name__ == "__main__":
+    main()
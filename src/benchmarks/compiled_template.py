@@ -0,0 +1,123 @@
+"""
+Step transition throughput of compiled templates.
+
+Walks the synthetic templates of the flow template benchmark, following
+transitions from the start event of the first flow, answering Make Decision
+steps with random keys and texts and starting over when a flow ends (or an
+answer matches no option), and reports the transitions per second of:
+
+- json: the flow spec as nested dicts, with the steps of each flow indexed by
+  id and the options of Make Decision steps scanned
+- template: the parsed Template, with Flow.get_step and Step.get_next_step_id
+- compiled: the CompiledTemplate, with get_next_step
+
+It also reports the size of the flow spec as JSON and of the compiled
+template. It doesn't need a database:
+
+    python -m benchmarks.compiled_template
+"""
+import json
+import random
+import timeit
+
+from app.main.models.compiled_template import (
+    NO_STEP,
+    CompiledTemplate,
+    compile_template,
+)
+from app.main.models.flow_template import (
+    EVENT_START,
+    GET_INPUT_PURPOSE_MAKE_DECISION,
+    STEP_GET_INPUT,
+    TRANSITION_NEXT,
+    Template,
+)
+
+from .flow_template import STEP_COUNTS, make_template_json
+
+TRANSITIONS = 100_000
+VALUES = (1, 2, "yes", "no")
+
+
+def walk_json(template_json, values):
+    flow_json = template_json["flows"][0]
+    steps_by_id = {step_json["id"]: step_json for step_json in flow_json["steps"]}
+    first_step_id = next(
+        event_json["nextStepId"]
+        for event_json in flow_json["events"]
+        if event_json["id"] == EVENT_START
+    )
+    step_json = steps_by_id[first_step_id]
+    for value in values:
+        next_step_id = step_json.get("nextStepId")
+        if (
+            step_json["type"] == STEP_GET_INPUT
+            and step_json["purpose"] == GET_INPUT_PURPOSE_MAKE_DECISION
+        ):
+            next_step_id = None
+            for option_json in step_json["options"]:
+                text = option_json.get("text")
+                if option_json["key"] == value or (text and text.lower() == value):
+                    next_step_id = option_json.get("nextStepId")
+                    break
+        step_json = steps_by_id[next_step_id or first_step_id]
+
+
+def walk_template(template, values):
+    flow = template.flows[0]
+    first_step_id = flow.get_event(EVENT_START).next_step_id
+    step = flow.get_step(first_step_id)
+    for value in values:
+        if (
+            step.type != STEP_GET_INPUT
+            or step.purpose != GET_INPUT_PURPOSE_MAKE_DECISION
+        ):
+            value = TRANSITION_NEXT
+        next_step_id = step.get_next_step_id(value)
+        step = flow.get_step(next_step_id or first_step_id)
+
+
+def walk_compiled(compiled_template, values):
+    first_step = compiled_template.get_event_step(0, EVENT_START)
+    step = first_step
+    step_options = compiled_template.step_options
+    get_next_step = compiled_template.get_next_step
+    for value in values:
+        if step_options[step] is None:
+            value = TRANSITION_NEXT
+        next_step = get_next_step(step, value)
+        step = first_step if next_step == NO_STEP else next_step
+
+
+def benchmark(step_count):
+    template_json = make_template_json(step_count)
+    template = Template(template_json=template_json)
+    data = compile_template(template)
+    compiled_template = CompiledTemplate(data)
+
+    random.seed(step_count)
+    values = [random.choice(VALUES) for _ in range(TRANSITIONS)]
+
+    results = []
+    for name, walk, target in (
+        ("json", walk_json, template_json),
+        ("template", walk_template, template),
+        ("compiled", walk_compiled, compiled_template),
+    ):
+        time = min(timeit.repeat(lambda: walk(target, values), number=1, repeat=5))
+        results.append(f"{name} {TRANSITIONS / time / 1_000_000:5.2f} M/s")
+
+    json_size = len(json.dumps(template_json).encode())
+    print(
+        f"{step_count:>6} steps: {', '.join(results)}; "
+        f"json {json_size / 1024:7.1f} KiB, compiled {len(data) / 1024:7.1f} KiB"
+    )
+
+
+def main():
+    for step_count in STEP_COUNTS:
+        benchmark(step_count)
+
+
+if __name__ == "__main__":
+    main()
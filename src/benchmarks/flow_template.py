@@ -0,0 +1,120 @@
+"""
+Parse time and memory of the flow template object model.
+
+Builds synthetic templates of 100, 1k and 10k steps, spread over flows of up
+to 100 steps with a mix of step types, and reports the time to parse each
+template from JSON, the time to serialize it back and the memory held by the
+parsed template. It doesn't need a database:
+
+    python -m benchmarks.flow_template
+"""
+import random
+import timeit
+import tracemalloc
+
+from app.main.models.flow_template import (
+    GET_INPUT_OPTIONS_TYPE_STATIC,
+    GET_INPUT_PURPOSE_MAKE_DECISION,
+    STEP_CALL,
+    STEP_DELAY,
+    STEP_GET_INPUT,
+    STEP_HANG_UP,
+    STEP_PLAY_MESSAGE,
+    STEP_SEND_SMS,
+    Template,
+)
+
+STEP_COUNTS = (100, 1_000, 10_000)
+STEPS_PER_FLOW = 100
+
+
+def _step_json(flow_index, step_index, step_count):
+    step_id = f"s{flow_index}-{step_index}"
+    next_step_id = (
+        f"s{flow_index}-{step_index + 1}" if step_index + 1 < step_count else None
+    )
+    step_type = random.choice(
+        (
+            STEP_CALL,
+            STEP_DELAY,
+            STEP_GET_INPUT,
+            STEP_PLAY_MESSAGE,
+            STEP_SEND_SMS,
+        )
+    )
+    if next_step_id is None:
+        step_type = STEP_HANG_UP
+
+    step_json = {"id": step_id, "name": f"Step {step_id}", "type": step_type}
+    if next_step_id:
+        step_json["nextStepId"] = next_step_id
+
+    if step_type == STEP_DELAY:
+        step_json["duration"] = 60
+    elif step_type == STEP_PLAY_MESSAGE:
+        step_json["messageNames"] = ["Welcome", "Goodbye"]
+    elif step_type == STEP_SEND_SMS:
+        step_json["recipient"] = "Candidate"
+        step_json["smsTemplateName"] = "Reminder"
+    elif step_type == STEP_GET_INPUT:
+        step_json["purpose"] = GET_INPUT_PURPOSE_MAKE_DECISION
+        step_json["messageNames"] = ["Question"]
+        step_json["optionsType"] = GET_INPUT_OPTIONS_TYPE_STATIC
+        step_json["options"] = [
+            {"key": key, "text": text, "nextStepId": next_step_id}
+            for key, text in ((1, "Yes"), (2, "No"))
+        ]
+    return step_json
+
+
+def make_template_json(step_count):
+    random.seed(step_count)
+    flows = []
+    for flow_index in range(0, step_count // STEPS_PER_FLOW or 1):
+        flow_step_count = min(STEPS_PER_FLOW, step_count)
+        flows.append(
+            {
+                "id": f"f{flow_index}",
+                "name": f"Flow {flow_index}",
+                "events": [
+                    {"id": "start", "name": "Start", "nextStepId": f"s{flow_index}-0"}
+                ],
+                "steps": [
+                    _step_json(flow_index, step_index, flow_step_count)
+                    for step_index in range(flow_step_count)
+                ],
+            }
+        )
+    return {"start": "f0", "inputMaxTries": 3, "flows": flows}
+
+
+def benchmark(step_count, number):
+    template_json = make_template_json(step_count)
+
+    parse_time = timeit.timeit(
+        lambda: Template(template_json=template_json), number=number
+    )
+
+    template = Template(template_json=template_json)
+    to_json_time = timeit.timeit(template.to_json, number=number)
+
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    template = Template(template_json=template_json)
+    size = tracemalloc.get_traced_memory()[0] - before
+    tracemalloc.stop()
+
+    print(
+        f"{step_count:>6} steps: parse {parse_time / number * 1000:8.2f} ms, "
+        f"to_json {to_json_time / number * 1000:8.2f} ms, "
+        f"memory {size / 1024:9.1f} KiB ({size / step_count:.0f} B/step)"
+    )
+
+
+def main():
+    for step_count in STEP_COUNTS:
+        benchmark(step_count, number=max(1, 10_000 // step_count))
+
+
+if __name__ == "__main__":
+    main()
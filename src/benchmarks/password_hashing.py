@@ -0,0 +1,59 @@
+"""
+Measures password hashes per second against the size of the password hashing
+pool, with a thread hashing each password at once as requests would, and with
+the Argon2 cost parameters from the environment (ARGON2_TIME_COST,
+ARGON2_MEMORY_COST and ARGON2_PARALLELISM) or the argon2-cffi defaults.
+
+    python -m benchmarks.password_hashing [passwords] [max pool size]
+"""
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from flask import Flask
+
+from app import argon2
+from app.utils import password_hasher
+
+
+def _hash_at_once(app, passwords):
+    def hash_password(password):
+        with app.app_context():
+            return password_hasher.hash_password(password)
+
+    with ThreadPoolExecutor(max_workers=len(passwords)) as executor:
+        list(executor.map(hash_password, passwords))
+
+
+def main():
+    passwords = int(sys.argv[1]) if len(sys.argv) > 1 else 32
+    max_pool_size = int(sys.argv[2]) if len(sys.argv) > 2 else os.cpu_count()
+
+    app = Flask(__name__)
+    for name in ("ARGON2_TIME_COST", "ARGON2_MEMORY_COST", "ARGON2_PARALLELISM"):
+        if os.getenv(name):
+            app.config[name] = int(os.getenv(name))
+    argon2.init_app(app)
+    print(
+        f"time cost {argon2.time_cost}, memory cost {argon2.memory_cost} KiB, "
+        f"parallelism {argon2.parallelism}, {passwords} passwords"
+    )
+
+    pool_size = 1
+    with app.app_context():
+        while pool_size <= max_pool_size:
+            app.config["PASSWORD_HASH_POOL_SIZE"] = pool_size
+            # Warm up the pool so thread start up isn't measured.
+            _hash_at_once(app, ["warm-up"] * pool_size * 2)
+
+            started_at = time.perf_counter()
+            _hash_at_once(app, [f"password-{i}" for i in range(passwords)])
+            elapsed = time.perf_counter() - started_at
+
+            print(f"pool size {pool_size:>3}: {passwords / elapsed:8.1f} hashes/s")
+            pool_size *= 2
+
+
+if __name__ == "__main__":
+    main()
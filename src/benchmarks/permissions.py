@@ -0,0 +1,96 @@
+"""
+Microbenchmarks of permission checks and permission resolution.
+
+The checks compare the previous set of fully qualified identifiers against the
+integer mask used by permission_required, over synthetic permissions. They
+don't need a database:
+
+    python -m benchmarks.permissions
+
+Pass the id of an existing user to also time resolving the user's permissions
+as identifiers and as a mask against the configured database:
+
+    python -m benchmarks.permissions <user id>
+"""
+import random
+import sys
+import timeit
+
+from app.decorators.permission import _has_permission
+
+PERMISSION_COUNT = 200
+USER_PERMISSION_COUNT = 40
+CHECKS = 1_000_000
+
+
+def _has_permission_identifier(permissions, permission_to_check):
+    # The check used before permissions were represented as masks.
+    if not permissions:
+        return False
+
+    if isinstance(permission_to_check, str):
+        return permission_to_check in permissions
+    elif isinstance(permission_to_check, (list, tuple, set)):
+        for permission in permission_to_check:
+            if permission in permissions:
+                return True
+    return False
+
+
+def benchmark_checks():
+    random.seed(0)
+    identifiers = [f"module{i // 10}.permission{i}" for i in range(PERMISSION_COUNT)]
+    ids = {identifier: i + 1 for i, identifier in enumerate(identifiers)}
+
+    user_identifiers = set(random.sample(identifiers, USER_PERMISSION_COUNT))
+    user_mask = 0
+    for identifier in user_identifiers:
+        user_mask |= 1 << ids[identifier]
+
+    cases = {
+        "single": [random.choice(identifiers)],
+        "any of 5": random.sample(identifiers, 5),
+    }
+    for label, required in cases.items():
+        required_mask = 0
+        for identifier in required:
+            required_mask |= 1 << ids[identifier]
+        required_identifier = required[0] if len(required) == 1 else required
+
+        identifier_time = timeit.timeit(
+            lambda: _has_permission_identifier(user_identifiers, required_identifier),
+            number=CHECKS,
+        )
+        mask_time = timeit.timeit(
+            lambda: _has_permission(user_mask, required_mask), number=CHECKS
+        )
+        print(
+            f"check {label:>8}: identifiers {identifier_time / CHECKS * 1e9:.1f} ns, "
+            f"mask {mask_time / CHECKS * 1e9:.1f} ns"
+        )
+
+
+def benchmark_resolution(user_id, number=200):
+    from app import create_app
+    from app.main.dao import user as user_dao
+
+    app = create_app()
+    with app.app_context():
+        user = user_dao.get_user_with_id(user_id)
+
+        for label, get_permissions in (
+            ("identifiers", user_dao.get_user_permission_identifiers),
+            ("mask", user_dao.get_user_permission_mask),
+        ):
+            elapsed = timeit.timeit(lambda: get_permissions(user), number=number)
+            print(f"resolve {label:>11}: {elapsed / number * 1000:.3f} ms")
+
+
+def main():
+    benchmark_checks()
+    if len(sys.argv) > 1:
+        benchmark_resolution(int(sys.argv[1]))
+
+
+if __name__ == "__main__":
+    main()
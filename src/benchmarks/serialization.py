@@ -0,0 +1,63 @@
+"""
+Serialization cost of flow templates.
+
+Serializes the synthetic templates of the flow template benchmark and reports
+the time per template of:
+
+- to_json: building the template JSON with Template.to_json
+- json: encoding it with the json module as it was for a template version,
+  once to hash it, once for the JSONB column and once for the response
+- orjson: encoding it once with utils.serialization, the bytes being reused
+  for the hash, the JSONB column and the response
+- json loads / orjson loads: decoding the template JSON, as done for every
+  JSONB value read
+
+It doesn't need a database:
+
+    python -m benchmarks.serialization
+"""
+import json
+import timeit
+
+from app.main.models.flow_template import Template
+from app.utils import serialization
+
+from .flow_template import STEP_COUNTS, make_template_json
+
+
+def encode_json(template_json):
+    json.dumps(template_json, sort_keys=True, separators=(",", ":"), ensure_ascii=False)
+    json.dumps(template_json)
+    json.dumps(template_json, sort_keys=True)
+
+
+def encode_orjson(template_json):
+    serialization.dumps(template_json, sort_keys=True)
+
+
+def benchmark(step_count):
+    template = Template(template_json=make_template_json(step_count))
+    template_json = template.to_json()
+    data = serialization.dumps(template_json)
+
+    results = []
+    for name, function in (
+        ("to_json", template.to_json),
+        ("json", lambda: encode_json(template_json)),
+        ("orjson", lambda: encode_orjson(template_json)),
+        ("json loads", lambda: json.loads(data)),
+        ("orjson loads", lambda: serialization.loads(data)),
+    ):
+        time = min(timeit.repeat(function, number=10, repeat=5)) / 10
+        results.append(f"{name} {time * 1000:7.2f} ms")
+
+    print(f"{step_count:>6} steps: {', '.join(results)}")
+
+
+def main():
+    for step_count in STEP_COUNTS:
+        benchmark(step_count)
+
+
+if __name__ == "__main__":
+    main()
@@ -44,11 +44,72 @@ SQLALCHEMY_TRACK_MODIFICATIONS = False
 REDIS_JOBS_HOST = os.getenv("REDIS_JOBS_HOST")
 REDIS_JOBS_PORT = int(os.getenv("REDIS_JOBS_PORT"))
 REDIS_JOBS_DB = int(os.getenv("REDIS_JOBS_DB"))
+REDIS_CACHE_HOST = os.getenv("REDIS_CACHE_HOST", REDIS_JOBS_HOST)
+REDIS_CACHE_PORT = int(os.getenv("REDIS_CACHE_PORT", REDIS_JOBS_PORT))
+REDIS_CACHE_DB = int(os.getenv("REDIS_CACHE_DB", REDIS_JOBS_DB))
 
 # Maximum allowed age of sessions in seconds. Set to 0 to allow sessions to
 # live forever.
 SESSION_MAX_AGE = int(os.getenv("SESSION_MAX_AGE", "0"))
 
+# Number of seconds the resolved session, user and permissions of an auth
+# token are cached in Redis. Set to 0 to disable the auth cache.
+AUTH_CACHE_TTL = int(os.getenv("AUTH_CACHE_TTL", "60"))
+
+# Accept HMAC signed session tokens, issued by POST /v1/session-tokens/ and
+# revoked by DELETE /v1/session-tokens/, in addition to 22 character opaque
+# tokens.
+SESSION_TOKEN_SIGNING_ENABLED = (
+    os.getenv("SESSION_TOKEN_SIGNING_ENABLED", "false").lower() == "true"
+)
+SESSION_TOKEN_SECRET = os.getenv("SESSION_TOKEN_SECRET")
+# Number of seconds a signed session token is accepted after being issued,
+# and revocations are kept in Redis.
+SESSION_TOKEN_MAX_AGE = int(os.getenv("SESSION_TOKEN_MAX_AGE", "86400"))
+
+# Flask-Argon2. Parameters that aren't set use the argon2-cffi defaults.
+if os.getenv("ARGON2_TIME_COST"):
+    ARGON2_TIME_COST = int(os.getenv("ARGON2_TIME_COST"))
+if os.getenv("ARGON2_MEMORY_COST"):
+    ARGON2_MEMORY_COST = int(os.getenv("ARGON2_MEMORY_COST"))  # KiB
+if os.getenv("ARGON2_PARALLELISM"):
+    ARGON2_PARALLELISM = int(os.getenv("ARGON2_PARALLELISM"))
+
+# Maximum number of passwords each worker process hashes or checks at once.
+# Each hash uses ARGON2_MEMORY_COST KiB of memory.
+PASSWORD_HASH_POOL_SIZE = int(os.getenv("PASSWORD_HASH_POOL_SIZE", "4"))
+
+# Maximum total number of steps of the parsed flow templates each worker
+# process keeps in memory.
+TEMPLATE_CACHE_MAX_STEPS = int(os.getenv("TEMPLATE_CACHE_MAX_STEPS", "50000"))
+
+# Number of flow graph analyses of flow templates each worker process keeps in
+# memory.
+TEMPLATE_ANALYSIS_CACHE_SIZE = int(os.getenv("TEMPLATE_ANALYSIS_CACHE_SIZE", "1000"))
+
+# Number of name indexes of the messages, email templates and SMS templates of
+# flow templates each worker process keeps in memory.
+TEMPLATE_NAME_CACHE_SIZE = int(os.getenv("TEMPLATE_NAME_CACHE_SIZE", "1000"))
+
+# Number of sets of messages, email templates and SMS templates of flow
+# templates resolved for an org each worker process keeps in memory.
+TEMPLATE_CONTENT_CACHE_SIZE = int(os.getenv("TEMPLATE_CONTENT_CACHE_SIZE", "1000"))
+
+# Audio files of messages and recording instructions are probed by the audio
+# ingest job on a pool of AUDIO_INGEST_POOL_SIZE processes. Wav files of at
+# least AUDIO_TRANSCODE_MIN_SIZE bytes are transcoded with ffmpeg to mono mp3
+# files with the given sample rate and bit rate. Set to 0 to keep every file.
+AUDIO_INGEST_POOL_SIZE = int(os.getenv("AUDIO_INGEST_POOL_SIZE", "2"))
+AUDIO_TRANSCODE_MIN_SIZE = int(os.getenv("AUDIO_TRANSCODE_MIN_SIZE", "0"))
+AUDIO_TRANSCODE_SAMPLE_RATE = int(os.getenv("AUDIO_TRANSCODE_SAMPLE_RATE", "8000"))
+AUDIO_TRANSCODE_BIT_RATE = int(os.getenv("AUDIO_TRANSCODE_BIT_RATE", "32000"))
+FFMPEG_PATH = os.getenv("FFMPEG_PATH", "ffmpeg")
+
+# List endpoints return pages of DEFAULT_PAGE_SIZE items. Clients may ask for
+# up to MAX_PAGE_SIZE items with ?pageSize=.
+DEFAULT_PAGE_SIZE = int(os.getenv("DEFAULT_PAGE_SIZE", "100"))
+MAX_PAGE_SIZE = int(os.getenv("MAX_PAGE_SIZE", "1000"))
+
 # S3
 AWS_ACCESS_KEY_ID = os.getenv("AWS_ACCESS_KEY_ID", None)
 AWS_SECRET_ACCESS_KEY = os.getenv("AWS_SECRET_ACCESS_KEY", None)
@@ -56,3 +117,8 @@ AWS_DEFAULT_REGION = os.getenv("AWS_DEFAULT_REGION", None)
 S3_BUCKET_NAME_PRIVATE = os.getenv("S3_BUCKET_NAME_PRIVATE")
 S3_BUCKET_NAME_PUBLIC = os.getenv("S3_BUCKET_NAME_PUBLIC")
 S3_SIGNED_URL_EXPIRY = 60  # seconds
+# Audio files are uploaded by clients directly to S3 with presigned POSTs,
+# valid for S3_UPLOAD_EXPIRY seconds and of at most S3_AUDIO_UPLOAD_MAX_SIZE
+# bytes.
+S3_UPLOAD_EXPIRY = int(os.getenv("S3_UPLOAD_EXPIRY", "900"))
+S3_AUDIO_UPLOAD_MAX_SIZE = int(os.getenv("S3_AUDIO_UPLOAD_MAX_SIZE", "104857600"))
@@ -0,0 +1,151 @@
+import collections
+import os
+
+import pytest
+from flask.testing import FlaskClient
+from sqlalchemy import text
+from sqlalchemy.exc import DBAPIError
+
+# instance/config.py reads its settings from the environment when the app is
+# created.
+os.environ.setdefault("DB_SECRET", "{}")
+os.environ.setdefault("REDIS_JOBS_HOST", "localhost")
+os.environ.setdefault("REDIS_JOBS_PORT", "6379")
+os.environ.setdefault("REDIS_JOBS_DB", "0")
+
+from app import create_app, db, redis_cache  # noqa: E402
+from app.main.dao import flow_template as flow_template_dao  # noqa: E402
+from app.main.dao import permission as permission_dao  # noqa: E402
+from app.main.models.main import FLOW_TEMPLATE_STATUS_DRAFT  # noqa: E402
+
+from . import factories  # noqa: E402
+
+# Tests that use the database run against the Postgres database at
+# TEST_DATABASE_URL, e.g. postgresql+psycopg2://postgres@localhost/app_test.
+# Its tables are created once per test session and emptied after each test.
+# They are skipped when it isn't set. Redis is replaced by fakeredis.
+TEST_DATABASE_URL = os.getenv("TEST_DATABASE_URL")
+
+_schema = {"created": False, "has_pg_trgm": False}
+
+
+@pytest.fixture
+def app():
+    app = create_app(
+        config_override={
+            "TESTING": True,
+            "SQLALCHEMY_DATABASE_URI": TEST_DATABASE_URL
+            or "postgresql+psycopg2:///app_test",
+            "REDIS_CACHE_CLASS": "fakeredis.FakeRedis",
+            "REDIS_JOBS_CLASS": "fakeredis.FakeRedis",
+            "SESSION_TOKEN_SECRET": "test-session-token-secret",
+        }
+    )
+    with app.app_context():
+        redis_cache.connection.flushall()
+        yield app
+        db.session.remove()
+
+
+class _TestClient(FlaskClient):
+    # Each request gets an app context of its own, as it would when served,
+    # rather than sharing the test's context and its 'g'. The db session is
+    # removed at the end of the request, so tests keep ids and tokens instead
+    # of instances across requests.
+    def open(self, *args, **kwargs):
+        with self.application.app_context():
+            return super().open(*args, **kwargs)
+
+
+@pytest.fixture
+def client(app):
+    app.test_client_class = _TestClient
+    return app.test_client()
+
+
+def _create_schema():
+    with db.engine.begin() as connection:
+        try:
+            with connection.begin_nested():
+                connection.execute(text("CREATE EXTENSION IF NOT EXISTS pg_trgm"))
+            _schema["has_pg_trgm"] = True
+        except DBAPIError:
+            # Trigram indexes can't be created without pg_trgm.
+            for table in db.metadata.tables.values():
+                for index in list(table.indexes):
+                    if index.dialect_options["postgresql"]["ops"]:
+                        table.indexes.discard(index)
+
+    db.drop_all()
+    db.create_all()
+    _schema["created"] = True
+
+
+def _reset_process_caches():
+    permission_dao._permission_ids = None
+    for name in dir(flow_template_dao):
+        if name.endswith("_cache_pid"):
+            setattr(flow_template_dao, name, None)
+
+
+@pytest.fixture
+def database(app):
+    if not TEST_DATABASE_URL:
+        pytest.skip("TEST_DATABASE_URL is not set")
+    if not _schema["created"]:
+        _create_schema()
+    _reset_process_caches()
+
+    yield db
+
+    db.session.remove()
+    tables = ", ".join(table.name for table in db.metadata.sorted_tables)
+    with db.engine.begin() as connection:
+        connection.execute(text(f"TRUNCATE {tables} RESTART IDENTITY CASCADE"))
+
+
+@pytest.fixture
+def pg_trgm(database):
+    if not _schema["has_pg_trgm"]:
+        pytest.skip("pg_trgm is not installed")
+
+
+CreatedFlowTemplate = collections.namedtuple(
+    "CreatedFlowTemplate",
+    ("flow_template_id", "flow_id", "step_id", "url", "headers"),
+)
+
+
+@pytest.fixture
+def flow_template_factory(database):
+    """
+    Returns a function that creates a flow template with the given status and
+    a flow that hangs up (see factories.create_hang_up_flow), created by a sys
+    admin with a session, and commits it. It returns the ids, 'url' formatted
+    with them and the auth headers of the sys admin.
+    """
+
+    def create(
+        status=FLOW_TEMPLATE_STATUS_DRAFT, url="/v1/flow-templates/{flow_template_id}/"
+    ):
+        user = factories.create_user(is_sys_admin=True)
+        session = factories.create_session(user)
+        flow_template = factories.create_flow_template(user)
+        flow, step = factories.create_hang_up_flow(flow_template, user)
+        if status != FLOW_TEMPLATE_STATUS_DRAFT:
+            template = flow_template_dao.get_template(flow_template, for_update=True)
+            flow_template_dao.set_flow_template_status(
+                flow_template, template, status, user
+            )
+        database.session.commit()
+
+        ids = {
+            "flow_template_id": flow_template.id,
+            "flow_id": flow.id,
+            "step_id": step.id,
+        }
+        return CreatedFlowTemplate(
+            url=url.format(**ids), headers={"Authorization": session.uuid}, **ids
+        )
+
+    return create
@@ -0,0 +1,236 @@
+import datetime
+
+import shortuuid
+
+from app import db
+from app.main.models import main as constants
+from app.main.dao import flow_template as flow_template_dao
+from app.main.models.flow_template import EVENT_START
+from app.main.models.main import (
+    CAMPAIGN_STATUS_DRAFT,
+    FLOW_TEMPLATE_STATUS_DRAFT,
+    MESSAGE_TYPE_AUDIO_FROM_TEMPLATE,
+    Campaign,
+    Country,
+    FlowCategory,
+    FlowTemplateMessage,
+    Language,
+    Module,
+    Org,
+    Permission,
+    Role,
+    RolePermission,
+    Session,
+    Timezone,
+    User,
+    UserRole,
+)
+
+# Rows are created with the fewest columns the models require and flushed, so
+# that their ids are set.
+
+
+def _add(instance):
+    db.session.add(instance)
+    db.session.flush()
+    return instance
+
+
+def create_user(name="User", is_sys_admin=False, **values):
+    now = datetime.datetime.now()
+    return _add(
+        User(
+            name=name,
+            email=values.pop("email", f"{shortuuid.uuid()}@example.com"),
+            password="not-a-hash",
+            must_change_password=False,
+            is_email_verified=True,
+            is_sys_admin=is_sys_admin,
+            created_at=now,
+            updated_at=now,
+            **values,
+        )
+    )
+
+
+def create_session(user, last_seen_at=None):
+    now = datetime.datetime.now()
+    return _add(
+        Session(
+            uuid=shortuuid.uuid(),
+            user=user,
+            created_at=now,
+            last_seen_at=last_seen_at or now,
+        )
+    )
+
+
+def create_permission(module_identifier, identifier):
+    now = datetime.datetime.now()
+    module = Module.query.filter(Module.identifier == module_identifier).first()
+    if module is None:
+        module = _add(
+            Module(
+                name=module_identifier,
+                identifier=module_identifier,
+                module_type=constants.MODULE_TYPE_ADMIN,
+                created_at=now,
+            )
+        )
+    return _add(
+        Permission(
+            module=module, name=identifier, identifier=identifier, created_at=now
+        )
+    )
+
+
+def create_role(permissions, current_user, name="Role"):
+    now = datetime.datetime.now()
+    audit = {
+        "created_at": now,
+        "created_by_user": current_user,
+        "updated_at": now,
+        "updated_by_user": current_user,
+    }
+    role = _add(Role(name=name, role_type=constants.ROLE_TYPE_ADMIN, **audit))
+    for permission in permissions:
+        _add(RolePermission(role=role, permission=permission, **audit))
+    return role
+
+
+def create_user_role(user, role, current_user):
+    now = datetime.datetime.now()
+    return _add(
+        UserRole(
+            user=user,
+            role=role,
+            created_at=now,
+            created_by_user=current_user,
+            updated_at=now,
+            updated_by_user=current_user,
+        )
+    )
+
+
+def create_flow_category(current_user, name="Category"):
+    now = datetime.datetime.now()
+    return _add(
+        FlowCategory(
+            name=name,
+            sequence=0,
+            created_at=now,
+            created_by_user=current_user,
+            updated_at=now,
+            updated_by_user=current_user,
+        )
+    )
+
+
+def create_flow_template(
+    current_user, name="Template", status=FLOW_TEMPLATE_STATUS_DRAFT
+):
+    flow_category = FlowCategory.query.first() or create_flow_category(current_user)
+    return flow_template_dao.create_flow_template(
+        name, "v1", None, flow_category, status, current_user
+    )
+
+
+def create_flow_template_message(
+    flow_template,
+    current_user,
+    name="Message",
+    org=None,
+    audio_file_path="audio/message.wav",
+):
+    now = datetime.datetime.now()
+    return _add(
+        FlowTemplateMessage(
+            flow_template=flow_template,
+            org=org,
+            name=name,
+            message_type=MESSAGE_TYPE_AUDIO_FROM_TEMPLATE,
+            audio_file_path=audio_file_path,
+            created_at=now,
+            created_by_user=current_user,
+            updated_at=now,
+            updated_by_user=current_user,
+        )
+    )
+
+
+def create_hang_up_flow(flow_template, current_user):
+    """
+    Adds a flow that hangs up to a flow template and makes it the start flow.
+    Returns the flow and its step.
+    """
+    template = flow_template_dao.get_template(flow_template, for_update=True)
+    flow = flow_template_dao.create_flow(
+        flow_template, template, "Flow", 1, current_user
+    )
+    step = flow_template_dao.create_hang_up_step(
+        flow_template, template, flow, "Hang Up", False, None, current_user
+    )
+    event = flow.get_event(EVENT_START)
+    flow_template_dao.update_event(
+        flow_template, template, flow, event, step.id, current_user
+    )
+    flow_template_dao.update_template_settings(
+        flow_template, template, flow.id, 3, None, None, None, current_user
+    )
+    return flow, step
+
+
+def _get_or_create(model, **values):
+    instance = model.query.first()
+    if instance is None:
+        instance = _add(model(created_at=datetime.datetime.now(), **values))
+    return instance
+
+
+def create_country(name="Country", country_code=1):
+    return _add(
+        Country(
+            name=name, country_code=country_code, created_at=datetime.datetime.now()
+        )
+    )
+
+
+def create_org(current_user, name="Org"):
+    now = datetime.datetime.now()
+    timezone = _get_or_create(
+        Timezone, name="UTC", identifier="UTC", all_identifiers=["UTC"]
+    )
+    return _add(
+        Org(
+            name=name,
+            uuid=shortuuid.uuid(),
+            timezone=timezone,
+            settings={},
+            created_at=now,
+            created_by_user=current_user,
+            updated_at=now,
+            updated_by_user=current_user,
+        )
+    )
+
+
+def create_campaign(
+    org, flow_template, owner_user, name="Campaign", status=CAMPAIGN_STATUS_DRAFT
+):
+    now = datetime.datetime.now()
+    return _add(
+        Campaign(
+            org=org,
+            name=name,
+            flow_template=flow_template,
+            country=_get_or_create(Country, name="Country", country_code=1),
+            timezone=org.timezone,
+            language=_get_or_create(Language, name="English", identifier="en"),
+            owner_user=owner_user,
+            status=status,
+            created_at=now,
+            created_by_user=owner_user,
+            updated_at=now,
+            updated_by_user=owner_user,
+        )
+    )
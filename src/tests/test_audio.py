@@ -0,0 +1,147 @@
+import struct
+
+import pytest
+from flask import current_app
+
+from app.main.dao import audio as audio_dao
+from app.main.jobs import audio as audio_jobs
+from app.main.models.main import AUDIO_STATUS_READY, FlowTemplate
+from app.utils import audio, s3
+
+from . import factories
+
+# An MPEG 1 Layer III frame header: 128 kbps, 44100 Hz, stereo. The Xing
+# header follows the 32 bytes of side information, as does the VBRI header.
+_MP3_HEADER = struct.pack(">I", 0xFFFB9000)
+_MP3_SIDE_INFO = bytes(32)
+
+
+def _wav(samples, sample_rate=8000):
+    data = struct.pack(f"<{len(samples)}h", *samples)
+    fmt = struct.pack("<HHIIHH", 1, 1, sample_rate, sample_rate * 2, 2, 16)
+    return (
+        b"RIFF"
+        + struct.pack("<I", 4 + 8 + len(fmt) + 8 + len(data))
+        + b"WAVE"
+        + b"fmt "
+        + struct.pack("<I", len(fmt))
+        + fmt
+        + b"data"
+        + struct.pack("<I", len(data))
+        + data
+    )
+
+
+def test_probe_wav():
+    info = audio.probe(_wav([1000, -1000] * 4000))
+
+    assert info.format == audio.AUDIO_FORMAT_WAV
+    assert info.duration_ms == 1000
+    assert info.sample_rate == 8000
+    assert info.channels == 1
+    assert info.loudness_db == -30.31
+
+
+@pytest.mark.parametrize("length", [14, 24, 30])
+def test_probe_truncated_wav(length):
+    with pytest.raises(ValueError):
+        audio.probe(_wav([1000, -1000])[:length])
+
+
+def test_probe_mp3_with_xing_header():
+    data = _MP3_HEADER + _MP3_SIDE_INFO + b"Xing" + struct.pack(">II", 0x1, 100)
+
+    info = audio.probe(data)
+
+    assert info.format == audio.AUDIO_FORMAT_MP3
+    assert info.duration_ms == 100 * 1152 * 1000 // 44100
+    assert info.sample_rate == 44100
+    assert info.channels == 2
+
+
+@pytest.mark.parametrize(
+    "data",
+    [
+        _MP3_HEADER + _MP3_SIDE_INFO + b"Xing\x00\x00",
+        _MP3_HEADER + _MP3_SIDE_INFO + b"Xing" + struct.pack(">I", 0x1) + b"\x00",
+        _MP3_HEADER + _MP3_SIDE_INFO + b"VBRI" + bytes(4),
+        b"Not audio",
+    ],
+    ids=["xing_flags", "xing_frame_count", "vbri", "garbage"],
+)
+def test_probe_truncated_or_invalid_mp3(data):
+    with pytest.raises(ValueError):
+        audio.probe(data)
+
+
+def _create_message(database):
+    user = factories.create_user()
+    flow_template = factories.create_flow_template(user)
+    message = factories.create_flow_template_message(flow_template, user)
+    database.session.commit()
+    return flow_template.id, message.id
+
+
+def test_set_audio_info_keeps_the_flow_template_version(database):
+    flow_template_id, message_id = _create_message(database)
+    flow_template = FlowTemplate.query.get(flow_template_id)
+    version = flow_template.version
+    content_version = flow_template.content_version
+
+    message = audio_dao.get_audio_row(audio_dao.AUDIO_KIND_MESSAGE, message_id)
+    audio_dao.set_audio_info(message, audio.probe(_wav([0])), message.audio_file_path)
+    database.session.commit()
+
+    database.session.expire_all()
+    flow_template = FlowTemplate.query.get(flow_template_id)
+    assert flow_template.version == version
+    assert flow_template.content_version == content_version + 1
+    assert message.audio_status == AUDIO_STATUS_READY
+
+
+def test_save_ingest_result_deletes_the_upload_if_the_row_changed(
+    database, monkeypatch
+):
+    _, message_id = _create_message(database)
+    uploads = []
+    deletes = []
+    monkeypatch.setattr(
+        s3, "upload_audio_to_s3", lambda path, *args, **kwargs: uploads.append(path)
+    )
+    monkeypatch.setattr(
+        s3, "delete_file_from_s3", lambda path, *args, **kwargs: deletes.append(path)
+    )
+    result = (audio.probe(_wav([0])), b"mp3")
+
+    # The audio file of the message was replaced after it was ingested.
+    assert not audio_jobs._save_ingest_result(
+        audio_dao.AUDIO_KIND_MESSAGE, message_id, "audio/replaced.wav", result
+    )
+    assert deletes == uploads
+    assert uploads[0].startswith("audio/replaced-")
+
+    assert audio_jobs._save_ingest_result(
+        audio_dao.AUDIO_KIND_MESSAGE, message_id, "audio/message.wav", result
+    )
+    assert len(uploads) == 2 and len(deletes) == 1
+    assert uploads[1].startswith("audio/message-") and uploads[1].endswith(".mp3")
+    message = audio_dao.get_audio_row(audio_dao.AUDIO_KIND_MESSAGE, message_id)
+    assert message.audio_file_path == uploads[1]
+
+
+def test_ingest_pending_audio_downloads_in_the_pool(app, database, monkeypatch):
+    app.config["AUDIO_INGEST_POOL_SIZE"] = 1
+    _, message_id = _create_message(database)
+    data = _wav([1000, -1000] * 4000)
+
+    def download_bytes_from_s3(key_name, is_private, s3_client=None):
+        # Only pool processes have the minimal app of the job.
+        assert current_app.name == audio_jobs.__name__
+        return data
+
+    monkeypatch.setattr(s3, "download_bytes_from_s3", download_bytes_from_s3)
+
+    assert audio_jobs.ingest_pending_audio() == 1
+    message = audio_dao.get_audio_row(audio_dao.AUDIO_KIND_MESSAGE, message_id)
+    assert message.audio_status == AUDIO_STATUS_READY
+    assert message.audio_duration_ms == 1000
@@ -0,0 +1,350 @@
+import base64
+import io
+import json
+
+import pytest
+from botocore.stub import Stubber
+
+from app.main.models.main import (
+    MESSAGE_TYPE_AUDIO_FROM_TEMPLATE,
+    RECORDING_INSTRUCTION_TYPE_WELCOME,
+    FlowTemplateMessage,
+    RecordingInstruction,
+)
+from app.utils import s3
+
+from . import factories
+
+BUCKET_NAME = "public-bucket"
+
+
+@pytest.fixture
+def s3_stubber(app, monkeypatch):
+    app.config.update(
+        {
+            "AWS_ACCESS_KEY_ID": "access-key-id",
+            "AWS_SECRET_ACCESS_KEY": "secret-access-key",
+            "AWS_DEFAULT_REGION": "us-east-1",
+            "S3_BUCKET_NAME_PUBLIC": BUCKET_NAME,
+        }
+    )
+    s3_client = s3._get_s3_client()
+    monkeypatch.setattr(s3, "_get_s3_client", lambda: s3_client)
+    with Stubber(s3_client) as stubber:
+        yield stubber
+        stubber.assert_no_pending_responses()
+
+
+def _add_head_response(stubber, key, content_type):
+    stubber.add_response(
+        "head_object",
+        {"ContentType": content_type},
+        {"Bucket": BUCKET_NAME, "Key": key},
+    )
+
+
+def _message_data(audio_file_key):
+    return {
+        "orgId": None,
+        "name": "Welcome",
+        "description": None,
+        "messageType": MESSAGE_TYPE_AUDIO_FROM_TEMPLATE,
+        "messageText": None,
+        "attribute": None,
+        "recordingInstructionId": None,
+        "sequence": None,
+        "audioFileKey": audio_file_key,
+    }
+
+
+def _get_policy_conditions(fields):
+    return json.loads(base64.b64decode(fields["policy"]))["conditions"]
+
+
+def test_message_audio_upload_is_presigned_for_the_template_prefix(
+    app, client, flow_template_factory, s3_stubber
+):
+    flow_template_id, _, _, _, headers = flow_template_factory()
+
+    res = client.post(
+        f"/v1/flow-templates/{flow_template_id}/messages/audio-uploads/",
+        json={"orgId": None, "fileName": "Welcome Message.WAV"},
+        headers=headers,
+    )
+
+    assert res.status_code == 200
+    key = res.json["audioFileKey"]
+    assert key.startswith(f"audio/ft/{flow_template_id}/o/default/welcome-message-")
+    assert key.endswith(".wav")
+    assert res.json["url"] == f"https://{BUCKET_NAME}.s3.amazonaws.com/"
+    fields = res.json["fields"]
+    assert fields["key"] == key
+    assert fields["Content-Type"] == "audio/wav"
+    assert fields["Cache-Control"] == s3.AUDIO_CACHE_CONTROL
+    conditions = _get_policy_conditions(fields)
+    assert {"Content-Type": "audio/wav"} in conditions
+    assert {"Cache-Control": s3.AUDIO_CACHE_CONTROL} in conditions
+    assert [
+        "content-length-range",
+        1,
+        app.config["S3_AUDIO_UPLOAD_MAX_SIZE"],
+    ] in conditions
+    assert {"key": key} in conditions
+
+
+def test_message_audio_upload_rejects_other_files(
+    client, flow_template_factory, s3_stubber
+):
+    flow_template_id, _, _, _, headers = flow_template_factory()
+
+    res = client.post(
+        f"/v1/flow-templates/{flow_template_id}/messages/audio-uploads/",
+        json={"orgId": None, "fileName": "message.ogg"},
+        headers=headers,
+    )
+
+    assert res.status_code == 422
+    assert res.json == {"fileName": ["Audio File must be of type wav or mp3"]}
+
+
+def test_message_is_created_from_an_uploaded_key(
+    client, flow_template_factory, s3_stubber
+):
+    flow_template_id, _, _, _, headers = flow_template_factory()
+    key = f"audio/ft/{flow_template_id}/o/default/welcome-1.mp3"
+    _add_head_response(s3_stubber, key, "audio/mpeg")
+
+    res = client.post(
+        f"/v1/flow-templates/{flow_template_id}/messages/",
+        json=_message_data(key),
+        headers=headers,
+    )
+
+    assert res.status_code == 200
+    message = FlowTemplateMessage.query.get(res.json["id"])
+    assert message.audio_file_path == key
+
+
+@pytest.mark.parametrize(
+    "key",
+    [
+        "audio/ft/{other_id}/o/default/welcome-1.mp3",
+        "audio/ft/{id}/o/1/welcome-1.mp3",
+        "audio/ft/{id}/o/default/nested/welcome-1.mp3",
+        "audio/ft/{id}/o/default/../../{other_id}/o/default/welcome-1.mp3",
+    ],
+    ids=["other_template", "other_org", "nested", "parent"],
+)
+def test_message_key_outside_the_prefix_is_not_checked(
+    client, flow_template_factory, s3_stubber, key
+):
+    flow_template_id, _, _, _, headers = flow_template_factory()
+    key = key.format(id=flow_template_id, other_id=flow_template_id + 1)
+
+    # No HEAD request is stubbed, so one would fail the request.
+    res = client.post(
+        f"/v1/flow-templates/{flow_template_id}/messages/",
+        json=_message_data(key),
+        headers=headers,
+    )
+
+    assert res.status_code == 422
+    assert res.json == {
+        "messageData": {"audioFileKey": ["Audio File has not been uploaded"]}
+    }
+
+
+@pytest.mark.parametrize("error_code", ["404", "NoSuchKey"])
+def test_message_key_that_was_not_uploaded_is_rejected(
+    client, flow_template_factory, s3_stubber, error_code
+):
+    flow_template_id, _, _, _, headers = flow_template_factory()
+    key = f"audio/ft/{flow_template_id}/o/default/welcome-1.mp3"
+    s3_stubber.add_client_error(
+        "head_object",
+        service_error_code=error_code,
+        http_status_code=404,
+        expected_params={"Bucket": BUCKET_NAME, "Key": key},
+    )
+
+    res = client.post(
+        f"/v1/flow-templates/{flow_template_id}/messages/",
+        json=_message_data(key),
+        headers=headers,
+    )
+
+    assert res.status_code == 422
+    assert res.json == {
+        "messageData": {"audioFileKey": ["Audio File has not been uploaded"]}
+    }
+
+
+def test_message_key_uploaded_with_another_content_type_is_rejected(
+    client, flow_template_factory, s3_stubber
+):
+    flow_template_id, _, _, _, headers = flow_template_factory()
+    key = f"audio/ft/{flow_template_id}/o/default/welcome-1.mp3"
+    _add_head_response(s3_stubber, key, "text/html")
+
+    res = client.post(
+        f"/v1/flow-templates/{flow_template_id}/messages/",
+        json=_message_data(key),
+        headers=headers,
+    )
+
+    assert res.status_code == 422
+    assert res.json == {
+        "messageData": {"audioFileKey": ["Audio File has not been uploaded"]}
+    }
+    assert FlowTemplateMessage.query.count() == 0
+
+
+def test_message_file_and_key_are_exclusive(client, flow_template_factory, s3_stubber):
+    flow_template_id, _, _, _, headers = flow_template_factory()
+    key = f"audio/ft/{flow_template_id}/o/default/welcome-1.mp3"
+
+    res = client.post(
+        f"/v1/flow-templates/{flow_template_id}/messages/",
+        data={
+            "messageData": json.dumps(_message_data(key)),
+            "audioFile": (io.BytesIO(b"audio"), "welcome.mp3"),
+        },
+        headers=headers,
+    )
+
+    assert res.status_code == 422
+    assert res.json == {
+        "audioFile": ["Audio File must not be provided with an Audio File Key"]
+    }
+
+
+def _recording_instruction_data(audio_file_key):
+    return {
+        "name": None,
+        "instructionType": RECORDING_INSTRUCTION_TYPE_WELCOME,
+        "audioFileKey": audio_file_key,
+    }
+
+
+def _create_sys_admin_headers(database):
+    user = factories.create_user(is_sys_admin=True)
+    session = factories.create_session(user)
+    database.session.commit()
+    return {"Authorization": session.uuid}
+
+
+def test_recording_instruction_audio_upload_is_presigned_for_the_type_prefix(
+    client, database, s3_stubber
+):
+    headers = _create_sys_admin_headers(database)
+
+    res = client.post(
+        "/v1/recording-instructions/audio-uploads/",
+        json={
+            "instructionType": RECORDING_INSTRUCTION_TYPE_WELCOME,
+            "fileName": "welcome.mp3",
+        },
+        headers=headers,
+    )
+
+    assert res.status_code == 200
+    key = res.json["audioFileKey"]
+    assert key.startswith("audio/ri/we/welcome-") and key.endswith(".mp3")
+    fields = res.json["fields"]
+    assert fields["key"] == key
+    assert fields["Content-Type"] == "audio/mpeg"
+    conditions = _get_policy_conditions(fields)
+    assert {"Content-Type": "audio/mpeg"} in conditions
+    assert {"Cache-Control": s3.AUDIO_CACHE_CONTROL} in conditions
+
+
+def test_recording_instruction_is_created_from_an_uploaded_key(
+    client, database, s3_stubber
+):
+    headers = _create_sys_admin_headers(database)
+    key = "audio/ri/we/welcome-1.wav"
+    _add_head_response(s3_stubber, key, "audio/wav")
+
+    res = client.post(
+        "/v1/recording-instructions/",
+        json=_recording_instruction_data(key),
+        headers=headers,
+    )
+
+    assert res.status_code == 200
+    instruction = RecordingInstruction.query.get(res.json["id"])
+    assert instruction.audio_file_path == key
+
+
+@pytest.mark.parametrize(
+    "key",
+    ["audio/ri/q1/welcome-1.wav", "audio/ri/we/nested/welcome-1.wav"],
+    ids=["other_type", "nested"],
+)
+def test_recording_instruction_key_outside_the_prefix_is_not_checked(
+    client, database, s3_stubber, key
+):
+    headers = _create_sys_admin_headers(database)
+
+    res = client.post(
+        "/v1/recording-instructions/",
+        json=_recording_instruction_data(key),
+        headers=headers,
+    )
+
+    assert res.status_code == 422
+    assert res.json == {"data": {"audioFileKey": ["Audio File has not been uploaded"]}}
+
+
+def test_recording_instruction_key_that_was_not_uploaded_is_rejected(
+    client, database, s3_stubber
+):
+    headers = _create_sys_admin_headers(database)
+    key = "audio/ri/we/welcome-1.wav"
+    s3_stubber.add_client_error(
+        "head_object", service_error_code="404", http_status_code=404
+    )
+
+    res = client.post(
+        "/v1/recording-instructions/",
+        json=_recording_instruction_data(key),
+        headers=headers,
+    )
+
+    assert res.status_code == 422
+    assert res.json == {"data": {"audioFileKey": ["Audio File has not been uploaded"]}}
+
+
+def test_recording_instruction_key_with_another_content_type_is_rejected(
+    client, database, s3_stubber
+):
+    headers = _create_sys_admin_headers(database)
+    key = "audio/ri/we/welcome-1.wav"
+    _add_head_response(s3_stubber, key, "audio/mpeg")
+
+    res = client.post(
+        "/v1/recording-instructions/",
+        json=_recording_instruction_data(key),
+        headers=headers,
+    )
+
+    assert res.status_code == 422
+    assert RecordingInstruction.query.count() == 0
+
+
+def test_recording_instruction_file_and_key_are_exclusive(client, database, s3_stubber):
+    headers = _create_sys_admin_headers(database)
+
+    res = client.post(
+        "/v1/recording-instructions/",
+        data={
+            "data": json.dumps(_recording_instruction_data("audio/ri/we/a-1.wav")),
+            "audioFile": (io.BytesIO(b"audio"), "welcome.wav"),
+        },
+        headers=headers,
+    )
+
+    assert res.status_code == 422
+    assert res.json == {
+        "audioFile": ["Audio File must not be provided with an Audio File Key"]
+    }
@@ -0,0 +1,95 @@
+from app import db
+from app.main.dao import auth_cache as auth_cache_dao
+from app.main.dao import user as user_dao
+from app.main.models.main import Session
+from app.utils import cache
+
+from . import factories
+
+
+def _is_user_cached(user):
+    return cache.get_json(auth_cache_dao.USER_KEY.format(user_id=user.id)) is not None
+
+
+def test_request_caches_session_and_user(client, database):
+    user = factories.create_user(is_sys_admin=True)
+    session = factories.create_session(user)
+    database.session.commit()
+    user_id, uuid = user.id, session.uuid
+
+    res = client.get("/v1/countries/", headers={"Authorization": uuid})
+
+    assert res.status_code == 200
+    assert auth_cache_dao.get_session_with_uuid(uuid).user_id == user_id
+    assert auth_cache_dao.get_user_permission_mask(user_id) == 0
+
+
+def test_cached_session_is_used_without_the_row(client, database):
+    user = factories.create_user(is_sys_admin=True)
+    session = factories.create_session(user)
+    database.session.commit()
+    session_id, uuid = session.id, session.uuid
+    headers = {"Authorization": uuid}
+    client.get("/v1/countries/", headers=headers)
+
+    # The cached copy outlives the row until it's invalidated.
+    database.session.query(Session).filter(Session.id == session_id).delete()
+    database.session.commit()
+    assert client.get("/v1/countries/", headers=headers).status_code == 200
+
+    auth_cache_dao.invalidate_sessions([Session(id=session_id, uuid=uuid)])
+    assert client.get("/v1/countries/", headers=headers).status_code == 401
+
+
+def test_invalidate_user_before_and_after_commit(database):
+    user = factories.create_user()
+    database.session.commit()
+    auth_cache_dao.set_user(user, 0)
+
+    user.name = "Renamed"
+    auth_cache_dao.invalidate_user(user)
+    assert not _is_user_cached(user)
+
+    # A concurrent request re-caches the state being replaced.
+    auth_cache_dao.set_user(user, 0)
+    database.session.commit()
+    assert not _is_user_cached(user)
+
+
+def test_user_role_change_invalidates_the_user(database):
+    user = factories.create_user()
+    database.session.commit()
+    auth_cache_dao.set_user(user, 0)
+
+    user_dao.delete_user_roles_with_user_id(user)
+    database.session.commit()
+
+    assert not _is_user_cached(user)
+
+
+def test_role_change_invalidates_every_user_with_the_role(database):
+    admin = factories.create_user()
+    permission = factories.create_permission("users", "view")
+    role = factories.create_role([permission], admin)
+    users = [factories.create_user(name=f"User {i}") for i in range(3)]
+    for user in users:
+        factories.create_user_role(user, role, admin)
+    database.session.commit()
+    for user in users:
+        auth_cache_dao.set_user(user, 1 << permission.id)
+
+    auth_cache_dao.invalidate_role(role)
+    database.session.commit()
+
+    assert not any(_is_user_cached(user) for user in users)
+
+
+def test_rolled_back_invalidation_runs_no_after_commit_callback(database):
+    user = factories.create_user()
+    database.session.commit()
+
+    auth_cache_dao.invalidate_user(user)
+    auth_cache_dao.set_user(user, 0)
+    db.session.rollback()
+
+    assert _is_user_cached(user)
@@ -0,0 +1,58 @@
+from app.utils import pagination
+
+from . import factories
+
+
+def _create_campaigns(database, names):
+    user = factories.create_user(name="Owner", is_sys_admin=True)
+    session = factories.create_session(user)
+    org = factories.create_org(user)
+    flow_template = factories.create_flow_template(user)
+    for name in names:
+        factories.create_campaign(org, flow_template, user, name)
+    database.session.commit()
+    return {"Authorization": session.uuid}
+
+
+def _search(client, headers, **query_string):
+    return client.get(
+        "/v1/campaigns/search/", query_string=query_string, headers=headers
+    )
+
+
+def test_search_follows_the_next_cursor(client, pg_trgm):
+    headers = _create_campaigns(pg_trgm, ["Survey", "Surveys", "Polio survey"])
+
+    res = _search(client, headers, query="Survey", pageSize=2)
+    assert res.status_code == 200
+    names = [campaign["name"] for campaign in res.json]
+    assert names[0] == "Survey"
+    cursor = res.headers[pagination.NEXT_CURSOR_HEADER]
+
+    res = _search(client, headers, query="Survey", pageSize=2, cursor=cursor)
+    assert res.status_code == 200
+    names += [campaign["name"] for campaign in res.json]
+    assert sorted(names) == ["Polio survey", "Survey", "Surveys"]
+    assert pagination.NEXT_CURSOR_HEADER not in res.headers
+
+
+def test_search_rejects_an_invalid_cursor(client, database):
+    headers = _create_campaigns(database, ["Survey"])
+
+    # The rank of a search cursor is a decimal string.
+    cursor = pagination.encode_cursor(["high", 1])
+    res = _search(client, headers, query="Survey", cursor=cursor)
+
+    assert res.status_code == 422
+    assert res.json == {"cursor": ["Invalid cursor"]}
+
+
+def test_list_without_query_follows_the_next_cursor(client, database):
+    headers = _create_campaigns(database, ["B", "A", "C"])
+
+    res = _search(client, headers, pageSize=2)
+    assert [campaign["name"] for campaign in res.json] == ["A", "B"]
+    cursor = res.headers[pagination.NEXT_CURSOR_HEADER]
+
+    res = _search(client, headers, pageSize=2, cursor=cursor)
+    assert [campaign["name"] for campaign in res.json] == ["C"]
@@ -0,0 +1,120 @@
+from app.main.dao import flow_template as flow_template_dao
+from app.main.models.main import (
+    FlowTemplate,
+    FlowTemplateFlow,
+    FlowTemplateStatus,
+    FlowTemplateStep,
+)
+
+
+def _create_flow_template_with_statuses(database, flow_template_factory):
+    """
+    Creates a flow template with two statuses, each set by a step. Returns the
+    flow template and the auth headers of a sys admin.
+    """
+    flow_template_id, flow_id, _, _, headers = flow_template_factory()
+    flow_template = database.session.get(FlowTemplate, flow_template_id)
+    user = flow_template.created_by_user
+    template = flow_template_dao.get_template(flow_template, for_update=True)
+    flow = template.get_flow(flow_id)
+    for name in ("Interested", "Not Interested"):
+        status = flow_template_dao.create_flow_template_status(
+            flow_template, name, True, name == "Interested", False, 1, 0, user
+        )
+        flow_template_dao.create_set_status_step(
+            flow_template, template, flow, f"Set {name}", False, status, None, user
+        )
+    database.session.commit()
+    return flow_template, headers
+
+
+def _clone(client, flow_template_id, headers):
+    data = {"name": "Clone", "versionIdentifier": "v2", "description": None}
+    res = client.post(
+        f"/v1/flow-templates/{flow_template_id}/clone/", json=data, headers=headers
+    )
+    assert res.status_code == 200
+    return res.json["id"]
+
+
+def _get_rows(flow_template_id):
+    statuses = FlowTemplateStatus.query.filter(
+        FlowTemplateStatus.flow_template_id == flow_template_id
+    ).order_by(FlowTemplateStatus.id)
+    steps = FlowTemplateStep.query.filter(
+        FlowTemplateStep.flow_template_id == flow_template_id
+    ).order_by(FlowTemplateStep.sequence)
+    return (
+        {status.id: status.name for status in statuses},
+        [step.spec for step in steps],
+    )
+
+
+def _get_status_names_by_step(flow_template_id):
+    status_names, steps = _get_rows(flow_template_id)
+    return {
+        step["name"]: status_names[step["statusId"]]
+        for step in steps
+        if "statusId" in step
+    }
+
+
+def test_clone_remaps_status_ids(client, database, flow_template_factory):
+    flow_template, headers = _create_flow_template_with_statuses(
+        database, flow_template_factory
+    )
+    source_id, version = flow_template.id, flow_template.version
+    source_rows = _get_rows(source_id)
+
+    clone_id = _clone(client, source_id, headers)
+
+    database.session.expire_all()
+    status_names, steps = _get_rows(clone_id)
+    assert sorted(status_names.values()) == ["Interested", "Not Interested"]
+    assert not set(status_names) & set(source_rows[0])
+    assert len(steps) == len(source_rows[1])
+    assert _get_status_names_by_step(clone_id) == {
+        "Set Interested": "Interested",
+        "Set Not Interested": "Not Interested",
+    }
+    # The source is left as it was.
+    assert _get_rows(source_id) == source_rows
+    assert database.session.get(FlowTemplate, source_id).version == version
+
+
+def test_clone_of_unmigrated_flow_template_leaves_it_unmigrated(
+    client, database, flow_template_factory
+):
+    flow_template, headers = _create_flow_template_with_statuses(
+        database, flow_template_factory
+    )
+    source_id = flow_template.id
+    # Move the flows and steps back into flow_spec.
+    template = flow_template_dao.get_template(flow_template)
+    flow_template.flow_spec = template.to_json()
+    FlowTemplateStep.query.filter(
+        FlowTemplateStep.flow_template_id == source_id
+    ).delete()
+    FlowTemplateFlow.query.filter(
+        FlowTemplateFlow.flow_template_id == source_id
+    ).delete()
+    database.session.commit()
+    version = flow_template.version
+
+    clone_id = _clone(client, source_id, headers)
+
+    database.session.expire_all()
+    source = database.session.get(FlowTemplate, source_id)
+    assert "flows" in source.flow_spec
+    assert source.version == version
+    assert not FlowTemplateFlow.query.filter(
+        FlowTemplateFlow.flow_template_id == source_id
+    ).count()
+
+    clone = database.session.get(FlowTemplate, clone_id)
+    assert "flows" not in clone.flow_spec
+    assert _get_status_names_by_step(clone_id) == {
+        "Set Interested": "Interested",
+        "Set Not Interested": "Not Interested",
+    }
+    assert len(flow_template_dao.get_template(clone).flows) == 1
@@ -0,0 +1,207 @@
+import pytest
+
+from app.main.dao import flow_template as flow_template_dao
+from app.main.models.compiled_template import (
+    NO_FLOW,
+    NO_NAME,
+    NO_STEP,
+    CompiledTemplate,
+    compile_template,
+)
+from app.main.models.flow_template import (
+    EVENT_START,
+    GET_INPUT_PURPOSE_MAKE_DECISION,
+    TRANSITION_NEXT,
+    Template,
+)
+from app.main.models.main import FLOW_TEMPLATE_STATUS_PUBLISHED
+
+from . import factories
+
+
+def _step(id, type="HangUp", next_step_id=None, **values):
+    return dict(values, id=id, type=type, name=f"Step {id}", nextStepId=next_step_id)
+
+
+def _decision_step(id, options):
+    return _step(
+        id,
+        "GetInput",
+        purpose=GET_INPUT_PURPOSE_MAKE_DECISION,
+        messageNames=["Question"],
+        optionsType="Static",
+        options=options,
+    )
+
+
+def _flow(id, steps, start_step_id=None):
+    return {
+        "id": id,
+        "name": f"Flow {id}",
+        "events": [{"id": EVENT_START, "name": "Start", "nextStepId": start_step_id}],
+        "steps": steps,
+    }
+
+
+def _compile(flows, start="main", **template_json):
+    template = Template(template_json=dict(template_json, start=start, flows=flows))
+    return CompiledTemplate(compile_template(template))
+
+
+def test_steps_are_numbered_in_flow_and_step_order():
+    compiled = _compile(
+        [
+            _flow("main", [_step("a", "Delay", "b", duration=1), _step("b")], "a"),
+            _flow("other", [_step("a")], "a"),
+        ],
+        start="other",
+    )
+
+    assert len(compiled) == 3
+    assert compiled.start_flow == 1
+    assert compiled.get_flow("main") == 0
+    assert compiled.get_flow("gone") == NO_FLOW
+    assert compiled.get_step("main", "b") == 1
+    # Step ids are only unique within their flow.
+    assert compiled.get_step("other", "a") == 2
+    assert compiled.get_step("other", "b") == NO_STEP
+    assert compiled.get_event_step(0, EVENT_START) == 0
+    assert compiled.get_next_step(0, TRANSITION_NEXT) == 1
+    assert compiled.get_next_step(1, TRANSITION_NEXT) == NO_STEP
+    assert compiled.step_types == ["Delay", "HangUp", "HangUp"]
+    assert compiled.step_params[0] == {"duration": 1}
+
+
+def test_dangling_references_are_no_step_or_no_flow():
+    compiled = _compile(
+        [
+            _flow(
+                "main",
+                [
+                    _step("a", "GoToFlow", "gone", goToFlowId="other"),
+                    _step("b", "GoToFlow", goToFlowId="gone"),
+                ],
+                "missing",
+            ),
+            _flow("other", []),
+        ],
+        start="gone",
+    )
+
+    assert compiled.start_flow == NO_FLOW
+    assert compiled.get_event_step(0, EVENT_START) == NO_STEP
+    assert compiled.get_next_step(0, TRANSITION_NEXT) == NO_STEP
+    assert compiled.step_params[0] == {"goToFlow": 1}
+    assert compiled.step_params[1] == {"goToFlow": NO_FLOW}
+
+
+def test_decision_options_are_folded_and_the_first_match_wins():
+    options = [
+        {"key": 1, "text": "Yes", "nextStepId": "yes"},
+        {"key": 2, "text": "No", "nextStepId": "no"},
+        # Shadowed by the first option, as with Step.get_next_step_id.
+        {"key": 3, "text": "YES", "nextStepId": "no"},
+        {"key": 4, "nextStepId": "gone"},
+        {"key": 5},
+    ]
+    flows = [
+        _flow("main", [_decision_step("a", options), _step("yes"), _step("no")], "a")
+    ]
+    template = Template(template_json={"start": "main", "flows": flows})
+    compiled = _compile(flows)
+
+    [flow] = template.flows
+    step = flow.get_step("a")
+    for value in [1, 2, 3, "yes", "no", 4, 5, 6, TRANSITION_NEXT]:
+        step_id = step.get_next_step_id(value)
+        expected = compiled.get_step("main", step_id) if step_id else NO_STEP
+        assert compiled.get_next_step(0, value) == expected, value
+    assert compiled.get_next_step(0, 1) == compiled.get_step("main", "yes")
+    assert compiled.get_next_step(0, "yes") == compiled.get_step("main", "yes")
+    assert compiled.get_next_step(0, 3) == compiled.get_step("main", "no")
+
+
+def test_names_are_tabled_and_resolved_when_loaded():
+    flows = [
+        _flow(
+            "main",
+            [
+                _step("a", "PlayMessage", "b", messageNames=["Hello", "Bye"]),
+                _step("b", "SendEmail", "c", recipient="x", emailTemplateName="Mail"),
+                _step("c", "PlayMessage", messageNames=["Bye"]),
+            ],
+            "a",
+        )
+    ]
+    template = Template(
+        template_json={"start": "main", "flows": flows, "noInputMessageName": "Hello"}
+    )
+    data = compile_template(template)
+
+    compiled = CompiledTemplate(data, message_ids={"Bye": 2}, email_template_ids={})
+
+    assert compiled.message_names == ["Hello", "Bye"]
+    assert compiled.message_ids == [None, 2]
+    assert compiled.step_messages == [[0, 1], None, [1]]
+    assert compiled.no_input_message == 0
+    assert compiled.invalid_input_message == NO_NAME
+    assert compiled.step_templates == [NO_NAME, 0, NO_NAME]
+    assert compiled.email_template_names == ["Mail"]
+    assert compiled.email_template_ids == [None]
+
+
+def test_msgpack_round_trip():
+    flows = [
+        _flow(
+            "main",
+            [
+                _decision_step("a", [{"key": 1, "text": "Yes", "nextStepId": "b"}]),
+                _step("b", "Delay", duration=5),
+            ],
+            "a",
+        )
+    ]
+    template = Template(template_json={"start": "main", "flows": flows})
+    data = compile_template(template)
+    compiled = CompiledTemplate(data)
+
+    assert isinstance(data, bytes)
+    assert compile_template(template) == data
+    assert compiled.flow_events == [{EVENT_START: 0}]
+    assert compiled.step_options == [{1: 1, "yes": 1}, None]
+    assert compiled.step_params[1] == {"duration": 5}
+    assert compiled.step_checkpoints == [False, False]
+
+
+def test_unsupported_format_is_rejected():
+    data = compile_template(Template(template_json={"start": None, "flows": []}))
+
+    with pytest.raises(ValueError):
+        CompiledTemplate(data.replace(b"\xa6format\x01", b"\xa6format\x02"))
+
+
+def test_loaded_ids_follow_content_changes(database):
+    user = factories.create_user()
+    flow_template = factories.create_flow_template(user)
+    flow, _ = factories.create_hang_up_flow(flow_template, user)
+    template = flow_template_dao.get_template(flow_template, for_update=True)
+    flow_template_dao.update_template_settings(
+        flow_template, template, flow.id, 3, "Message", None, None, user
+    )
+    flow_template_dao.set_flow_template_status(
+        flow_template, template, FLOW_TEMPLATE_STATUS_PUBLISHED, user
+    )
+    database.session.commit()
+    assert flow_template_dao.get_compiled_template(flow_template).message_ids == [None]
+
+    # Content changes don't compile the template again.
+    message = factories.create_flow_template_message(flow_template, user)
+    flow_template_dao.set_flow_template_update_audit_fields(flow_template, user)
+    database.session.commit()
+    compiled = flow_template_dao.get_compiled_template(flow_template)
+    assert compiled.message_ids == [message.id]
+
+    database.session.delete(message)
+    flow_template_dao.set_flow_template_update_audit_fields(flow_template, user)
+    database.session.commit()
+    assert flow_template_dao.get_compiled_template(flow_template).message_ids == [None]
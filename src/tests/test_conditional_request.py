@@ -0,0 +1,71 @@
+from flask import Response
+
+from app.main.models.main import FlowTemplate
+from app.middleware.cors import add_cors_headers
+
+SETTINGS_URL = "/v1/flow-templates/{flow_template_id}/settings/"
+
+
+def _get_settings(flow_id):
+    return {
+        "startFlowId": flow_id,
+        "inputMaxTries": 3,
+        "noInputMessageName": None,
+        "invalidInputMessageName": None,
+        "inputTriesExceededMessageName": None,
+    }
+
+
+def test_get_returns_the_version_as_etag(client, flow_template_factory):
+    _, _, _, url, headers = flow_template_factory(url=SETTINGS_URL)
+
+    res = client.get(url, headers=headers)
+
+    assert res.status_code == 200
+    assert res.get_etag() == (str(FlowTemplate.query.one().version), False)
+
+
+def test_matching_if_none_match_returns_304(client, flow_template_factory):
+    _, _, _, url, headers = flow_template_factory(url=SETTINGS_URL)
+    etag = client.get(url, headers=headers).headers["ETag"]
+
+    res = client.get(url, headers=dict(headers, **{"If-None-Match": etag}))
+
+    assert res.status_code == 304
+    assert res.headers["ETag"] == etag
+    assert not res.data
+
+
+def test_update_returns_the_new_version_as_etag(client, flow_template_factory):
+    _, flow_id, _, url, headers = flow_template_factory(url=SETTINGS_URL)
+    etag = client.get(url, headers=headers).headers["ETag"]
+
+    res = client.put(
+        url, json=_get_settings(flow_id), headers=dict(headers, **{"If-Match": etag})
+    )
+
+    assert res.status_code == 200
+    assert res.headers["ETag"] != etag
+    res = client.get(url, headers=dict(headers, **{"If-None-Match": etag}))
+    assert res.status_code == 200
+
+
+def test_stale_if_match_returns_412(client, flow_template_factory):
+    _, flow_id, _, url, headers = flow_template_factory(url=SETTINGS_URL)
+    etag = client.get(url, headers=headers).headers["ETag"]
+    client.put(url, json=_get_settings(flow_id), headers=headers)
+
+    res = client.put(
+        url, json=_get_settings(flow_id), headers=dict(headers, **{"If-Match": etag})
+    )
+
+    assert res.status_code == 412
+    assert "ETag" not in res.headers
+
+
+def test_cors_allows_conditional_headers():
+    res = add_cors_headers(Response())
+
+    assert "If-Match" in res.headers["Access-Control-Allow-Headers"].split(",")
+    assert "If-None-Match" in res.headers["Access-Control-Allow-Headers"].split(",")
+    assert "ETag" in res.headers["Access-Control-Expose-Headers"].split(",")
@@ -0,0 +1,107 @@
+from app.main.models import flow_graph
+from app.main.models.flow_template import Template
+
+
+def _step(id, type="HangUp", next_step_id=None, **values):
+    return dict(values, id=id, type=type, name=f"Step {id}", nextStepId=next_step_id)
+
+
+def _set_status_step(id, next_step_id):
+    return _step(id, "SetStatus", next_step_id, statusId=1)
+
+
+def _flow(id, steps, start_step_id=None):
+    return {
+        "id": id,
+        "name": f"Flow {id}",
+        "events": [{"id": "start", "name": "Start", "nextStepId": start_step_id}],
+        "steps": steps,
+    }
+
+
+def _analyze(flows, start="main"):
+    return flow_graph.analyze(Template(template_json={"start": start, "flows": flows}))
+
+
+def _codes(issues):
+    return [issue.code for issue in issues]
+
+
+def test_valid_template_has_no_issues():
+    analysis = _analyze(
+        [_flow("main", [_step("a", "Delay", "b", duration=1), _step("b")], "a")]
+    )
+
+    assert analysis.issues == []
+    assert analysis.to_json() == {"valid": True, "errors": [], "warnings": []}
+
+
+def test_start_flow_must_be_set_and_exist():
+    flows = [_flow("main", [_step("a")], "a")]
+
+    assert _codes(_analyze(flows, start=None).errors) == [
+        flow_graph.ISSUE_NO_START_FLOW
+    ]
+    assert _codes(_analyze(flows, start="other").errors) == [
+        flow_graph.ISSUE_INVALID_START_FLOW
+    ]
+
+
+def test_dangling_next_steps_of_steps_and_events():
+    analysis = _analyze([_flow("main", [_step("a", next_step_id="gone")], "missing")])
+
+    assert _codes(analysis.errors) == [flow_graph.ISSUE_DANGLING_NEXT_STEP] * 2
+    assert analysis.errors[0].step_ids == ["a"]
+    assert analysis.errors[1].event_id == "start"
+
+
+def test_go_to_flow_must_lead_to_a_flow_with_a_start_step():
+    analysis = _analyze(
+        [
+            _flow(
+                "main",
+                [
+                    _step("a", "GoToFlow", goToFlowId="empty"),
+                    _step("b", "GoToFlow", goToFlowId="gone"),
+                ],
+                "a",
+            ),
+            _flow("empty", []),
+        ]
+    )
+
+    assert _codes(analysis.errors) == [flow_graph.ISSUE_INVALID_GO_TO_FLOW] * 2
+    assert not analysis.to_json()["valid"]
+
+
+def test_cycle_without_input_is_an_error():
+    steps = [_set_status_step("a", "b"), _set_status_step("b", "a")]
+
+    analysis = _analyze([_flow("main", steps, "a")])
+
+    assert _codes(analysis.errors) == [flow_graph.ISSUE_CYCLE_WITHOUT_INPUT]
+    assert analysis.errors[0].step_ids == ["a", "b"]
+
+
+def test_cycle_that_waits_is_allowed():
+    steps = [_step("a", "Delay", "b", duration=1), _set_status_step("b", "a")]
+
+    analysis = _analyze([_flow("main", steps, "a")])
+
+    assert not analysis.has_errors()
+
+
+def test_unreachable_flows_and_steps_are_warnings():
+    analysis = _analyze(
+        [
+            _flow("main", [_step("a"), _step("b")], "a"),
+            _flow("other", [_step("c")], "c"),
+        ]
+    )
+
+    assert not analysis.has_errors()
+    assert _codes(analysis.warnings) == [
+        flow_graph.ISSUE_UNREACHABLE_STEPS,
+        flow_graph.ISSUE_UNREACHABLE_FLOW,
+    ]
+    assert analysis.warnings[0].step_ids == ["b"]
@@ -0,0 +1,53 @@
+import pytest
+
+from app.main.dao import flow_template as flow_template_dao
+from app.main.models.flow_template import Flow
+from app.main.models.main import FlowTemplate
+
+
+@pytest.fixture
+def flow_template(database, flow_template_factory):
+    flow_template_id = flow_template_factory().flow_template_id
+    return database.session.get(FlowTemplate, flow_template_id)
+
+
+def _get_cached_template(flow_template):
+    cache = flow_template_dao._get_template_cache()
+    return cache.get((flow_template.id, flow_template.version))
+
+
+def test_read_without_writes_caches_the_template(flow_template):
+    flow_template_dao._get_template_cache().clear()
+
+    template = flow_template_dao.get_template(flow_template)
+
+    assert _get_cached_template(flow_template) is template
+
+
+def test_read_after_writes_is_cached_on_commit(database, flow_template):
+    flow_template_dao._get_template_cache().clear()
+
+    flow_template.description = "Changed"
+    template = flow_template_dao.get_template(flow_template)
+    assert _get_cached_template(flow_template) is None
+    # The transaction reuses what it loaded.
+    assert flow_template_dao.get_template(flow_template) is template
+
+    database.session.commit()
+    assert _get_cached_template(flow_template) is template
+
+
+def test_read_after_rolled_back_writes_is_not_cached(database, flow_template):
+    flow_template_dao._get_template_cache().clear()
+    version = flow_template.version
+
+    # A flow row written without updating the flow template.
+    template = flow_template_dao.get_template(flow_template, for_update=True)
+    flow = Flow(template=template, id="x", name="X", call_max_tries=1)
+    flow_template_dao._add_flow(flow_template, flow)
+    assert len(flow_template_dao.get_template(flow_template).flows) == 2
+    database.session.rollback()
+
+    assert flow_template.version == version
+    assert _get_cached_template(flow_template) is None
+    assert len(flow_template_dao.get_template(flow_template).flows) == 1
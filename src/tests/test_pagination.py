@@ -0,0 +1,59 @@
+import pytest
+
+from app.utils import pagination
+
+from . import factories
+
+
+def test_cursor_round_trip():
+    cursor = pagination.encode_cursor(("Name", 42))
+
+    assert pagination.decode_cursor(cursor, 2) == ["Name", 42]
+
+
+@pytest.mark.parametrize(
+    "cursor",
+    ["not base64!", "bm90IGpzb24=", pagination.encode_cursor(["Name"])],
+    ids=["base64", "json", "length"],
+)
+def test_decode_invalid_cursor(cursor):
+    with pytest.raises(ValueError):
+        pagination.decode_cursor(cursor, 2)
+
+
+def _create_countries(database, names):
+    user = factories.create_user(is_sys_admin=True)
+    session = factories.create_session(user)
+    for country_code, name in enumerate(names, 1):
+        factories.create_country(name, country_code)
+    database.session.commit()
+    return {"Authorization": session.uuid}
+
+
+def test_list_follows_the_next_cursor(client, database):
+    headers = _create_countries(database, ["Chile", "Brazil", "Angola"])
+
+    res = client.get("/v1/countries/?pageSize=2", headers=headers)
+    assert res.status_code == 200
+    assert [country["name"] for country in res.json] == ["Angola", "Brazil"]
+    cursor = res.headers[pagination.NEXT_CURSOR_HEADER]
+
+    query_string = {"pageSize": 2, "cursor": cursor}
+    res = client.get("/v1/countries/", query_string=query_string, headers=headers)
+    assert res.status_code == 200
+    assert [country["name"] for country in res.json] == ["Chile"]
+    assert pagination.NEXT_CURSOR_HEADER not in res.headers
+
+
+@pytest.mark.parametrize(
+    "cursor",
+    ["not base64!", pagination.encode_cursor([1, "Angola"])],
+    ids=["malformed", "types"],
+)
+def test_list_rejects_an_invalid_cursor(client, database, cursor):
+    headers = _create_countries(database, ["Angola"])
+
+    res = client.get("/v1/countries/", query_string={"cursor": cursor}, headers=headers)
+
+    assert res.status_code == 422
+    assert res.json == {"cursor": ["Invalid cursor"]}
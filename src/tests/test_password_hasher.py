@@ -0,0 +1,44 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from app import argon2
+from app.main.models.main import User
+from app.utils import password_hasher
+
+
+def test_password_is_hashed_and_checked(app):
+    user = User()
+    user.set_password("password")
+
+    assert user.password != "password"
+    assert user.verify_password("password")
+    assert not user.verify_password("other")
+
+
+def test_concurrent_hashes_are_bounded_by_the_pool_size(app, monkeypatch):
+    app.config["PASSWORD_HASH_POOL_SIZE"] = 2
+    lock = threading.Lock()
+    hashing = {"now": 0, "max": 0}
+
+    def generate_password_hash(password):
+        with lock:
+            hashing["now"] += 1
+            hashing["max"] = max(hashing["max"], hashing["now"])
+        time.sleep(0.05)
+        with lock:
+            hashing["now"] -= 1
+        return f"hash-{password}"
+
+    monkeypatch.setattr(argon2, "generate_password_hash", generate_password_hash)
+
+    def hash_password(password):
+        # Like requests served on threads of their own.
+        with app.app_context():
+            return password_hasher.hash_password(password)
+
+    with ThreadPoolExecutor(max_workers=6) as executor:
+        hashes = list(executor.map(hash_password, map(str, range(6))))
+
+    assert hashes == [f"hash-{i}" for i in range(6)]
+    assert hashing["max"] == 2
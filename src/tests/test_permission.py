@@ -0,0 +1,72 @@
+import pytest
+from flask_login import login_required
+
+from app.decorators.permission import permission_required
+from app.main.dao import permission as permission_dao
+
+from . import factories
+
+
+def _add_view(app, permission):
+    @login_required
+    @permission_required(permission)
+    def view():
+        return {}
+
+    app.add_url_rule("/test/permission/", "test_permission", view)
+
+
+def _create_user_with_permissions(database, permissions):
+    user = factories.create_user()
+    role = factories.create_role(permissions, user)
+    factories.create_user_role(user, role, user)
+    session = factories.create_session(user)
+    database.session.commit()
+    return {"Authorization": session.uuid}
+
+
+@pytest.mark.parametrize("permission", ["", "users", (), ["users.view", None]])
+def test_invalid_identifiers_fail_at_decoration(permission):
+    with pytest.raises(ValueError):
+        permission_required(permission)
+
+
+def test_permission_mask(database):
+    view = factories.create_permission("users", "view")
+    edit = factories.create_permission("users", "edit")
+
+    assert permission_dao.get_permission_mask(["users.view"]) == 1 << view.id
+    assert permission_dao.get_permission_mask(["users.view", "users.edit"]) == (
+        1 << view.id | 1 << edit.id
+    )
+
+
+def test_user_with_any_of_the_permissions_is_allowed(app, client, database):
+    _add_view(app, ["users.view", "users.edit"])
+    factories.create_permission("users", "view")
+    edit = factories.create_permission("users", "edit")
+    headers = _create_user_with_permissions(database, [edit])
+
+    assert client.get("/test/permission/", headers=headers).status_code == 200
+
+
+def test_user_without_the_permission_is_denied(app, client, database):
+    _add_view(app, "users.edit")
+    view = factories.create_permission("users", "view")
+    factories.create_permission("users", "edit")
+    headers = _create_user_with_permissions(database, [view])
+
+    assert client.get("/test/permission/", headers=headers).status_code == 401
+
+
+def test_unknown_identifier_fails_and_is_not_cached(app, client, database):
+    _add_view(app, "users.edit")
+    headers = _create_user_with_permissions(database, [])
+
+    with pytest.raises(ValueError, match="users.edit"):
+        client.get("/test/permission/", headers=headers)
+
+    # Added by a migration while the process is running.
+    edit = factories.create_permission("users", "edit")
+    headers = _create_user_with_permissions(database, [edit])
+    assert client.get("/test/permission/", headers=headers).status_code == 200
@@ -0,0 +1,139 @@
+from app.main.dao import flow_template as flow_template_dao
+from app.main.models.flow_graph import ISSUE_CYCLE_WITHOUT_INPUT
+from app.main.models.main import (
+    CAMPAIGN_STATUS_DRAFT,
+    CAMPAIGN_STATUS_STARTED,
+    FLOW_TEMPLATE_STATUS_DRAFT,
+    FLOW_TEMPLATE_STATUS_PUBLISHED,
+    Campaign,
+    FlowTemplate,
+    FlowTemplateStep,
+)
+
+from . import factories
+
+HANG_UP_URL = (
+    "/v1/flow-templates/{flow_template_id}/flows/{flow_id}/steps/hang-up/{step_id}/"
+)
+
+
+def _get_state(database, flow_template_id, step_id):
+    database.session.expire_all()
+    flow_template = database.session.get(FlowTemplate, flow_template_id)
+    step = FlowTemplateStep.query.filter(FlowTemplateStep.step_id == step_id).one()
+    return flow_template.version, flow_template.published_version_id, step.spec
+
+
+def test_published_template_is_not_saved_with_errors(
+    client, database, flow_template_factory
+):
+    flow_template_id, _, step_id, url, headers = flow_template_factory(
+        FLOW_TEMPLATE_STATUS_PUBLISHED, url=HANG_UP_URL
+    )
+    state = _get_state(database, flow_template_id, step_id)
+
+    # The step leads to itself without waiting for input.
+    data = {"name": "Hang Up", "isCheckpoint": False, "nextStepId": step_id}
+    res = client.put(url, json=data, headers=headers)
+
+    assert res.status_code == 422
+    assert [error["code"] for error in res.json["errors"]] == [
+        ISSUE_CYCLE_WITHOUT_INPUT
+    ]
+    assert _get_state(database, flow_template_id, step_id) == state
+
+
+def test_published_template_is_saved_without_errors(
+    client, database, flow_template_factory
+):
+    flow_template_id, _, step_id, url, headers = flow_template_factory(
+        FLOW_TEMPLATE_STATUS_PUBLISHED, url=HANG_UP_URL
+    )
+    version, published_version_id, _ = _get_state(
+        database, flow_template_id, step_id
+    )
+
+    data = {"name": "Goodbye", "isCheckpoint": False, "nextStepId": None}
+    res = client.put(url, json=data, headers=headers)
+
+    assert res.status_code == 200
+    state = _get_state(database, flow_template_id, step_id)
+    assert state[0] > version
+    assert state[1] != published_version_id
+    assert state[2]["name"] == "Goodbye"
+
+
+def test_draft_template_is_saved_with_errors(client, database, flow_template_factory):
+    flow_template_id, _, step_id, url, headers = flow_template_factory(
+        FLOW_TEMPLATE_STATUS_DRAFT, url=HANG_UP_URL
+    )
+
+    data = {"name": "Hang Up", "isCheckpoint": False, "nextStepId": step_id}
+    res = client.put(url, json=data, headers=headers)
+
+    assert res.status_code == 200
+    _, _, spec = _get_state(database, flow_template_id, step_id)
+    assert spec["nextStepId"] == step_id
+
+
+def test_save_pins_started_campaigns_to_the_replaced_version(
+    client, database, flow_template_factory
+):
+    flow_template_id, _, step_id, url, headers = flow_template_factory(
+        FLOW_TEMPLATE_STATUS_PUBLISHED, url=HANG_UP_URL
+    )
+    flow_template = database.session.get(FlowTemplate, flow_template_id)
+    published_version_id = flow_template.published_version_id
+    owner = factories.create_user(name="Owner")
+    org = factories.create_org(owner)
+    started = factories.create_campaign(
+        org, flow_template, owner, status=CAMPAIGN_STATUS_STARTED
+    )
+    draft = factories.create_campaign(
+        org, flow_template, owner, status=CAMPAIGN_STATUS_DRAFT
+    )
+    database.session.commit()
+    started_id, draft_id = started.id, draft.id
+
+    data = {"name": "Goodbye", "isCheckpoint": False, "nextStepId": None}
+    assert client.put(url, json=data, headers=headers).status_code == 200
+
+    database.session.expire_all()
+    started = database.session.get(Campaign, started_id)
+    assert started.flow_template_version_id == published_version_id
+    assert database.session.get(Campaign, draft_id).flow_template_version_id is None
+    flow_template = database.session.get(FlowTemplate, flow_template_id)
+    assert flow_template.published_version_id != published_version_id
+
+
+def test_save_after_unpublishing_pins_started_campaigns(
+    client, database, flow_template_factory
+):
+    flow_template_id, _, step_id, url, headers = flow_template_factory(
+        FLOW_TEMPLATE_STATUS_PUBLISHED, url=HANG_UP_URL
+    )
+    flow_template = database.session.get(FlowTemplate, flow_template_id)
+    published_version_id = flow_template.published_version_id
+    owner = factories.create_user(name="Owner")
+    org = factories.create_org(owner)
+    started = factories.create_campaign(
+        org, flow_template, owner, status=CAMPAIGN_STATUS_STARTED
+    )
+    database.session.commit()
+    started_id = started.id
+
+    res = client.put(
+        f"/v1/flow-templates/{flow_template_id}/status/",
+        json={"status": FLOW_TEMPLATE_STATUS_DRAFT},
+        headers=headers,
+    )
+    assert res.status_code == 200
+    data = {"name": "Goodbye", "isCheckpoint": False, "nextStepId": None}
+    assert client.put(url, json=data, headers=headers).status_code == 200
+
+    database.session.expire_all()
+    started = database.session.get(Campaign, started_id)
+    assert started.flow_template_version_id == published_version_id
+    template = flow_template_dao.get_campaign_template(started)
+    [flow] = template.flows
+    assert flow.get_step(step_id).name == "Hang Up"
@@ -0,0 +1,67 @@
+from app.main.dao import audio as audio_dao
+from app.main.dao import flow_template as flow_template_dao
+from app.utils import audio
+
+from . import factories
+
+
+def _create_content(database):
+    user = factories.create_user()
+    flow_template = factories.create_flow_template(user)
+    org = factories.create_org(user)
+    other_org = factories.create_org(user, name="Other")
+    default = factories.create_flow_template_message(flow_template, user, "Hello")
+    own = factories.create_flow_template_message(flow_template, user, "Hello", org)
+    factories.create_flow_template_message(flow_template, user, "Bye")
+    factories.create_flow_template_message(
+        flow_template, user, "Other", other_org
+    )
+    factories.create_flow_template_message(flow_template, user, "Mine", org)
+    database.session.commit()
+    return flow_template, org.id, default.id, own.id
+
+
+def _get_message_ids(content):
+    return {message.name: message.id for message in content.get_messages()}
+
+
+def test_org_rows_replace_the_defaults(database):
+    flow_template, org_id, _, own_id = _create_content(database)
+
+    content = flow_template_dao.get_resolved_content(flow_template, org_id)
+
+    message_ids = _get_message_ids(content)
+    assert sorted(message_ids) == ["Bye", "Hello", "Mine"]
+    assert message_ids["Hello"] == own_id
+    assert content.get_message("Hello").org_id == org_id
+    assert content.get_message("Other") is None
+
+
+def test_defaults_are_resolved_without_an_org(database):
+    flow_template, _, default_id, _ = _create_content(database)
+
+    content = flow_template_dao.get_resolved_content(flow_template, None)
+
+    message_ids = _get_message_ids(content)
+    assert sorted(message_ids) == ["Bye", "Hello"]
+    assert message_ids["Hello"] == default_id
+
+
+def test_content_version_is_part_of_the_cache_key(database):
+    flow_template, org_id, default_id, _ = _create_content(database)
+    content = flow_template_dao.get_resolved_content(flow_template, None)
+    assert flow_template_dao.get_resolved_content(flow_template, None) is content
+    version = flow_template.version
+
+    message = audio_dao.get_audio_row(audio_dao.AUDIO_KIND_MESSAGE, default_id)
+    info = audio.AudioInfo(audio.AUDIO_FORMAT_WAV, 1000, 8000, 1)
+    audio_dao.set_audio_info(message, info, message.audio_file_path)
+    database.session.commit()
+
+    new_content = flow_template_dao.get_resolved_content(flow_template, None)
+    assert flow_template.version == version
+    assert new_content is not content
+    assert new_content.get_message("Hello").audio_duration_ms == 1000
+    cache = flow_template_dao._get_content_cache()
+    key = (flow_template.id, version, flow_template.content_version - 1, None)
+    assert cache.get(key) is content
@@ -0,0 +1,20 @@
+import json
+import math
+
+from app.utils import serialization
+
+
+def test_canonical_output_matches_the_json_module():
+    value = {"b": [1, "é", None, True], "a": {"z": 1.5, "y": "x"}, 3: "key"}
+
+    expected = json.dumps(
+        value, sort_keys=False, separators=(",", ":"), ensure_ascii=False
+    )
+    assert serialization.dumps_str(value) == expected
+    assert serialization.dumps({"b": 1, "a": 2}, sort_keys=True) == b'{"a":2,"b":1}'
+
+
+def test_floats_differ_from_the_json_module():
+    assert json.dumps(1e16) == "1e+16"
+    assert serialization.dumps(1e16) == b"1e16"
+    assert serialization.dumps([math.nan, math.inf]) == b"[null,null]"
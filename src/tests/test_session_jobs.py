@@ -0,0 +1,108 @@
+import datetime
+
+import pytest
+
+from app.main.dao import session as session_dao
+from app.main.jobs import session as session_jobs
+from app.main.models.main import Session
+from app.utils import session_tracker
+
+from . import factories
+
+
+@pytest.fixture
+def max_age(app):
+    app.config["SESSION_MAX_AGE"] = 3600
+    return 3600
+
+
+def _create_sessions(database, last_seen_ats):
+    user = factories.create_user()
+    session_ids = [
+        factories.create_session(user, last_seen_at).id
+        for last_seen_at in last_seen_ats
+    ]
+    database.session.commit()
+    return session_ids
+
+
+def _get_session_ids(database):
+    database.session.expire_all()
+    return sorted(id for id, in database.session.query(Session.id))
+
+
+def _hours_ago(hours):
+    return datetime.datetime.now() - datetime.timedelta(hours=hours)
+
+
+def test_sweep_deletes_expired_sessions_in_batches(database, max_age):
+    # Sessions last seen at the same time are ordered by id.
+    expired_at = _hours_ago(2)
+    session_ids = _create_sessions(
+        database, [expired_at, expired_at, expired_at, _hours_ago(3), _hours_ago(0)]
+    )
+
+    assert session_jobs.sweep_expired_sessions({"batch_size": 2}) == 4
+    assert _get_session_ids(database) == session_ids[4:]
+
+
+def test_sweep_flushes_last_seen_at_first(database, max_age):
+    [session_id] = _create_sessions(database, [_hours_ago(2)])
+    session_tracker.touch(session_id)
+
+    assert session_jobs.sweep_expired_sessions() == 0
+    assert _get_session_ids(database) == [session_id]
+    assert session_tracker.get_last_seen_at(session_id) is None
+
+
+def test_sweep_skips_sessions_seen_since_the_flush(database, max_age, monkeypatch):
+    session_ids = _create_sessions(database, [_hours_ago(2), _hours_ago(2)])
+    flush_session_last_seen_at = session_jobs.flush_session_last_seen_at
+
+    def flush_and_see_session():
+        updated = flush_session_last_seen_at()
+        # A request sees the session right after the flush.
+        session_tracker.touch(session_ids[0])
+        return updated
+
+    monkeypatch.setattr(
+        session_jobs, "flush_session_last_seen_at", flush_and_see_session
+    )
+
+    assert session_jobs.sweep_expired_sessions() == 1
+    assert _get_session_ids(database) == session_ids[:1]
+
+
+def test_maintain_partitions_flushes_last_seen_at_first(database, max_age):
+    [session_id] = _create_sessions(database, [_hours_ago(2)])
+    session_tracker.touch(session_id)
+
+    # d_session isn't partitioned in the tests.
+    assert session_jobs.maintain_session_partitions() == ([], [])
+    assert session_tracker.get_last_seen_at(session_id) is None
+    database.session.expire_all()
+    session = database.session.get(Session, session_id)
+    assert session.last_seen_at > _hours_ago(1)
+
+
+def test_next_month():
+    assert session_dao.get_next_month(datetime.date(2026, 1, 1)) == datetime.date(
+        2026, 2, 1
+    )
+    assert session_dao.get_next_month(datetime.date(2026, 12, 1)) == datetime.date(
+        2027, 1, 1
+    )
+
+
+def test_partitions_expire_once_their_whole_range_is_before_the_cutoff():
+    months = [datetime.date(2026, month, 1) for month in (8, 9, 10)]
+
+    expired = session_dao.get_expired_partition_months(
+        months, datetime.datetime(2026, 10, 1)
+    )
+    assert expired == months[:2]
+
+    expired = session_dao.get_expired_partition_months(
+        months, datetime.datetime(2026, 9, 30, 23, 59)
+    )
+    assert expired == months[:1]
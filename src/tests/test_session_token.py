@@ -0,0 +1,155 @@
+import datetime
+import time
+
+import pytest
+from itsdangerous import TimestampSigner
+from redis.exceptions import RedisError
+
+from app import redis_cache
+from app.main.dao import user as user_dao
+from app.main.jobs import session as session_jobs
+from app.main.models.main import Session, User
+from app.utils import session_tracker
+
+from . import factories
+
+
+@pytest.fixture
+def signing_enabled(app):
+    app.config["SESSION_TOKEN_SIGNING_ENABLED"] = True
+
+
+def _create_session(database):
+    user = factories.create_user(is_sys_admin=True)
+    session = factories.create_session(user)
+    database.session.commit()
+    return user.id, session.id, session.uuid
+
+
+def _issue_token(client, uuid):
+    res = client.post("/v1/session-tokens/", headers={"Authorization": uuid})
+    assert res.status_code == 200
+    return res.json["token"]
+
+
+def _get_countries(client, token):
+    return client.get("/v1/countries/", headers={"Authorization": token})
+
+
+def test_session_tokens_are_not_issued_when_signing_is_disabled(client, database):
+    _, _, uuid = _create_session(database)
+
+    res = client.post("/v1/session-tokens/", headers={"Authorization": uuid})
+
+    assert res.status_code == 404
+
+
+def test_signed_token_authenticates_the_session(client, database, signing_enabled):
+    _, _, uuid = _create_session(database)
+    token = _issue_token(client, uuid)
+
+    assert len(token) != len(uuid)
+    assert _get_countries(client, token).status_code == 200
+
+
+def test_role_change_revokes_signed_tokens(client, database, signing_enabled):
+    user_id, _, uuid = _create_session(database)
+    token = _issue_token(client, uuid)
+    assert _get_countries(client, token).status_code == 200
+
+    user_dao.delete_user_roles_with_user_id(database.session.get(User, user_id))
+    database.session.commit()
+
+    assert _get_countries(client, token).status_code == 401
+    # A token issued after the change is accepted.
+    assert _get_countries(client, _issue_token(client, uuid)).status_code == 200
+
+
+def test_signed_token_is_verified_without_the_session_row(
+    client, database, signing_enabled
+):
+    _, session_id, uuid = _create_session(database)
+    token = _issue_token(client, uuid)
+    Session.query.filter(Session.id == session_id).delete()
+    database.session.commit()
+
+    assert _get_countries(client, token).status_code == 200
+
+
+def test_revoked_session_rejects_signed_tokens(client, database, signing_enabled):
+    _, _, uuid = _create_session(database)
+    token = _issue_token(client, uuid)
+
+    res = client.delete("/v1/session-tokens/", headers={"Authorization": token})
+    assert res.status_code == 200
+
+    assert _get_countries(client, token).status_code == 401
+    # The opaque token of the session is still accepted.
+    assert _get_countries(client, uuid).status_code == 200
+
+
+def test_swept_session_revokes_signed_tokens(client, database, signing_enabled):
+    _, session_id, uuid = _create_session(database)
+    token = _issue_token(client, uuid)
+    # The session hasn't been seen for two hours.
+    client.application.config["SESSION_MAX_AGE"] = 3600
+    last_seen_at = datetime.datetime.now() - datetime.timedelta(hours=2)
+    Session.query.filter(Session.id == session_id).update(
+        {Session.last_seen_at: last_seen_at}
+    )
+    database.session.commit()
+    redis_cache.connection.delete(session_tracker.LAST_SEEN_AT_KEY)
+
+    assert session_jobs.sweep_expired_sessions() == 1
+    assert _get_countries(client, token).status_code == 401
+
+
+def test_token_older_than_the_session_max_age_checks_the_row(
+    client, database, signing_enabled, monkeypatch
+):
+    _, _, uuid = _create_session(database)
+    with monkeypatch.context() as m:
+        issued_at = int(time.time()) - 7200
+        m.setattr(TimestampSigner, "get_timestamp", lambda self: issued_at)
+        token = _issue_token(client, uuid)
+    client.application.config["SESSION_MAX_AGE"] = 3600
+    redis_cache.connection.delete(session_tracker.LAST_SEEN_AT_KEY)
+
+    # The row was seen when the session was created.
+    assert _get_countries(client, token).status_code == 200
+
+
+def test_revocation_check_fails_closed(
+    client, database, signing_enabled, monkeypatch
+):
+    _, _, uuid = _create_session(database)
+    token = _issue_token(client, uuid)
+
+    def fail(*args, **kwargs):
+        raise RedisError("Unavailable")
+
+    monkeypatch.setattr(redis_cache.connection, "pipeline", fail)
+    assert _get_countries(client, token).status_code == 401
+
+
+def test_expired_signed_token_is_rejected(
+    client, database, signing_enabled, monkeypatch
+):
+    _, _, uuid = _create_session(database)
+    max_age = client.application.config["SESSION_TOKEN_MAX_AGE"]
+    with monkeypatch.context() as m:
+        issued_at = int(time.time()) - max_age - 1
+        m.setattr(TimestampSigner, "get_timestamp", lambda self: issued_at)
+        token = _issue_token(client, uuid)
+
+    assert _get_countries(client, token).status_code == 401
+
+
+def test_tampered_signed_token_is_rejected(client, database, signing_enabled):
+    _, _, uuid = _create_session(database)
+    token = _issue_token(client, uuid)
+    payload, signature = token.rsplit(".", 1)
+
+    res = _get_countries(client, f"{payload}.{signature[::-1]}")
+
+    assert res.status_code == 401
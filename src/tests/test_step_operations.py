@@ -0,0 +1,93 @@
+from app.main.models.main import (
+    FLOW_TEMPLATE_STATUS_PUBLISHED,
+    FlowTemplate,
+    FlowTemplateStep,
+)
+
+OPERATIONS_URL = "/v1/flow-templates/{flow_template_id}/flows/{flow_id}/operations/"
+
+
+def _get_state(database, flow_template_id):
+    database.session.expire_all()
+    version = database.session.get(FlowTemplate, flow_template_id).version
+    steps = FlowTemplateStep.query.filter(
+        FlowTemplateStep.flow_template_id == flow_template_id
+    ).order_by(FlowTemplateStep.sequence)
+    return version, [(step.step_id, step.spec) for step in steps]
+
+
+def _create_hang_up(temp_id, name, next_step_id=None):
+    return {
+        "action": "create",
+        "stepType": "HangUp",
+        "tempId": temp_id,
+        "data": {"name": name, "isCheckpoint": False, "nextStepId": next_step_id},
+    }
+
+
+def test_operations_are_applied_in_order(client, database, flow_template_factory):
+    flow_template_id, _, step_id, url, headers = flow_template_factory(
+        url=OPERATIONS_URL
+    )
+    version, _ = _get_state(database, flow_template_id)
+
+    operations = [
+        _create_hang_up("a", "First"),
+        # Refers to the step created by the first operation.
+        _create_hang_up("b", "Second", "a"),
+        {"action": "delete", "stepId": step_id},
+    ]
+    res = client.post(url, json={"operations": operations}, headers=headers)
+
+    assert res.status_code == 200
+    temp_ids = res.json["tempIds"]
+    new_version, steps = _get_state(database, flow_template_id)
+    assert new_version > version
+    assert [step_id for step_id, _ in steps] == [temp_ids["a"], temp_ids["b"]]
+    assert steps[1][1]["nextStepId"] == temp_ids["a"]
+
+
+def test_invalid_operation_rolls_back_the_batch(
+    client, database, flow_template_factory
+):
+    flow_template_id, _, step_id, url, headers = flow_template_factory(
+        url=OPERATIONS_URL
+    )
+    state = _get_state(database, flow_template_id)
+
+    operations = [
+        _create_hang_up("a", "First"),
+        {"action": "delete", "stepId": step_id},
+        # The name is already used by the step created above.
+        _create_hang_up("b", "first"),
+    ]
+    res = client.post(url, json={"operations": operations}, headers=headers)
+
+    assert res.status_code == 422
+    assert list(res.json["operations"]) == ["2"]
+    assert "name" in res.json["operations"]["2"]
+    assert _get_state(database, flow_template_id) == state
+
+
+def test_batch_with_analysis_errors_rolls_back_a_published_template(
+    client, database, flow_template_factory
+):
+    flow_template_id, _, step_id, url, headers = flow_template_factory(
+        FLOW_TEMPLATE_STATUS_PUBLISHED, url=OPERATIONS_URL
+    )
+    state = _get_state(database, flow_template_id)
+
+    # Each operation is valid, but together they loop without waiting.
+    operations = [
+        _create_hang_up("a", "First", step_id),
+        {
+            "action": "update",
+            "stepId": step_id,
+            "data": {"name": "Hang Up", "isCheckpoint": False, "nextStepId": "a"},
+        },
+    ]
+    res = client.post(url, json={"operations": operations}, headers=headers)
+
+    assert res.status_code == 422
+    assert res.json["errors"]
+    assert _get_state(database, flow_template_id) == state
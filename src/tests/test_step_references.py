@@ -0,0 +1,220 @@
+from app.main.dao import flow_template as flow_template_dao
+from app.main.models.flow_template import (
+    EVENT_START,
+    GET_INPUT_PURPOSE_MAKE_DECISION,
+    Event,
+    Template,
+)
+from app.main.models.main import FlowTemplateStep
+
+FLOW_URL = "/v1/flow-templates/{flow_template_id}/flows/{flow_id}/"
+
+
+def _step(id, next_step_id=None):
+    return {
+        "id": id,
+        "type": "HangUp",
+        "name": f"Step {id}",
+        "nextStepId": next_step_id,
+    }
+
+
+def _decision_step(id, option_next_step_ids, next_step_id=None):
+    options = [
+        {"key": key, "text": f"Option {key}", "nextStepId": option_next_step_id}
+        for key, option_next_step_id in enumerate(option_next_step_ids, 1)
+    ]
+    return {
+        "id": id,
+        "type": "GetInput",
+        "name": f"Step {id}",
+        "purpose": GET_INPUT_PURPOSE_MAKE_DECISION,
+        "messageNames": ["Question"],
+        "optionsType": "Static",
+        "options": options,
+        "nextStepId": next_step_id,
+    }
+
+
+def _get_flow(steps, start_step_id=None):
+    flow_json = {
+        "id": "main",
+        "name": "Main",
+        "events": [{"id": EVENT_START, "name": "Start", "nextStepId": start_step_id}],
+        "steps": steps,
+    }
+    template = Template(template_json={"start": "main", "flows": [flow_json]})
+    return template.get_flow("main")
+
+
+def _get_ids(steps_and_events):
+    return sorted(
+        (isinstance(step_or_event, Event), step_or_event.id)
+        for step_or_event in steps_and_events
+    )
+
+
+def _get_index(flow):
+    index = {}
+    for step_id in flow.predecessors_by_step_id:
+        steps, events = flow.get_predecessors(step_id)
+        index[step_id] = _get_ids(steps + events)
+    return index
+
+
+def _assert_index_is_current(flow):
+    # The index matches the one of a flow parsed from the current steps.
+    parsed_flow = Template(template_json=flow.template.to_json()).get_flow(flow.id)
+    assert _get_index(flow) == _get_index(parsed_flow)
+
+
+def test_predecessors_are_the_steps_and_events_leading_to_a_step():
+    flow = _get_flow(
+        [
+            _decision_step("a", ["b", "c", "b"], "b"),
+            _step("b", "c"),
+            _step("c"),
+        ],
+        "a",
+    )
+
+    steps, events = flow.get_predecessors("b")
+    assert [step.id for step in steps] == ["a"]
+    assert events == []
+    steps, events = flow.get_predecessors("c")
+    assert [step.id for step in steps] == ["a", "b"]
+    steps, events = flow.get_predecessors("a")
+    assert steps == []
+    assert [event.id for event in events] == [EVENT_START]
+    assert flow.get_predecessors("gone") == ([], [])
+
+
+def test_delete_step_clears_the_references_of_its_predecessors():
+    flow = _get_flow(
+        [
+            _decision_step("a", ["b", "c"], "b"),
+            _step("b", "c"),
+            _step("c"),
+            _step("d", "b"),
+        ],
+        "b",
+    )
+
+    steps, events = flow.delete_step(flow.get_step("b"))
+
+    assert [step.id for step in steps] == ["a", "d"]
+    assert [event.id for event in events] == [EVENT_START]
+    decision_step = flow.get_step("a")
+    assert decision_step.next_step_id is None
+    assert [option.next_step_id for option in decision_step.options] == [None, "c"]
+    assert flow.get_step("d").next_step_id is None
+    assert flow.get_event(EVENT_START).next_step_id is None
+    assert "b" not in flow.predecessors_by_step_id
+    # The deleted step no longer leads to the steps it referenced.
+    assert _get_ids(flow.get_predecessors("c")[0]) == [(False, "a")]
+    _assert_index_is_current(flow)
+
+
+def test_self_loops_are_indexed_and_deleted():
+    flow = _get_flow([_step("a", "a"), _step("b", "a")])
+
+    steps, _ = flow.get_predecessors("a")
+    assert [step.id for step in steps] == ["a", "b"]
+
+    steps, events = flow.delete_step(flow.get_step("a"))
+
+    # The deleted step isn't returned as one of its own predecessors.
+    assert [step.id for step in steps] == ["b"]
+    assert events == []
+    assert flow.predecessors_by_step_id == {}
+    _assert_index_is_current(flow)
+
+
+def test_reindexing_a_step_follows_its_option_changes():
+    flow = _get_flow(
+        [_decision_step("a", ["b", "b"]), _step("b"), _step("c")],
+    )
+    step = flow.get_step("a")
+
+    flow.unindex_step(step)
+    step.options[0].next_step_id = "c"
+    flow.index_step(step)
+    _assert_index_is_current(flow)
+    assert _get_ids(flow.get_predecessors("b")[0]) == [(False, "a")]
+
+    flow.unindex_step(step)
+    step.options[1].next_step_id = "a"
+    flow.index_step(step)
+    _assert_index_is_current(flow)
+    assert "b" not in flow.predecessors_by_step_id
+
+
+def _get_references(client, url, step_id, headers):
+    res = client.get(f"{url}steps/{step_id}/references/", headers=headers)
+    assert res.status_code == 200
+    return (
+        [step["id"] for step in res.json["steps"]],
+        [event["id"] for event in res.json["events"]],
+    )
+
+
+def _create_hang_up(client, url, name, next_step_id, headers):
+    res = client.post(
+        f"{url}steps/hang-up/",
+        json={"name": name, "isCheckpoint": False, "nextStepId": next_step_id},
+        headers=headers,
+    )
+    assert res.status_code == 200
+    return res.json["id"]
+
+
+def test_references_follow_step_and_event_updates(client, flow_template_factory):
+    flow_template_id, _, step_id, url, headers = flow_template_factory(url=FLOW_URL)
+    other_step_id = _create_hang_up(client, url, "Other", step_id, headers)
+
+    assert _get_references(client, url, step_id, headers) == (
+        [other_step_id],
+        [EVENT_START],
+    )
+
+    res = client.put(
+        f"{url}steps/hang-up/{other_step_id}/",
+        json={"name": "Other", "isCheckpoint": False, "nextStepId": other_step_id},
+        headers=headers,
+    )
+    assert res.status_code == 200
+    res = client.put(
+        f"{url}events/{EVENT_START}/",
+        json={"nextStepId": other_step_id},
+        headers=headers,
+    )
+    assert res.status_code == 200
+
+    assert _get_references(client, url, step_id, headers) == ([], [])
+    assert _get_references(client, url, other_step_id, headers) == (
+        [other_step_id],
+        [EVENT_START],
+    )
+    res = client.get(f"{url}steps/gone/references/", headers=headers)
+    assert res.status_code == 404
+
+
+def test_delete_step_saves_the_steps_and_events_that_referenced_it(
+    client, flow_template_factory
+):
+    flow_template_id, _, step_id, url, headers = flow_template_factory(url=FLOW_URL)
+    other_step_id = _create_hang_up(client, url, "Other", step_id, headers)
+
+    res = client.delete(f"{url}steps/{step_id}/", headers=headers)
+
+    assert res.status_code == 200
+    assert _get_references(client, url, other_step_id, headers) == ([], [])
+    step = FlowTemplateStep.query.filter(
+        FlowTemplateStep.step_id == other_step_id
+    ).one()
+    assert step.spec.get("nextStepId") is None
+    flow_template = flow_template_dao.get_flow_template_with_id(flow_template_id)
+    template = flow_template_dao.get_template(flow_template)
+    [flow] = template.flows
+    assert flow.get_event(EVENT_START).next_step_id is None
+    _assert_index_is_current(flow)
@@ -0,0 +1,21 @@
+from app.main.dao import flow_template as flow_template_dao
+from app.utils import serialization
+
+from . import factories
+
+
+def test_saved_version_round_trips(database):
+    user = factories.create_user()
+    flow_template = factories.create_flow_template(user)
+    factories.create_hang_up_flow(flow_template, user)
+    template = flow_template_dao.get_template(flow_template, for_update=True)
+
+    version_id = flow_template_dao.save_template_version(template)
+    database.session.commit()
+
+    spec = serialization.loads(flow_template_dao.get_template_version_json(version_id))
+    assert spec == serialization.loads(serialization.dumps(template.to_json()))
+    version = flow_template_dao.get_template_version(version_id)
+    assert version.to_json() == template.to_json()
+    # Saving an identical template reuses the version.
+    assert flow_template_dao.save_template_version(template) == version_id